@@ -0,0 +1,134 @@
+"""
+Native async endpoints for ASGI deployments.
+
+DRF views are synchronous, so under an ASGI server every request to them hops
+to a worker thread. These are plain async Django views instead: JWT
+authentication, the ORM (aget, async for) and rendering run on the event
+loop, and password hashing runs on a thread pool (see accounts.hashing).
+Response bodies match their DRF counterparts.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.http import HttpResponse
+from django.utils.translation import gettext_lazy as _
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from . import user_cache
+from .authentication import CachedJWTAuthentication, check_user
+from .exceptions import to_api_exception
+from .hashing import HasherBusy, acheck_password, run_hasher
+from .identifiers import afind_user
+from .models import User
+from .serializers import LoginSerializer, UserSerializer
+from .throttling import LoginRateThrottle, check_throttles
+from .tokens import RefreshToken
+
+
+class AsyncAPIView(View):
+    """
+    Base for async JSON views, authenticated with the same Bearer tokens as
+    the DRF API and throttled by the same shared counters. Errors are
+    rendered the way DRF renders them.
+    """
+    authentication_required = True
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    jwt = CachedJWTAuthentication()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def authenticate(self, request):
+        header = self.jwt.get_header(request)
+        raw_token = self.jwt.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            return None
+        token = self.jwt.get_validated_token(raw_token)
+        try:
+            user_id = token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        try:
+            if jwt_settings.USER_ID_FIELD in ('id', 'pk'):
+                user = await user_cache.aget_user(user_id)
+            else:
+                user = await User.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        check_user(user, token)
+        return user
+
+    async def dispatch(self, request, *args, **kwargs):
+        # What DRF helpers used by subclasses (pagination, sparse fields) read.
+        request.query_params = request.GET
+        try:
+            if self.authentication_required:
+                user = await self.authenticate(request)
+                if user is None:
+                    raise NotAuthenticated()
+                request.user = user
+            if self.throttle_classes:
+                throttles = [throttle() for throttle in self.throttle_classes]
+                await sync_to_async(check_throttles)(throttles, request, self)
+            return await super().dispatch(request, *args, **kwargs)
+        except (APIException, HasherBusy) as exc:
+            exc = to_api_exception(exc)
+            response = self.render(exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail},
+                                   exc.status_code)
+            if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+                response['WWW-Authenticate'] = self.jwt.authenticate_header(request)
+            if getattr(exc, 'wait', None):
+                response['Retry-After'] = '%d' % exc.wait
+            return response
+
+    def render(self, data, status=status.HTTP_200_OK):
+        return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+    def get_data(self, request):
+        if request.content_type == 'application/json':
+            try:
+                return json.loads(request.body or b'{}')
+            except ValueError as exc:
+                raise ParseError(f'JSON parse error - {exc}')
+        return request.POST
+
+
+class AsyncLoginView(AsyncAPIView):
+    authentication_required = False
+    throttle_classes = [LoginRateThrottle]
+
+    async def post(self, request):
+        serializer = LoginSerializer(data=self.get_data(request))
+        if not serializer.is_valid():
+            return self.render(serializer.errors, status.HTTP_400_BAD_REQUEST)
+        identifier = serializer.validated_data['identifier']
+        password = serializer.validated_data['password']
+        user = await afind_user(identifier)
+        if user is None:
+            # Match the time a wrong password takes; see CustomAuthBackend.
+            await run_hasher(make_password, password)
+            return self.render({'error': 'Invalid credentials'}, status.HTTP_401_UNAUTHORIZED)
+        # Check the password first, as CustomAuthBackend does, so an inactive
+        # account takes as long to refuse as a wrong password.
+        if not await acheck_password(user, password) or not user.is_active:
+            return self.render({'error': 'Invalid credentials'}, status.HTTP_401_UNAUTHORIZED)
+        refresh = await RefreshToken.afor_user(user)
+        return self.render({
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+            'user': UserSerializer(user).data
+        })
+
+
+class AsyncProfileView(AsyncAPIView):
+    async def get(self, request):
+        return self.render(UserSerializer(request.user).data)
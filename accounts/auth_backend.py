@@ -1,18 +1,21 @@
 from django.contrib.auth.backends import ModelBackend
-from django.db.models import Q
+from django.contrib.auth.hashers import make_password
+from . import identifiers, user_cache
 from .models import User
 
 class CustomAuthBackend(ModelBackend):
     def authenticate(self, request, username=None, password=None, **kwargs):
-        try:
-            user = User.objects.get_by_identifier(username)
-            if user.check_password(password) and self.user_can_authenticate(user):
-                return user
-        except User.DoesNotExist:
+        user = identifiers.find_user(username)
+        if user is None:
+            # Hash anyway, so an unknown identifier takes as long as a wrong
+            # password (Django's ModelBackend does the same).
+            make_password(password)
             return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
 
     def get_user(self, user_id):
         try:
-            return User.objects.get(pk=user_id)
+            return user_cache.get_user(user_id)
         except User.DoesNotExist:
-            return None
\ No newline at end of file
+            return None
@@ -0,0 +1,105 @@
+"""
+The batching pipeline shared by the bulk-load management commands.
+
+A command reads (line, row) pairs, validates each batch with a module-level
+`prepare` function, optionally across a process pool, and inserts it with
+its own `insert`. load() drives the batches and counts the rows. It writes
+rejected rows to the rejects file and reports progress as it goes.
+"""
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.core.management.base import CommandError
+
+
+def init_worker():
+    # Spawned workers start without Django configured; forked ones already have it.
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
+
+
+def read_csv(source, required):
+    """
+    Yield (line, row) pairs from a CSV file with at least the `required` columns.
+    """
+    reader = csv.DictReader(source)
+    missing = set(required) - set(reader.fieldnames or ())
+    if missing:
+        raise CommandError(f"Missing CSV column(s): {', '.join(sorted(missing))}.")
+    # Line numbers count the header as line 1.
+    yield from enumerate(reader, start=2)
+
+
+def prepared(batches, prepare, workers):
+    """
+    Yield prepare(batch) for each batch, in file order. With workers, a few
+    batches are prepared ahead across a process pool.
+    """
+    if workers <= 1:
+        for batch in batches:
+            yield prepare(batch)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(prepare, batch))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def load(command, rows, prepare, insert, *, batch_size, workers, rejects, fields, verb, noun, skipped=0):
+    """
+    Run (line, row) pairs through prepare() and insert() in batches.
+
+    prepare(batch) returns a (line, row, data, errors) tuple per row, with
+    errors None for a valid row. insert(results) stores the valid rows and
+    returns {line: errors} for any it had to skip. The `fields` of each
+    rejected row are written to the `rejects` CSV path, if given, next to
+    its errors. With `skipped` rows already done by an earlier run, the
+    rejects file is appended to.
+    """
+    if batch_size < 1:
+        raise CommandError("--batch-size must be at least 1.")
+    rejects_file = writer = None
+    if rejects:
+        rejects_file = open(rejects, 'a' if skipped else 'w', newline='')
+        writer = csv.writer(rejects_file)
+        if not skipped:
+            writer.writerow(['line', *fields, 'errors'])
+
+    inserted = rejected = 0
+    started = time.monotonic()
+    try:
+        batches = iter(lambda: list(islice(rows, batch_size)), [])
+        for results in prepared(batches, prepare, workers):
+            errors = insert(results)
+            for line, row, _, row_errors in results:
+                row_errors = row_errors or errors.get(line)
+                if row_errors is None:
+                    inserted += 1
+                    continue
+                rejected += 1
+                if writer:
+                    writer.writerow([line, *(row.get(name, '') for name in fields), json.dumps(row_errors)])
+            rate = (inserted + rejected) / max(time.monotonic() - started, 1e-9)
+            command.stdout.write(
+                f"{skipped + inserted + rejected} rows processed, {inserted} {verb}, {rejected} rejected "
+                f"({rate:.0f} rows/s)"
+            )
+    finally:
+        if rejects_file:
+            rejects_file.close()
+
+    elapsed = time.monotonic() - started
+    command.stdout.write(command.style.SUCCESS(
+        f"{verb.capitalize()} {inserted} {noun}, rejected {rejected} rows in {elapsed:.1f}s "
+        f"({(inserted + rejected) / max(elapsed, 1e-9):.0f} rows/s)."
+    ))
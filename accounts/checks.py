@@ -0,0 +1,22 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Warning, register
+
+from . import identifiers
+
+
+@register()
+def check_negative_identifier_cache(app_configs, **kwargs):
+    """
+    Warn when unknown login identifiers are cached per process, where a
+    registration in one worker process never clears the others' entries.
+    """
+    if not identifiers.get_timeout() or not isinstance(caches[identifiers.get_alias()], LocMemCache):
+        return []
+    return [Warning(
+        f"AUTH_CACHE_ALIAS '{identifiers.get_alias()}' is a per-process LocMemCache.",
+        hint="With several worker processes, a newly registered user can be refused login for up to "
+             "AUTH_NEGATIVE_CACHE_TIMEOUT seconds. Point AUTH_CACHE_ALIAS at a shared cache, or set "
+             "AUTH_NEGATIVE_CACHE_TIMEOUT = 0.",
+        id='accounts.W001',
+    )]
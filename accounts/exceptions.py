@@ -0,0 +1,31 @@
+"""
+API errors for exceptions raised below the view layer.
+"""
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.views import exception_handler as drf_exception_handler
+
+from .hashing import HasherBusy
+
+
+class PasswordHashingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Too many password checks in progress. Try again shortly.')
+    default_code = 'hasher_busy'
+
+
+def to_api_exception(exc):
+    """
+    The APIException to answer `exc` with, or `exc` itself.
+    """
+    if isinstance(exc, HasherBusy):
+        return PasswordHashingUnavailable()
+    return exc
+
+
+def exception_handler(exc, context):
+    """
+    DRF's exception handler, also answering HasherBusy with a 503.
+    """
+    return drf_exception_handler(to_api_exception(exc), context)
@@ -0,0 +1,102 @@
+"""
+Password hashing on a bounded pool.
+
+Hashers are deliberately slow. Run on the request thread, a burst of logins
+or registrations can occupy every worker, and an async view would block the
+event loop. The login and registration endpoints hash on one shared pool of
+HASHER_WORKERS threads instead (default: the CPU count), so hashing never
+uses more than that many cores however many requests arrive. A request that
+cannot get its result within HASHER_TIMEOUT seconds (default 10) gives up
+with HasherBusy instead of queueing without limit; the API answers it with
+a 503 (see accounts.exceptions). The User model's own password methods, used
+by the admin and management commands, keep hashing on the calling thread,
+so they never raise HasherBusy.
+
+Sync callers wait for the result on their own thread; async callers await it
+without blocking the event loop. As with Django's check_password(), a
+correct password whose hash uses an outdated hasher or cost is rehashed with
+the current settings and saved.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password
+
+THREAD_NAME_PREFIX = 'password-hasher'
+
+_executor = None
+_lock = threading.Lock()
+
+
+class HasherBusy(Exception):
+    """
+    The hasher pool did not return a result within HASHER_TIMEOUT seconds.
+    """
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            workers = getattr(settings, 'HASHER_WORKERS', None) or os.cpu_count() or 1
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=THREAD_NAME_PREFIX)
+        return _executor
+
+
+def get_timeout():
+    return getattr(settings, 'HASHER_TIMEOUT', 10)
+
+
+def call_hasher(func, *args):
+    """
+    Run `func(*args)` on the hasher pool and wait for its result.
+    """
+    if threading.current_thread().name.startswith(THREAD_NAME_PREFIX):
+        # Already on the pool; waiting on it from here could deadlock.
+        return func(*args)
+    future = get_executor().submit(func, *args)
+    try:
+        return future.result(timeout=get_timeout())
+    except FutureTimeoutError:
+        future.cancel()
+        raise HasherBusy()
+
+
+async def run_hasher(func, *args):
+    """
+    Async version of call_hasher().
+    """
+    future = asyncio.get_running_loop().run_in_executor(get_executor(), func, *args)
+    try:
+        return await asyncio.wait_for(future, get_timeout())
+    except asyncio.TimeoutError:
+        raise HasherBusy()
+
+
+def hash_password(raw_password):
+    return call_hasher(make_password, raw_password)
+
+
+def check_password(user, raw_password):
+    """
+    Check `raw_password` against the user's hash, upgrading an outdated hash.
+    """
+    is_correct, must_update = call_hasher(verify_password, raw_password, user.password)
+    if is_correct and must_update:
+        user.password = hash_password(raw_password)
+        user.save(update_fields=['password'])
+    return is_correct
+
+
+async def acheck_password(user, raw_password):
+    """
+    Async version of check_password().
+    """
+    is_correct, must_update = await run_hasher(verify_password, raw_password, user.password)
+    if is_correct and must_update:
+        user.password = await run_hasher(make_password, raw_password)
+        await user.asave(update_fields=['password'])
+    return is_correct
@@ -0,0 +1,113 @@
+"""
+Login identifier lookup.
+
+An identifier is classified up front as an email address or a phone number
+and normalized the way the field stores it, so finding its user is one exact
+match on one unique index. Identifiers that match nobody are remembered in
+the AUTH_CACHE_ALIAS cache for AUTH_NEGATIVE_CACHE_TIMEOUT seconds, which
+keeps bursts of guesses off the users table; saving a user forgets its
+identifiers again. That only reaches every worker process if the cache is
+shared, so the timeout defaults to 60 when AUTH_CACHE_ALIAS is set and to 0
+(off) otherwise, and `manage.py check` warns about a LocMem cache.
+
+Callers still run the password hasher when no user is found (see
+CustomAuthBackend), so a cached miss, a database miss and a wrong password
+all take about the same time.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.base_user import BaseUserManager
+from django.core.cache import caches
+
+from . import phones
+
+EMAIL = 'email'
+PHONE_NUMBER = 'phone_number'
+
+
+def classify(identifier):
+    """
+    The (field, normalized value) `identifier` can match, or None if it is
+    neither an email address nor a valid phone number.
+    """
+    identifier = (identifier or '').strip()
+    if '@' in identifier:
+        return EMAIL, BaseUserManager.normalize_email(identifier)
+    phone_number = phones.normalize(identifier)
+    return (PHONE_NUMBER, phone_number) if phone_number else None
+
+
+def get_alias():
+    return getattr(settings, 'AUTH_CACHE_ALIAS', 'default')
+
+
+def get_cache():
+    return caches[get_alias()]
+
+
+def missing_key(field, value):
+    digest = hashlib.sha256(f'{field}:{value}'.encode()).hexdigest()
+    return f'auth:missing:{digest}'
+
+
+def is_known_missing(field, value):
+    return bool(get_timeout()) and get_cache().get(missing_key(field, value)) is not None
+
+
+def get_timeout():
+    default = 60 if hasattr(settings, 'AUTH_CACHE_ALIAS') else 0
+    return getattr(settings, 'AUTH_NEGATIVE_CACHE_TIMEOUT', default)
+
+
+def remember_missing(field, value):
+    if get_timeout():
+        get_cache().set(missing_key(field, value), 1, get_timeout())
+
+
+def forget(*users):
+    """
+    Drop any cached miss for the identifiers `users` now have.
+    """
+    keys = [
+        missing_key(field, value)
+        for user in users for field, value in ((EMAIL, user.email), (PHONE_NUMBER, user.phone_number)) if value
+    ]
+    if keys:
+        get_cache().delete_many(keys)
+
+
+def find_user(identifier):
+    """
+    The user `identifier` belongs to, or None.
+    """
+    from .models import User
+
+    lookup = classify(identifier)
+    if lookup is None or is_known_missing(*lookup):
+        return None
+    try:
+        return User.objects.get(**dict([lookup]))
+    except User.DoesNotExist:
+        remember_missing(*lookup)
+        return None
+
+
+async def afind_user(identifier):
+    """
+    Async version of find_user().
+    """
+    from .models import User
+
+    lookup = classify(identifier)
+    if lookup is None:
+        return None
+    cache, key, timeout = get_cache(), missing_key(*lookup), get_timeout()
+    if timeout and await cache.aget(key) is not None:
+        return None
+    try:
+        return await User.objects.aget(**dict([lookup]))
+    except User.DoesNotExist:
+        if timeout:
+            await cache.aset(key, 1, timeout)
+        return None
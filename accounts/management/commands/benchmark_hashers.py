@@ -0,0 +1,59 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand, CommandError
+
+PASSWORD = 'benchmark-password'
+COST_PARAMETERS = ('iterations', 'rounds', 'time_cost', 'memory_cost', 'parallelism', 'work_factor', 'block_size')
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure hashes per second for each hasher in PASSWORD_HASHERS at its configured cost, on one thread "
+        "and on as many threads as the login hasher pool (HASHER_WORKERS). The first hasher is the one new "
+        "and upgraded passwords use."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=2.0, help="Seconds to hash for, per hasher and mode.")
+        parser.add_argument('--threads', type=int, help="Threads for the parallel run (default: HASHER_WORKERS).")
+
+    def handle(self, *args, **options):
+        threads = options['threads'] or getattr(settings, 'HASHER_WORKERS', None) or os.cpu_count() or 1
+        if options['duration'] <= 0 or threads < 1:
+            raise CommandError("--duration and --threads must be positive.")
+        for index, hasher in enumerate(get_hashers()):
+            cost = ', '.join(
+                f'{name}={getattr(hasher, name)}' for name in COST_PARAMETERS if hasattr(hasher, name)
+            )
+            label = f"{hasher.algorithm}{' (default)' if index == 0 else ''}"
+            try:
+                hasher.encode(PASSWORD, hasher.salt())
+            except ValueError as exc:
+                self.stdout.write(f"{label:<28} unavailable: {exc}")
+                continue
+            count, elapsed = measure(hasher, options['duration'])
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                runs = list(executor.map(measure, [hasher] * threads, [options['duration']] * threads))
+            parallel = sum(run[0] for run in runs) / max(run[1] for run in runs)
+            self.stdout.write(
+                f"{label:<28} {1000 * elapsed / count:8.1f} ms/hash   {count / elapsed:8.1f} hashes/s on 1 thread   "
+                f"{parallel:8.1f} hashes/s on {threads}   {cost}"
+            )
+
+
+def measure(hasher, duration):
+    """
+    Hash for at least `duration` seconds and at least once. Returns the
+    number of hashes and the seconds they took.
+    """
+    count, started = 0, time.perf_counter()
+    while True:
+        hasher.encode(PASSWORD, hasher.salt())
+        count += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= duration:
+            return count, elapsed
@@ -0,0 +1,134 @@
+import json
+import os
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from accounts import bulk_load, identifiers
+from accounts.models import User
+from accounts.serializers import RegisterSerializer
+
+FIELDS = ('name', 'email', 'phone_number', 'password')
+DUPLICATE_ERRORS = {
+    'email': "A user with that email already exists.",
+    'phone_number': "A user with that phone number already exists.",
+}
+
+
+def prepare_batch(rows):
+    """
+    Validate (line, row) pairs with RegisterSerializer's rules, normalize
+    them like create_user() and hash their passwords.
+    Returns a list of (line, row, user_fields, errors).
+    """
+    results = []
+    for line, row in rows:
+        data = {name: str(row[name]).strip() for name in FIELDS if row.get(name) and str(row[name]).strip()}
+        serializer = RegisterSerializer(data=data)
+        if not serializer.is_valid():
+            errors = {field: [str(message) for message in messages] for field, messages in serializer.errors.items()}
+            results.append((line, row, None, errors))
+            continue
+        validated = serializer.validated_data
+        email = validated.get('email')
+        results.append((line, row, {
+            'name': validated['name'],
+            'email': User.objects.normalize_email(email) if email else None,
+            'phone_number': validated.get('phone_number') or None,
+            'password': make_password(validated['password']),
+        }, None))
+    return results
+
+
+def read_ndjson(source):
+    for line, text in enumerate(source, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as exc:
+            raise CommandError(f"Line {line} is not valid JSON: {exc}.")
+        if not isinstance(row, dict):
+            raise CommandError(f"Line {line} is not a JSON object.")
+        yield line, row
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users from a CSV file with name, email, phone_number and password columns, or from NDJSON "
+        "with the same keys. Rows are validated like registration, normalized like create_user(), and their "
+        "passwords are hashed across a process pool before bulk_create inserts them in batches. Rows whose "
+        "email or phone number is already taken are reported and skipped; the rest of their batch is kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or NDJSON file of users.")
+        parser.add_argument('--format', choices=('csv', 'ndjson'), help="File format (default: from the extension).")
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows per bulk_create batch.")
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help="Hash passwords across this many processes (default: the CPU count; 1 hashes in-process).",
+        )
+        parser.add_argument('--rejects', help="Write rejected rows (without passwords) and their errors to this CSV file.")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('ndjson' if options['path'].endswith(('.ndjson', '.jsonl')) else 'csv')
+        with open(options['path'], newline='', encoding='utf-8-sig') as source:
+            rows = bulk_load.read_csv(source, {'name', 'password'}) if fmt == 'csv' else read_ndjson(source)
+            bulk_load.load(
+                self, rows, prepare_batch, self.insert,
+                batch_size=options['batch_size'], workers=options['workers'], rejects=options['rejects'],
+                fields=('name', 'email', 'phone_number'), verb='created', noun='users',
+            )
+
+    def insert(self, results):
+        """
+        Insert the valid rows of one batch. Returns {line: errors} for the
+        rows skipped because their email or phone number is taken, by an
+        existing user or by an earlier row of the batch.
+        """
+        valid = [(line, data) for line, _, data, _ in results if data is not None]
+        emails = {data['email'] for _, data in valid if data['email']}
+        phones = {data['phone_number'] for _, data in valid if data['phone_number']}
+        taken = {'email': set(), 'phone_number': set()}
+        if emails or phones:
+            for email, phone_number in User.objects.filter(
+                Q(email__in=emails) | Q(phone_number__in=phones)
+            ).values_list('email', 'phone_number'):
+                taken['email'].add(email)
+                taken['phone_number'].add(str(phone_number) if phone_number else None)
+
+        errors, users = {}, {}
+        for line, data in valid:
+            duplicates = {
+                field: [message] for field, message in DUPLICATE_ERRORS.items()
+                if data[field] and data[field] in taken[field]
+            }
+            if duplicates:
+                errors[line] = duplicates
+                continue
+            for field in DUPLICATE_ERRORS:
+                if data[field]:
+                    taken[field].add(data[field])
+            users[line] = User(**data)
+
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users.values())
+        except IntegrityError:
+            # Another writer took an identifier since the check above:
+            # insert one row at a time to find out which.
+            for line, user in users.items():
+                user.pk = None
+                try:
+                    with transaction.atomic():
+                        user.save(force_insert=True)
+                except IntegrityError as exc:
+                    errors[line] = {
+                        field: [message] for field, message in DUPLICATE_ERRORS.items() if field in str(exc)
+                    } or {'non_field_errors': [str(exc)]}
+            users = {line: user for line, user in users.items() if line not in errors}
+        identifiers.forget(*users.values())
+        return errors
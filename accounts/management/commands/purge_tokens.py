@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from accounts.models import TokenFamily
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired token families, and expired outstanding refresh tokens with their blacklist entries, "
+        "in small batches, each in its own short transaction, so logins and refreshes are never blocked for "
+        "long. Unlike flushexpiredtokens it never deletes the whole backlog in one statement."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Tokens deleted per transaction.")
+        parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between batches.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1 or options['pause'] < 0:
+            raise CommandError("--batch-size must be at least 1 and --pause cannot be negative.")
+        # Tokens that expire while the command runs are left for the next run,
+        # so the loop always ends.
+        now = timezone.now()
+        for label, model in (('token families', TokenFamily), ('outstanding tokens', OutstandingToken)):
+            expired = model.objects.filter(expires_at__lte=now).order_by('pk')
+            total = 0
+            while True:
+                ids = list(expired.values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    break
+                with transaction.atomic():
+                    # Outstanding tokens cascade to BlacklistedToken.
+                    model.objects.filter(pk__in=ids).delete()
+                total += len(ids)
+                if options['verbosity'] > 1:
+                    self.stdout.write(f"Deleted {total} expired {label} so far.")
+                if options['pause']:
+                    time.sleep(options['pause'])
+            self.stdout.write(self.style.SUCCESS(f"Deleted {total} expired {label}."))
@@ -1,7 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from phonenumber_field.modelfields import PhoneNumberField
-from django.db.models import Q
+
+from . import identifiers
 
 class UserManager(BaseUserManager):
     def create_user(self, name, phone_number=None, email=None, password=None, **extra_fields):
@@ -41,7 +42,19 @@ class UserManager(BaseUserManager):
 
     def get_by_identifier(self, identifier):
         """
-        Retrieves a user by phone_number or email.
+        Retrieves a user by phone_number or email, with a single exact lookup
+        on whichever field the identifier looks like.
         """
-        return self.get(Q(phone_number=identifier) | Q(email=identifier))
+        lookup = identifiers.classify(identifier)
+        if lookup is None:
+            raise self.model.DoesNotExist(f"No user has the identifier {identifier!r}.")
+        return self.get(**dict([lookup]))
 
+    async def aget_by_identifier(self, identifier):
+        """
+        Async version of get_by_identifier().
+        """
+        lookup = identifiers.classify(identifier)
+        if lookup is None:
+            raise self.model.DoesNotExist(f"No user has the identifier {identifier!r}.")
+        return await self.aget(**dict([lookup]))
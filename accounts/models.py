@@ -17,4 +17,24 @@ class User(AbstractBaseUser, PermissionsMixin):
     REQUIRED_FIELDS = ['name']  # Name is required during creation
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+class TokenFamily(models.Model):
+    """
+    One login session: the chain of refresh tokens issued by rotating its
+    first one. Only the newest token's jti is kept, and rotating replaces
+    it in place, so a session costs one row however often it refreshes.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='token_families')
+    jti = models.CharField(max_length=255)
+    generation = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Token family'
+        verbose_name_plural = 'Token families'
+
+    def __str__(self):
+        return f'{self.user} #{self.pk}'
@@ -0,0 +1,58 @@
+"""
+Memoized phone number normalization.
+
+Parsing and validating a number with `phonenumbers` walks its metadata for
+the region, which costs far more than the rest of a login or client write.
+The same numbers come back constantly (a user logging in, a client being
+edited), so results are kept in a per-process LRU cache of
+PHONE_CACHE_SIZE entries (default 4096), keyed by the raw input and the
+default region. Entries are immutable strings, so they are safe to share.
+"""
+from functools import lru_cache
+
+import phonenumbers
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+INVALID = _('Enter a valid phone number.')
+
+
+def get_region():
+    return getattr(settings, 'PHONENUMBER_DEFAULT_REGION', None)
+
+
+@lru_cache(maxsize=getattr(settings, 'PHONE_CACHE_SIZE', 4096))
+def _normalize(value, region):
+    try:
+        number = phonenumbers.parse(value, region)
+    except phonenumbers.NumberParseException:
+        return None
+    if not phonenumbers.is_valid_number(number):
+        return None
+    return phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.E164)
+
+
+def normalize(value):
+    """
+    `value` in E.164 form, or None if it is not a valid phone number.
+    Numbers without a country code are read in PHONENUMBER_DEFAULT_REGION.
+    """
+    value = (value or '').strip()
+    return _normalize(value, get_region()) if value else None
+
+
+def stats():
+    """
+    Hit/miss counters, size and hit rate of this process's cache.
+    """
+    info = _normalize.cache_info()
+    total = info.hits + info.misses
+    return {
+        'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'max_size': info.maxsize,
+        'hit_rate': info.hits / total if total else 0.0,
+    }
+
+
+def clear():
+    _normalize.cache_clear()
+
@@ -0,0 +1,89 @@
+"""
+In-process set of revoked (blacklisted) refresh token ids.
+
+Checking a refresh token against the blacklist table on every use costs a
+join over two tables that only ever grow. This module keeps the jtis of the
+unexpired blacklisted tokens in memory instead, as 16-byte keys. The set
+catches up with the table at most every REVOCATION_REFRESH_INTERVAL seconds
+(default 5) by reading only the rows added since the last highest id, and
+drops entries once their token has expired.
+
+The set can lag behind revocations made by other processes, and a row that
+commits out of id order can be missed. It is only ever used to reject tokens
+early: consuming a refresh token (accounts.tokens.RefreshToken.blacklist)
+inserts its blacklist row, and the table's unique constraint is what finally
+stops a token from being used twice.
+"""
+import heapq
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+_revoked = set()
+_expiries = []
+_last_id = 0
+_refreshed_at = None
+_lock = threading.Lock()
+
+
+def get_interval():
+    return getattr(settings, 'REVOCATION_REFRESH_INTERVAL', 5)
+
+
+def compact(jti):
+    try:
+        return bytes.fromhex(jti) if len(jti) == 32 else jti
+    except ValueError:
+        return jti
+
+
+def add(jti, expires_at):
+    """
+    Record a token revoked by this process, given its jti and expiry time.
+    """
+    key = compact(jti)
+    with _lock:
+        if key not in _revoked:
+            _revoked.add(key)
+            heapq.heappush(_expiries, (expires_at.timestamp(), key))
+
+
+def is_revoked(jti):
+    if _refreshed_at is None or time.monotonic() - _refreshed_at >= get_interval():
+        refresh()
+    return compact(jti) in _revoked
+
+
+def refresh():
+    """
+    Load the blacklist rows added since the last refresh and forget expired tokens.
+    """
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+    global _last_id, _refreshed_at
+    now = timezone.now()
+    rows = list(
+        BlacklistedToken.objects.filter(pk__gt=_last_id, token__expires_at__gt=now)
+        .order_by('pk').values_list('pk', 'token__jti', 'token__expires_at')
+    )
+    with _lock:
+        for pk, jti, expires_at in rows:
+            _last_id = max(_last_id, pk)
+            key = compact(jti)
+            if key not in _revoked:
+                _revoked.add(key)
+                heapq.heappush(_expiries, (expires_at.timestamp(), key))
+        while _expiries and _expiries[0][0] <= now.timestamp():
+            _revoked.discard(heapq.heappop(_expiries)[1])
+        _refreshed_at = time.monotonic()
+
+
+def clear():
+    global _last_id, _refreshed_at
+    with _lock:
+        _revoked.clear()
+        _expiries.clear()
+        _last_id = 0
+        _refreshed_at = None
@@ -1,7 +1,23 @@
 from rest_framework import serializers
 from django.db import IntegrityError
 from .models import User
-from phonenumber_field.serializerfields import PhoneNumberField
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from . import hashing, phones, user_cache
+from .tokens import RefreshToken
+
+class PhoneNumberField(serializers.CharField):
+    """
+    A phone number, validated and returned in E.164 form through accounts.phones.
+    """
+    default_error_messages = {'invalid_phone_number': phones.INVALID}
+
+    def to_internal_value(self, data):
+        normalized = phones.normalize(super().to_internal_value(data))
+        if normalized is None:
+            self.fail('invalid_phone_number')
+        return normalized
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -24,8 +40,17 @@ class RegisterSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
+        email = validated_data.get('email')
+        user = User(**{
+            **validated_data,
+            'email': User.objects.normalize_email(email) if email else None,
+            # Hashed on the bounded pool (see accounts.hashing); create_user()
+            # would hash on this worker.
+            'password': hashing.hash_password(validated_data['password']),
+        })
         try:
-            return User.objects.create_user(**validated_data)
+            user.save()
+            return user
         except IntegrityError as e:
             if 'email' in str(e):
                 raise serializers.ValidationError({"email": "A user with that email already exists."})
@@ -36,4 +61,42 @@ class RegisterSerializer(serializers.ModelSerializer):
 
 class LoginSerializer(serializers.Serializer):
     identifier = serializers.CharField()
-    password = serializers.CharField(write_only=True)
\ No newline at end of file
+    password = serializers.CharField(write_only=True)
+
+class RefreshSerializer(TokenRefreshSerializer):
+    """
+    TokenRefreshSerializer for accounts.tokens.RefreshToken: rotation updates
+    the token's family in place, and the user is read through accounts.user_cache.
+    """
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        rotate = api_settings.ROTATE_REFRESH_TOKENS
+        if refresh.family_id is None and not (rotate and api_settings.BLACKLIST_AFTER_ROTATION):
+            refresh.check_blacklist_table()
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        try:
+            user = user_cache.get_user(user_id) if user_id else None
+        except User.DoesNotExist:
+            user = None
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        data = {'access': str(refresh.access_token)}
+        if refresh.family_id is not None:
+            if rotate:
+                refresh.rotate()
+                data['refresh'] = str(refresh)
+            else:
+                refresh.check_family()
+        elif rotate:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.start_family(user.pk)
+            data['refresh'] = str(refresh)
+        return data
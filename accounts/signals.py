@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import identifiers, user_cache
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def forget_missing_identifiers(sender, instance, **kwargs):
+    """
+    A user created or renamed under an identifier that recently failed to
+    match must be able to log in straight away.
+    """
+    identifiers.forget(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
@@ -1,10 +1,32 @@
+import csv
+import io
+import json
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
 import pytest
+from asgiref.sync import async_to_sync
 from django.contrib.auth import authenticate
-from django.core.exceptions import ValidationError
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+from django.test import AsyncClient, override_settings
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.exceptions import APIException
 from rest_framework.test import APIClient
 from django.urls import reverse
-from .models import User
+from . import hashing, identifiers, phones, revocation, throttling, tokens, user_cache
+from .checks import check_negative_identifier_cache
+from .models import TokenFamily, User
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
 from rest_framework_simplejwt.tokens import RefreshToken
 
 @pytest.mark.django_db
@@ -129,6 +151,500 @@ class TestCustomAuthBackend:
         user = authenticate(username="nonexistent@example.com", password="secure123")
         assert user is None
 
+@pytest.mark.django_db
+class TestIdentifierLookup:
+    @pytest.fixture(autouse=True)
+    def negative_cache(self, settings):
+        settings.AUTH_CACHE_ALIAS = 'default'
+        identifiers.get_cache().clear()
+
+    def test_classify(self):
+        assert identifiers.classify(" John@EXAMPLE.com ") == ("email", "John@example.com")
+        assert identifiers.classify("+1 (202) 555-0123") == ("phone_number", "+12025550123")
+        assert identifiers.classify("+1202") is None
+        assert identifiers.classify("not an identifier") is None
+
+    def test_single_exact_lookup(self, django_assert_num_queries):
+        User.objects.create_user(name="Jane Doe", phone_number="+12025550123", password="secure123")
+        with CaptureQueriesContext(connection) as queries:
+            user = User.objects.get_by_identifier("+1 202-555-0123")
+        assert user.phone_number == "+12025550123"
+        assert len(queries) == 1
+        assert " OR " not in queries[0]['sql']
+        with django_assert_num_queries(0), pytest.raises(User.DoesNotExist):
+            User.objects.get_by_identifier("garbage")
+
+    def test_missing_identifier_is_cached(self, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            assert authenticate(username="ghost@example.com", password="secure123") is None
+        with django_assert_num_queries(0):
+            assert authenticate(username="ghost@example.com", password="secure123") is None
+        User.objects.create_user(name="Ghost", email="ghost@example.com", password="secure123")
+        assert authenticate(username="ghost@example.com", password="secure123") is not None
+
+    @override_settings(AUTH_NEGATIVE_CACHE_TIMEOUT=0)
+    def test_negative_cache_disabled(self, django_assert_num_queries):
+        authenticate(username="ghost@example.com", password="secure123")
+        with django_assert_num_queries(1):
+            assert authenticate(username="ghost@example.com", password="secure123") is None
+
+    def test_off_without_alias(self, settings, django_assert_num_queries):
+        del settings.AUTH_CACHE_ALIAS
+        assert identifiers.get_timeout() == 0
+        authenticate(username="ghost@example.com", password="secure123")
+        with django_assert_num_queries(1):
+            assert authenticate(username="ghost@example.com", password="secure123") is None
+
+    def test_locmem_alias_warns(self, settings):
+        assert [warning.id for warning in check_negative_identifier_cache(None)] == ['accounts.W001']
+        settings.AUTH_NEGATIVE_CACHE_TIMEOUT = 0
+        assert check_negative_identifier_cache(None) == []
+
+    def test_unknown_identifier_still_hashes(self):
+        User.objects.create_user(name="John Doe", email="john@example.com", password="secure123")
+        for identifier in ("ghost@example.com", "ghost@example.com", "garbage", "john@example.com"):
+            with mock.patch.object(PBKDF2PasswordHasher, 'encode', wraps=PBKDF2PasswordHasher().encode) as encode:
+                assert authenticate(username=identifier, password="wrongpass") is None
+            assert encode.call_count == 1
+
+    def test_async_login_uses_negative_cache(self):
+        url = reverse('async-login')
+        data = {"identifier": "ghost@example.com", "password": "secure123"}
+        response = async_to_sync(AsyncClient().post)(url, data, content_type='application/json')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert identifiers.is_known_missing("email", "ghost@example.com")
+
+class TestPhoneNormalization:
+    def setup_method(self):
+        phones.clear()
+
+    def test_normalize(self):
+        assert phones.normalize(" +1 (202) 555-0123 ") == "+12025550123"
+        assert phones.normalize("+1202") is None
+        assert phones.normalize("") is None
+        assert phones.normalize(None) is None
+
+    def test_results_are_cached(self):
+        with mock.patch('phonenumbers.parse', wraps=phones.phonenumbers.parse) as parse:
+            for _ in range(3):
+                assert phones.normalize("+1 202 555 0123") == "+12025550123"
+        assert parse.call_count == 1
+        stats = phones.stats()
+        assert (stats['hits'], stats['misses'], stats['size']) == (2, 1, 1)
+        assert stats['hit_rate'] == pytest.approx(2 / 3)
+
+    @pytest.mark.django_db
+    def test_register_stores_e164(self):
+        response = APIClient().post(reverse('register'), {
+            "name": "Jane Doe", "phone_number": "+1 (202) 555-0123", "password": "secure123",
+        }, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert User.objects.get().phone_number == "+12025550123"
+
+@pytest.mark.django_db
+class TestCachedUsers:
+    def setup_method(self):
+        self.client = APIClient()
+        user_cache.clear()
+
+    @pytest.fixture
+    def user(self):
+        user = User.objects.create_user(name="John Doe", email="john@example.com", password="secure123")
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        return user
+
+    def test_profile_served_from_cache(self, user, django_assert_num_queries):
+        url = reverse('profile')
+        with django_assert_num_queries(1):
+            assert self.client.get(url).status_code == status.HTTP_200_OK
+        with django_assert_num_queries(0):
+            assert self.client.get(url).data['name'] == "John Doe"
+        user.name = "Johnny"
+        user.save()
+        assert self.client.get(url).data['name'] == "Johnny"
+
+    def test_deactivation(self, user):
+        url = reverse('profile')
+        self.client.get(url)
+        user.is_active = False
+        user.save()
+        assert self.client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_unsignalled_deactivation_expires(self, user):
+        url = reverse('profile')
+        self.client.get(url)
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        assert self.client.get(url).status_code == status.HTTP_200_OK
+        now = time.monotonic() + user_cache.get_timeout()
+        with mock.patch('accounts.user_cache.time.monotonic', return_value=now):
+            assert self.client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_returns_copies(self, user):
+        first = user_cache.get_user(user.pk)
+        first.name = "Changed"
+        assert user_cache.get_user(user.pk).name == "John Doe"
+
+    def test_save_during_read_is_not_cached(self, user):
+        version = user_cache.current_version()
+        stale = User.objects.get(pk=user.pk)
+        user.save()
+        user_cache.store(user.pk, stale, version)
+        assert user_cache.lookup(user.pk) is None
+
+    @override_settings(USER_CACHE_SIZE=2)
+    def test_least_recently_used_is_evicted(self, user, django_assert_num_queries):
+        others = [
+            User.objects.create_user(name=f"User {i}", email=f"user{i}@example.com", password="secure123")
+            for i in range(2)
+        ]
+        user_cache.get_user(user.pk)
+        user_cache.get_user(others[0].pk)
+        user_cache.get_user(user.pk)
+        user_cache.get_user(others[1].pk)
+        with django_assert_num_queries(0):
+            user_cache.get_user(user.pk)
+        assert user_cache.lookup(others[0].pk) is None
+
+    def test_async_profile_uses_cache(self, user, django_assert_num_queries):
+        headers = {'Authorization': self.client._credentials['HTTP_AUTHORIZATION']}
+        get = async_to_sync(AsyncClient().get)
+        get(reverse('async-profile'), headers=headers)
+        with django_assert_num_queries(0):
+            assert get(reverse('async-profile'), headers=headers).status_code == status.HTTP_200_OK
+
+@pytest.mark.django_db
+class TestPasswordHashing:
+    def setup_method(self):
+        self.client = APIClient()
+
+    def test_register_and_login_hash_on_pool(self):
+        threads = []
+        encode = PBKDF2PasswordHasher.encode
+
+        def record(hasher, *args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return encode(hasher, *args, **kwargs)
+
+        data = {"name": "John Doe", "email": "john@example.com", "password": "secure123"}
+        with mock.patch.object(PBKDF2PasswordHasher, 'encode', record):
+            assert self.client.post(reverse('register'), data).status_code == status.HTTP_201_CREATED
+            login = {"identifier": "john@example.com", "password": "secure123"}
+            assert self.client.post(reverse('login'), login).status_code == status.HTTP_200_OK
+        assert len(threads) == 2
+        assert all(name.startswith(hashing.THREAD_NAME_PREFIX) for name in threads)
+
+    def test_login_upgrades_outdated_hash(self):
+        user = User.objects.create_user(name="John Doe", email="john@example.com")
+        hasher = PBKDF2PasswordHasher()
+        user.password = hasher.encode("secure123", hasher.salt(), iterations=1000)
+        user.save()
+        login = {"identifier": "john@example.com", "password": "secure123"}
+        assert self.client.post(reverse('login'), login).status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert hasher.decode(user.password)['iterations'] == hasher.iterations
+        assert user.check_password("secure123")
+
+    def test_busy_pool_rejects_api_requests_only(self):
+        user = User.objects.create_user(name="John Doe", email="john@example.com", password="secure123")
+        release = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix=hashing.THREAD_NAME_PREFIX)
+        pool.submit(release.wait)
+        login = {"identifier": "john@example.com", "password": "secure123"}
+        try:
+            with mock.patch.object(hashing, '_executor', pool), override_settings(HASHER_TIMEOUT=0.05):
+                response = self.client.post(reverse('login'), login)
+                register = self.client.post(
+                    reverse('register'), {"name": "Jane Doe", "email": "jane@example.com", "password": "secure123"},
+                )
+                async_response = async_to_sync(AsyncClient().post)(
+                    reverse('async-login'), login, content_type='application/json',
+                )
+                # The admin, createsuperuser and changepassword hash on their own thread.
+                user.set_password("changed123")
+                user.save()
+                assert authenticate(username="john@example.com", password="changed123") == user
+                assert User.objects.create_superuser("Admin", email="admin@example.com", password="admin123")
+        finally:
+            release.set()
+            pool.shutdown()
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.data['detail'].code == 'hasher_busy'
+        assert register.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert not User.objects.filter(email="jane@example.com").exists()
+        assert async_response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert async_response.json() == {'detail': response.data['detail']}
+        assert not issubclass(hashing.HasherBusy, APIException)
+        login['password'] = "changed123"
+        assert self.client.post(reverse('login'), login).status_code == status.HTTP_200_OK
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_benchmark_hashers_command(self):
+        out = io.StringIO()
+        call_command('benchmark_hashers', duration=0.01, threads=2, stdout=out)
+        assert "md5 (default)" in out.getvalue()
+        assert "hashes/s on 2" in out.getvalue()
+
+@pytest.mark.django_db
+class TestTokenRevocation:
+    def setup_method(self):
+        self.client = APIClient()
+        revocation.clear()
+
+    @pytest.fixture
+    def refresh(self):
+        user = User.objects.create_user(name="John Doe", email="john@example.com", password="secure123")
+        return str(RefreshToken.for_user(user))
+
+    def post_refresh(self, token):
+        return self.client.post(reverse('token_refresh'), {'refresh': token}, format='json')
+
+    def test_rotation_rejects_reuse(self, refresh, django_assert_max_num_queries):
+        # Tokens issued before token families (see TestTokenFamilies).
+        rotated = self.post_refresh(refresh)
+        assert rotated.status_code == status.HTTP_200_OK
+        assert BlacklistedToken.objects.filter(token__jti=RefreshToken(refresh, verify=False)['jti']).exists()
+        assert tokens.RefreshToken(rotated.data['refresh']).family_id is not None
+        with django_assert_max_num_queries(0):
+            assert self.post_refresh(refresh).status_code == status.HTTP_401_UNAUTHORIZED
+        # A process that has not seen the revocation yet: the INSERT catches reuse.
+        with mock.patch.object(revocation, 'is_revoked', return_value=False):
+            assert self.post_refresh(refresh).status_code == status.HTTP_401_UNAUTHORIZED
+        assert self.post_refresh(rotated.data['refresh']).status_code == status.HTTP_200_OK
+
+    def test_logout_revokes(self, refresh):
+        user = User.objects.get(email="john@example.com")
+        self.client.force_authenticate(user)
+        assert self.client.post(reverse('logout'), {'refresh': refresh}).status_code == status.HTTP_205_RESET_CONTENT
+        assert self.client.post(reverse('logout'), {'refresh': refresh}).status_code == status.HTTP_400_BAD_REQUEST
+        assert self.post_refresh(refresh).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_set_loads_new_rows_and_drops_expired(self, refresh):
+        jti = RefreshToken(refresh, verify=False)['jti']
+        assert not revocation.is_revoked(jti)
+        outstanding = OutstandingToken.objects.get(jti=jti)
+        BlacklistedToken.objects.create(token=outstanding)
+        revocation.refresh()
+        assert revocation.is_revoked(jti)
+        later = outstanding.expires_at + timedelta(seconds=1)
+        with mock.patch('accounts.revocation.timezone.now', return_value=later):
+            revocation.refresh()
+        assert not revocation.is_revoked(jti)
+
+    def test_purge_tokens(self, refresh):
+        user = User.objects.get(email="john@example.com")
+        past = timezone.now() - timedelta(days=2)
+        TokenFamily.objects.create(user=user, jti='expired', expires_at=past)
+        TokenFamily.objects.create(user=user, jti='live', expires_at=timezone.now() + timedelta(days=1))
+        for i in range(5):
+            token = OutstandingToken.objects.create(
+                user=user, jti=f'expired-{i}', token='x', created_at=past, expires_at=past,
+            )
+            if i % 2:
+                BlacklistedToken.objects.create(token=token)
+        out = io.StringIO()
+        call_command('purge_tokens', batch_size=2, stdout=out)
+        assert "Deleted 5 expired outstanding tokens." in out.getvalue()
+        assert "Deleted 1 expired token families." in out.getvalue()
+        assert list(TokenFamily.objects.values_list('jti', flat=True)) == ['live']
+        assert list(OutstandingToken.objects.values_list('jti', flat=True)) == [RefreshToken(refresh, verify=False)['jti']]
+        assert not BlacklistedToken.objects.exists()
+
+@pytest.mark.django_db
+class TestTokenFamilies:
+    def setup_method(self):
+        self.client = APIClient()
+
+    @pytest.fixture
+    def refresh(self):
+        User.objects.create_user(name="John Doe", email="john@example.com", password="secure123")
+        login = {"identifier": "john@example.com", "password": "secure123"}
+        return self.client.post(reverse('login'), login).data['refresh']
+
+    def post_refresh(self, token):
+        return self.client.post(reverse('token_refresh'), {'refresh': token}, format='json')
+
+    def test_login_starts_family(self, refresh):
+        family = TokenFamily.objects.get()
+        token = tokens.RefreshToken(refresh)
+        assert token.family_id == family.pk
+        assert family.jti == token['jti'] and family.generation == 0
+        assert tokens.FAMILY_CLAIM not in token.access_token.payload
+        assert not OutstandingToken.objects.exists()
+
+    def test_rotation_updates_family_in_place(self, refresh, django_assert_num_queries):
+        first = self.post_refresh(refresh).data['refresh']
+        with django_assert_num_queries(1):
+            response = self.post_refresh(first)
+        assert response.status_code == status.HTTP_200_OK
+        family = TokenFamily.objects.get()
+        assert family.generation == 2
+        assert family.jti == tokens.RefreshToken(response.data['refresh'])['jti']
+        assert family.revoked_at is None
+        assert not OutstandingToken.objects.exists() and not BlacklistedToken.objects.exists()
+
+    def test_reuse_revokes_family(self, refresh):
+        rotated = self.post_refresh(refresh).data['refresh']
+        assert self.post_refresh(refresh).status_code == status.HTTP_401_UNAUTHORIZED
+        assert TokenFamily.objects.get().revoked_at is not None
+        assert self.post_refresh(rotated).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_logout_revokes_family(self, refresh, django_assert_num_queries):
+        user = User.objects.get(email="john@example.com")
+        self.client.force_authenticate(user)
+        rotated = self.post_refresh(refresh).data['refresh']
+        with django_assert_num_queries(1):
+            response = self.client.post(reverse('logout'), {'refresh': rotated})
+        assert response.status_code == status.HTTP_205_RESET_CONTENT
+        assert self.client.post(reverse('logout'), {'refresh': rotated}).status_code == status.HTTP_400_BAD_REQUEST
+        assert self.post_refresh(rotated).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_async_login_starts_family(self):
+        User.objects.create_user(name="John Doe", email="john@example.com", password="secure123")
+        login = {"identifier": "john@example.com", "password": "secure123"}
+        response = async_to_sync(AsyncClient().post)(reverse('async-login'), login, content_type='application/json')
+        family = TokenFamily.objects.get()
+        assert tokens.RefreshToken(response.json()['refresh']).family_id == family.pk
+        assert self.post_refresh(response.json()['refresh']).status_code == status.HTTP_200_OK
+
+@pytest.mark.django_db
+class TestProvisionUsers:
+    @pytest.fixture(autouse=True)
+    def fast_hasher(self, settings):
+        settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+        identifiers.get_cache().clear()
+
+    @pytest.fixture
+    def source(self, tmp_path):
+        User.objects.create_user(name="Existing", email="taken@example.com", password="secure123")
+        path = tmp_path / "users.csv"
+        with path.open("w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "email", "phone_number", "password"])
+            writer.writerow(["Ann", "ann@EXAMPLE.com", "", "secure123"])
+            writer.writerow(["Bob", "", "+1 202-555-0199", "secure123"])
+            writer.writerow(["Nobody", "", "", "secure123"])
+            writer.writerow(["Dup", "taken@example.com", "", "secure123"])
+            writer.writerow(["Ann Again", "ann@example.com", "", "secure123"])
+            writer.writerow(["Cy", "cy@example.com", "+12025550199", "secure123"])
+        return path
+
+    def test_provision_csv(self, source, tmp_path):
+        assert authenticate(username="ann@example.com", password="secure123") is None
+        rejects = tmp_path / "rejects.csv"
+        out = io.StringIO()
+        call_command('provision_users', str(source), batch_size=4, workers=1, rejects=str(rejects), stdout=out)
+        assert "Created 2 users, rejected 4 rows" in out.getvalue()
+        assert User.objects.get(email="ann@example.com").name == "Ann"
+        assert User.objects.get(phone_number="+12025550199").name == "Bob"
+        assert authenticate(username="ann@example.com", password="secure123") is not None
+        rows = {row[0]: row for row in csv.reader(rejects.open())}
+        assert "Either phone_number or email must be provided" in rows["4"][-1]
+        assert json.loads(rows["5"][-1]) == {"email": ["A user with that email already exists."]}
+        assert json.loads(rows["6"][-1]) == {"email": ["A user with that email already exists."]}
+        assert json.loads(rows["7"][-1]) == {"phone_number": ["A user with that phone number already exists."]}
+        assert "secure123" not in rejects.read_text()
+
+    def test_provision_ndjson_with_workers(self, tmp_path):
+        path = tmp_path / "users.ndjson"
+        path.write_text("".join(
+            json.dumps({"name": f"User {i}", "email": f"user{i}@example.com", "password": "secure123"}) + "\n"
+            for i in range(5)
+        ))
+        call_command('provision_users', str(path), batch_size=2, workers=2, stdout=io.StringIO())
+        assert User.objects.count() == 5
+        assert authenticate(username="user4@example.com", password="secure123") is not None
+
+    def test_missing_columns_and_bad_batch_size(self, tmp_path):
+        path = tmp_path / "users.csv"
+        path.write_text("name,email\nAnn,ann@example.com\n")
+        with pytest.raises(CommandError, match="Missing CSV column\\(s\\): password"):
+            call_command('provision_users', str(path), workers=1, stdout=io.StringIO())
+        with pytest.raises(CommandError, match="--batch-size"):
+            call_command('provision_users', str(path), batch_size=0, workers=1, stdout=io.StringIO())
+
+    def test_conflicts_after_check_are_reported_per_row(self, source):
+        from accounts.management.commands.provision_users import Command, prepare_batch
+
+        results = prepare_batch([(2, {"name": "Dup", "email": "taken@example.com", "password": "secure123"}),
+                                 (3, {"name": "New", "email": "new@example.com", "password": "secure123"})])
+        with mock.patch.object(QuerySet, 'values_list', return_value=[]):
+            errors = Command().insert(results)
+        assert errors == {2: {"email": ["A user with that email already exists."]}}
+        assert User.objects.filter(email="new@example.com").exists()
+
+class TestThrottling:
+    def test_sliding_window(self):
+        assert throttling.hit('key', 2, 10, 100) == (True, None)
+        assert throttling.hit('key', 2, 10, 101) == (True, None)
+        # Both hits stay in the window until 110, then slide out by 120.
+        assert throttling.hit('key', 2, 10, 105) == (False, 10)
+        assert throttling.hit('key', 2, 10, 115) == (True, None)
+        assert throttling.hit('key', 2, 10, 115) == (False, 5)
+        assert throttling.hit('key', 2, 10, 120) == (True, None)
+        assert throttling.hit('other', 2, 10, 120) == (True, None)
+
+    def test_concurrent_hits_are_all_counted(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: throttling.hit('key', 50, 60, 1000)[0], range(100)))
+        assert results.count(True) == 50
+
+    def test_expired_rows_are_purged(self, settings):
+        settings.THROTTLE_PURGE_INTERVAL = 0
+        throttling.hit('old', 1, 10, 100)
+        throttling.hit('new', 1, 10, 125)
+        keys = throttling.get_connection().execute('SELECT key FROM throttle_window').fetchall()
+        assert keys == [('new',)]
+
+    @pytest.mark.django_db
+    def test_locked_counters_refuse_requests(self, settings):
+        settings.THROTTLE_DB_TIMEOUT = 0.05
+        throttling.get_connection()
+        blocker = sqlite3.connect(throttling.get_path(), isolation_level=None)
+        blocker.execute('BEGIN IMMEDIATE')
+        try:
+            assert throttling.hit('key', 5, 60, 1000) == (False, 0.05)
+            login = {"identifier": "ghost@example.com", "password": "secure123"}
+            response = APIClient().post(reverse('login'), login)
+            assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+            assert response['Retry-After'] == '1'
+        finally:
+            blocker.execute('ROLLBACK')
+            blocker.close()
+        assert throttling.hit('key', 5, 60, 1000) == (True, None)
+
+    @pytest.mark.django_db
+    def test_login_has_its_own_rate(self):
+        client = APIClient()
+        login = {"identifier": "ghost@example.com", "password": "secure123"}
+        with mock.patch.object(throttling.LoginRateThrottle, 'THROTTLE_RATES', {'login': '2/minute'}):
+            assert client.post(reverse('login'), login).status_code == status.HTTP_401_UNAUTHORIZED
+            assert client.post(reverse('login'), login).status_code == status.HTTP_401_UNAUTHORIZED
+            response = client.post(reverse('login'), login)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert 0 < int(response['Retry-After']) <= 120
+        # Other anonymous endpoints count against the `anon` rate instead.
+        assert client.post(reverse('register'), {}).status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.django_db
+    def test_async_login_is_throttled(self, settings):
+        settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+        post = async_to_sync(AsyncClient().post)
+        login = {"identifier": "ghost@example.com", "password": "secure123"}
+        for _ in range(10):
+            response = post(reverse('async-login'), login, content_type='application/json')
+            assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        response = post(reverse('async-login'), login, content_type='application/json')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert 0 < int(response['Retry-After']) <= 120
+        # The sync view counts against the same `login` rate.
+        assert APIClient().post(reverse('login'), login).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_rate_must_allow_a_request(self):
+        with mock.patch.object(throttling.LoginRateThrottle, 'THROTTLE_RATES', {'login': '0/min'}):
+            with pytest.raises(ImproperlyConfigured):
+                throttling.LoginRateThrottle()
+
 @pytest.mark.django_db
 class TestAuthAPI:
     def setup_method(self):
@@ -305,4 +821,78 @@ class TestAuthAPI:
     def test_profile_unauthenticated(self):
         url = reverse('profile')
         response = self.client.get(url)
-        assert response.status_code == status.HTTP_401_UNAUTHORIZED
\ No newline at end of file
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+@pytest.mark.django_db
+class TestAsyncAuthAPI:
+    def setup_method(self):
+        self.client = AsyncClient()
+
+    def post(self, url, data):
+        return async_to_sync(self.client.post)(url, data, content_type='application/json')
+
+    def test_login_matches_sync_login(self):
+        User.objects.create_user(
+            name="John Doe",
+            email="john@example.com",
+            password="secure123"
+        )
+        data = {"identifier": "john@example.com", "password": "secure123"}
+        response = self.post(reverse('async-login'), data)
+        assert response.status_code == status.HTTP_200_OK
+        body = response.json()
+        expected = APIClient().post(reverse('login'), data, format='json').data
+        assert body['user'] == expected['user']
+        assert TokenFamily.objects.filter(jti=RefreshToken(body['refresh'])['jti']).exists()
+
+    def test_login_invalid_credentials(self):
+        User.objects.create_user(
+            name="John Doe",
+            email="john@example.com",
+            password="secure123"
+        )
+        response = self.post(reverse('async-login'), {"identifier": "john@example.com", "password": "wrongpass"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json() == {'error': 'Invalid credentials'}
+        response = self.post(reverse('async-login'), {"identifier": "nobody@example.com", "password": "secure123"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_login_inactive_user_still_hashes(self):
+        User.objects.create_user(name="John Doe", email="john@example.com", password="secure123", is_active=False)
+        check = mock.AsyncMock(wraps=hashing.acheck_password)
+        with mock.patch('accounts.async_views.acheck_password', check):
+            response = self.post(reverse('async-login'), {"identifier": "john@example.com", "password": "secure123"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json() == {'error': 'Invalid credentials'}
+        check.assert_awaited_once()
+
+    def test_login_upgrades_outdated_hash(self):
+        user = User.objects.create_user(name="John Doe", email="john@example.com")
+        hasher = PBKDF2PasswordHasher()
+        user.password = hasher.encode("secure123", hasher.salt(), iterations=1000)
+        user.save()
+        response = self.post(reverse('async-login'), {"identifier": "john@example.com", "password": "secure123"})
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert hasher.decode(user.password)['iterations'] == hasher.iterations
+
+    def test_profile(self):
+        user = User.objects.create_user(
+            name="John Doe",
+            email="john@example.com",
+            password="secure123"
+        )
+        headers = {'Authorization': f'Bearer {str(RefreshToken.for_user(user).access_token)}'}
+        response = async_to_sync(self.client.get)(reverse('async-profile'), headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        api_client = APIClient()
+        api_client.credentials(HTTP_AUTHORIZATION=headers['Authorization'])
+        assert response.content == api_client.get(reverse('profile')).content
+
+    def test_profile_unauthenticated(self):
+        response = async_to_sync(self.client.get)(reverse('async-profile'))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.content == APIClient().get(reverse('profile')).content
+        response = async_to_sync(self.client.get)(reverse('async-profile'), headers={'Authorization': 'Bearer invalid'})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json()['code'] == 'token_not_valid'
@@ -0,0 +1,190 @@
+"""
+DRF throttles whose counters are shared by every worker process on a host.
+
+DRF's throttles keep a list of request timestamps per client in the default
+cache. With a per-process cache each worker counts on its own, so N workers
+allow N times the configured rate, and every check rewrites the whole list.
+
+These throttles keep one row per client and scope in a SQLite file at
+THROTTLE_DB_PATH (default: throttle.sqlite3 next to manage.py) instead. A
+row holds two counters: requests in the current fixed window and in the
+previous one. The sliding-window estimate weights the previous count by how
+much of that window still overlaps the last `duration` seconds, so each
+check reads and writes a single row of constant size. Checks run in a short
+IMMEDIATE transaction, so concurrent workers never lose a hit.
+
+If the file stays locked for THROTTLE_DB_TIMEOUT seconds (default 1), the
+request is refused: letting it through would lift every limit, the login
+one included, whenever the file is busy.
+"""
+import os
+import sqlite3
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import throttling
+from rest_framework.exceptions import Throttled
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS throttle_window (
+        key TEXT PRIMARY KEY,
+        window INTEGER NOT NULL,
+        current INTEGER NOT NULL,
+        previous INTEGER NOT NULL,
+        expires REAL NOT NULL
+    ) WITHOUT ROWID
+'''
+
+_local = threading.local()
+_purged_at = {}
+
+
+def get_path():
+    return str(getattr(settings, 'THROTTLE_DB_PATH', settings.BASE_DIR / 'throttle.sqlite3'))
+
+
+def get_timeout():
+    return getattr(settings, 'THROTTLE_DB_TIMEOUT', 1)
+
+
+def get_connection():
+    """
+    This thread's connection to the counters file, opened on first use and
+    again after a fork, since SQLite connections cannot cross processes.
+    """
+    path = get_path()
+    connections = getattr(_local, 'connections', None)
+    if connections is None or _local.pid != os.getpid():
+        connections = _local.connections = {}
+        _local.pid = os.getpid()
+    if path not in connections:
+        connection = sqlite3.connect(
+            path, timeout=get_timeout(), isolation_level=None,
+        )
+        connection.execute('PRAGMA journal_mode=WAL')
+        # Losing the last few hits to a power cut is fine for rate limiting.
+        connection.execute('PRAGMA synchronous=OFF')
+        connection.execute(SCHEMA)
+        connections[path] = connection
+    return connections[path]
+
+
+def purge(connection, now):
+    """
+    Delete rows whose windows have both ended, at most once every
+    THROTTLE_PURGE_INTERVAL seconds (default 60) per process and file.
+    """
+    path = get_path()
+    if now - _purged_at.get(path, 0) < getattr(settings, 'THROTTLE_PURGE_INTERVAL', 60):
+        return
+    _purged_at[path] = now
+    connection.execute('DELETE FROM throttle_window WHERE expires < ?', (now,))
+
+
+def estimate(previous, current, elapsed):
+    """
+    Requests in the sliding window, `elapsed` being the part (0 to 1) of
+    the current fixed window that has passed.
+    """
+    return previous * (1 - elapsed) + current
+
+
+def hit(key, limit, duration, now):
+    """
+    Count a request for `key` if fewer than `limit` were made in the last
+    `duration` seconds; `limit` is at least 1. Returns (allowed, wait),
+    `wait` being the seconds until a request would be allowed again, or
+    None if this one was. A request is refused if the file stays locked.
+    """
+    window, elapsed = divmod(now / duration, 1)
+    window = int(window)
+    connection = get_connection()
+    try:
+        connection.execute('BEGIN IMMEDIATE')
+    except sqlite3.OperationalError:
+        return False, get_timeout()
+    try:
+        row = connection.execute(
+            'SELECT window, current, previous FROM throttle_window WHERE key = ?', (key,),
+        ).fetchone()
+        previous = current = 0
+        if row is not None and row[0] == window:
+            current, previous = row[1], row[2]
+        elif row is not None and row[0] == window - 1:
+            previous = row[1]
+        allowed = estimate(previous, current, elapsed) + 1 <= limit
+        if allowed:
+            current += 1
+        if allowed or row is None or row[0] != window:
+            connection.execute(
+                'INSERT OR REPLACE INTO throttle_window (key, window, current, previous, expires) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, window, current, previous, (window + 2) * duration),
+            )
+        purge(connection, now)
+        connection.execute('COMMIT')
+    except BaseException:
+        connection.execute('ROLLBACK')
+        raise
+    if allowed:
+        return True, None
+    if current + 1 <= limit:
+        # Wait for enough of the previous window to slide out.
+        wait = (1 - (limit - 1 - current) / previous - elapsed) * duration
+    else:
+        # Wait for the next window, then for enough of this one to slide out.
+        wait = (1 - elapsed) * duration + (1 - (limit - 1) / current) * duration
+    return False, max(wait, 0)
+
+
+class SharedRateThrottle(throttling.SimpleRateThrottle):
+    """
+    SimpleRateThrottle counting in the shared SQLite file rather than the cache.
+    """
+    def parse_rate(self, rate):
+        num_requests, duration = super().parse_rate(rate)
+        if num_requests is not None and num_requests < 1:
+            raise ImproperlyConfigured(f"Throttle rate {rate!r} must allow at least one request.")
+        return num_requests, duration
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        allowed, self._wait = hit(self.key, self.num_requests, self.duration, self.timer())
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+def check_throttles(throttles, request, view):
+    """
+    APIView.check_throttles() for views outside DRF: raise Throttled, with
+    the longest wait, if any of `throttles` refuses the request.
+    """
+    waits = [throttle.wait() for throttle in throttles if not throttle.allow_request(request, view)]
+    if waits:
+        raise Throttled(wait=max((wait for wait in waits if wait is not None), default=None))
+
+
+class AnonRateThrottle(SharedRateThrottle, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(SharedRateThrottle, throttling.UserRateThrottle):
+    pass
+
+
+class LoginRateThrottle(SharedRateThrottle):
+    """
+    Login attempts per client IP, with the `login` rate, whether or not the
+    request is authenticated.
+    """
+    scope = 'login'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
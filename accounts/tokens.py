@@ -0,0 +1,145 @@
+"""
+Refresh tokens backed by token families.
+
+Every login starts a TokenFamily row and its refresh token carries the
+family id in the `fam` claim. Rotating the token is a single conditional
+UPDATE of that row: it succeeds only if the presented token is the
+family's newest (its jti matches) and the family has not been revoked. If
+it fails, an older token was presented again, which means the chain has
+been copied, so the whole family is revoked with one more UPDATE. Logout
+revokes the family the same way. Nothing else is written: no
+outstanding-token or blacklist rows.
+
+Tokens issued before token families (no `fam` claim) still go through the
+blacklist tables. Decoding checks them against the in-process revocation
+set, and blacklist() inserts their blacklist row directly, so the row's
+unique constraint rejects a token that was already used or revoked. Their
+next rotation moves them into a family.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken, Token
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from . import revocation
+
+FAMILY_CLAIM = 'fam'
+
+
+class RefreshToken(BaseRefreshToken):
+    no_copy_claims = BaseRefreshToken.no_copy_claims + (FAMILY_CLAIM,)
+
+    @classmethod
+    def for_user(cls, user):
+        """
+        A refresh token for `user`, starting a new token family.
+        """
+        token = Token.for_user.__func__(cls, user)
+        token.start_family(user.pk)
+        return token
+
+    @classmethod
+    async def afor_user(cls, user):
+        """
+        Async version of for_user().
+        """
+        from .models import TokenFamily
+
+        token = Token.for_user.__func__(cls, user)
+        family = await TokenFamily.objects.acreate(user_id=user.pk, **token.family_state())
+        token[FAMILY_CLAIM] = family.pk
+        return token
+
+    @property
+    def family_id(self):
+        return self.payload.get(FAMILY_CLAIM)
+
+    def family_state(self):
+        return {
+            'jti': self.payload[api_settings.JTI_CLAIM],
+            'expires_at': datetime_from_epoch(self.payload['exp']),
+        }
+
+    def start_family(self, user_id):
+        from .models import TokenFamily
+
+        self[FAMILY_CLAIM] = TokenFamily.objects.create(user_id=user_id, **self.family_state()).pk
+
+    def current_family(self):
+        """
+        This token's family, filtered to nothing unless the family is live
+        and this is its newest token.
+        """
+        from .models import TokenFamily
+
+        return TokenFamily.objects.filter(
+            pk=self.family_id, jti=self.payload[api_settings.JTI_CLAIM], revoked_at__isnull=True,
+        )
+
+    def rotate(self):
+        """
+        Turn this token into its family's next one, revoking the family and
+        raising TokenError if this token has already been rotated or revoked.
+        """
+        current = self.current_family()
+        self.set_jti()
+        self.set_exp()
+        self.set_iat()
+        if not current.update(generation=F('generation') + 1, **self.family_state()):
+            self.revoke_family()
+            raise TokenError(_('Token is blacklisted'))
+
+    def check_family(self):
+        if not self.current_family().exists():
+            raise TokenError(_('Token is blacklisted'))
+
+    def revoke_family(self):
+        """
+        Revoke every token of this token's family. Returns False if it already was.
+        """
+        from .models import TokenFamily
+
+        return bool(TokenFamily.objects.filter(pk=self.family_id, revoked_at__isnull=True).update(
+            revoked_at=timezone.now(),
+        ))
+
+    def check_blacklist(self):
+        """
+        Reject tokens without a family that this process knows to be
+        revoked. Callers that do not go on to blacklist() such a token must
+        also call check_blacklist_table().
+        """
+        if self.family_id is None and revocation.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def check_blacklist_table(self):
+        super().check_blacklist()
+
+    def blacklist(self):
+        """
+        Blacklist this token, raising TokenError if it already is.
+        """
+        from .models import User
+
+        jti = self.payload[api_settings.JTI_CLAIM]
+        expires_at = datetime_from_epoch(self.payload['exp'])
+        token_id = OutstandingToken.objects.filter(jti=jti).values_list('pk', flat=True).first()
+        if token_id is None:
+            user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+            user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+            token_id = OutstandingToken.objects.create(
+                jti=jti, user=user, created_at=self.current_time, token=str(self), expires_at=expires_at,
+            ).pk
+        try:
+            with transaction.atomic():
+                blacklisted = BlacklistedToken.objects.create(token_id=token_id)
+        except IntegrityError:
+            revocation.add(jti, expires_at)
+            raise TokenError(_('Token is blacklisted'))
+        revocation.add(jti, expires_at)
+        return blacklisted
@@ -1,11 +1,13 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenRefreshView
-from .views import RegisterView, LoginView, LogoutView, ProfileView
+from .async_views import AsyncLoginView, AsyncProfileView
+from .views import RegisterView, LoginView, RefreshView, LogoutView, ProfileView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
-    path('refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('refresh/', RefreshView.as_view(), name='token_refresh'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('profile/', ProfileView.as_view(), name='profile'),
+    path('async/login/', AsyncLoginView.as_view(), name='async-login'),
+    path('async/profile/', AsyncProfileView.as_view(), name='async-profile'),
 ]
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""
+Per-process cache of the users that authenticated requests resolve to.
+
+Without it every JWT-authenticated request reads its user row before doing
+any real work. Entries live in a small LRU for USER_CACHE_TIMEOUT seconds
+(default 30). Saving or deleting a user drops its entry and bumps a version
+stamp, and a read only fills the cache if the stamp has not moved since it
+started, so this process never serves a copy older than its own last write. Other processes, and writes that skip
+model signals (queryset update()), are picked up when the entry expires,
+which bounds how long a deactivated user keeps being accepted.
+
+Callers get their own copy of the cached user, so changes made to
+request.user never leak into other requests.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+_entries = OrderedDict()
+_version = 0
+_lock = threading.Lock()
+
+
+def get_max_size():
+    return getattr(settings, 'USER_CACHE_SIZE', 1024)
+
+
+def get_timeout():
+    return getattr(settings, 'USER_CACHE_TIMEOUT', 30)
+
+
+def lookup(user_id):
+    """
+    A copy of the cached user `user_id`, or None if it is missing, stale or expired.
+    """
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is None:
+            return None
+        expires, user = entry
+        if expires <= time.monotonic():
+            del _entries[user_id]
+            return None
+        _entries.move_to_end(user_id)
+    return copy.copy(user)
+
+
+def current_version():
+    return _version
+
+
+def store(user_id, user, version):
+    """
+    Cache `user` as read at `version`, unless any user has been saved since.
+    """
+    timeout, max_size = get_timeout(), get_max_size()
+    if not timeout or not max_size:
+        return
+    with _lock:
+        if version != _version:
+            return
+        _entries[user_id] = (time.monotonic() + timeout, copy.copy(user))
+        _entries.move_to_end(user_id)
+        while len(_entries) > max_size:
+            _entries.popitem(last=False)
+
+
+def invalidate(user_id):
+    global _version
+    with _lock:
+        _version += 1
+        _entries.pop(user_id, None)
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def get_user(user_id):
+    """
+    The user with primary key `user_id`, from the cache when possible.
+    Raises User.DoesNotExist like User.objects.get().
+    """
+    from .models import User
+
+    user = lookup(user_id)
+    if user is None:
+        version = current_version()
+        user = User.objects.get(pk=user_id)
+        store(user_id, user, version)
+    return user
+
+
+async def aget_user(user_id):
+    """
+    Async version of get_user().
+    """
+    from .models import User
+
+    user = lookup(user_id)
+    if user is None:
+        version = current_version()
+        user = await User.objects.aget(pk=user_id)
+        store(user_id, user, version)
+    return user
@@ -2,9 +2,12 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth import authenticate
-from .serializers import RegisterSerializer, LoginSerializer, UserSerializer
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.views import TokenRefreshView
+from django.utils.translation import gettext_lazy as _
+from . import hashing, identifiers, tokens
+from .throttling import LoginRateThrottle
+from .serializers import RegisterSerializer, LoginSerializer, UserSerializer, RefreshSerializer
 
 class RegisterView(APIView):
     permission_classes = [AllowAny]
@@ -13,7 +16,7 @@ class RegisterView(APIView):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = tokens.RefreshToken.for_user(user)
             return Response({
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
@@ -23,15 +26,21 @@ class RegisterView(APIView):
 
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [LoginRateThrottle]
 
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
         if serializer.is_valid():
             identifier = serializer.validated_data['identifier']
             password = serializer.validated_data['password']
-            user = authenticate(request, username=identifier, password=password)
-            if user:
-                refresh = RefreshToken.for_user(user)
+            # Hash on the bounded pool (see accounts.hashing), as the async
+            # login does, rather than through authenticate() on this worker.
+            user = identifiers.find_user(identifier)
+            if user is None:
+                # Match the time a wrong password takes; see CustomAuthBackend.
+                hashing.hash_password(password)
+            elif hashing.check_password(user, password) and user.is_active:
+                refresh = tokens.RefreshToken.for_user(user)
                 return Response({
                     'refresh': str(refresh),
                     'access': str(refresh.access_token),
@@ -40,14 +49,20 @@ class LoginView(APIView):
             return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class RefreshView(TokenRefreshView):
+    serializer_class = RefreshSerializer
+
 class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
         try:
             refresh_token = request.data.get('refresh')
-            token = RefreshToken(refresh_token)
-            token.blacklist()
+            token = tokens.RefreshToken(refresh_token)
+            if token.family_id is None:
+                token.blacklist()
+            elif not token.revoke_family():
+                raise TokenError(_('Token is blacklisted'))
             return Response(status=status.HTTP_205_RESET_CONTENT)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def throttle_db(settings, tmp_path):
+    """
+    Give every test its own throttle counters.
+    """
+    settings.THROTTLE_DB_PATH = tmp_path / 'throttle.sqlite3'
@@ -1,13 +1,33 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from .models import Client, Proposal
+from .search import CLIENT, PROPOSAL, get_search_backend
+
+
+class IndexedSearchMixin:
+    """
+    Answer changelist searches from the full-text index when the backend has one,
+    instead of LIKE '%term%' scans over search_fields.
+    """
+
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if search_term:
+            ids = get_search_backend().search_ids(self.search_kind, search_term)
+            if ids is not None:
+                return queryset.filter(pk__in=ids), False
+        return super().get_search_results(request, queryset, search_term)
 
 
 @admin.register(Client)
-class ClientAdmin(admin.ModelAdmin):
+class ClientAdmin(IndexedSearchMixin, admin.ModelAdmin):
     """
     Admin interface for the Client model.
     """
 
+    search_kind = CLIENT
+
     list_display = (
         "company_name",
         "email",
@@ -55,12 +75,26 @@ class ClientAdmin(admin.ModelAdmin):
         return self.readonly_fields
 
 
+class DeferredChangeList(ChangeList):
+    """
+    ChangeList that leaves the model admin's `changelist_defer` columns unloaded.
+    """
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        return queryset.defer(*self.model_admin.changelist_defer)
+
+
 @admin.register(Proposal)
-class ProposalAdmin(admin.ModelAdmin):
+class ProposalAdmin(IndexedSearchMixin, admin.ModelAdmin):
     """
     Admin interface for the Proposal model.
     """
 
+    search_kind = PROPOSAL
+    # Descriptions can run to hundreds of KB and are not shown in the list.
+    changelist_defer = ("description",)
+
     list_display = ("title", "client", "created_by", "created_at", "updated_at")
     list_filter = ("created_at", "updated_at", "client", "created_by")
     search_fields = ("title", "description", "client__company_name")
@@ -96,6 +130,9 @@ class ProposalAdmin(admin.ModelAdmin):
             .prefetch_related("client__added_by")
         )
 
+    def get_changelist(self, request, **kwargs):
+        return DeferredChangeList
+
     def get_readonly_fields(self, request, obj=None):
         """
         Make created_by read-only when editing an existing proposal.
@@ -0,0 +1,86 @@
+"""
+Native async read endpoints for ASGI deployments.
+
+The same pages as the DRF list and detail GETs, built on the event loop with
+the async ORM and the compiled row builders of proposals.rows. Writes, the
+list response cache and conditional requests stay on the DRF endpoints. Lists
+take the same filters and ?ordering= as their DRF counterparts.
+"""
+from accounts.async_views import AsyncAPIView
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.exceptions import NotFound
+from proposals import rows
+from proposals.models import Client, Proposal
+from proposals.pagination import OwnerCursorPagination
+from proposals.filters import OwnerOrderingFilter
+from proposals.serializers import ClientSerializer, ProposalSerializer
+from proposals.views import ClientListCreateView, ProposalListCreateView, SparseFieldsViewMixin
+
+class AsyncOwnedMixin(SparseFieldsViewMixin):
+    model = None
+    serializer_class = None
+    owner_field = None
+
+    def get_serializer_class(self):
+        return self.serializer_class
+
+    def get_queryset(self):
+        return self.model.objects.filter(**{self.owner_field: self.request.user})
+
+    def get_plan(self):
+        return rows.compile_rows(self.get_serializer_class(), *self.get_sparse_options())
+
+class AsyncListView(AsyncOwnedMixin, AsyncAPIView):
+    pagination_class = OwnerCursorPagination
+    filter_backends = [DjangoFilterBackend, OwnerOrderingFilter]
+    filterset_class = None
+    ordering_fields = ()
+
+    def filter_queryset(self, queryset):
+        # Both backends only build the query; nothing here touches the database.
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+    async def get(self, request):
+        plan = self.get_plan()
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = rows.rows_queryset(queryset, plan, extra=self.get_ordering_keys(queryset))
+        paginator = self.pagination_class()
+        page = await paginator.apaginate_queryset(queryset, request, view=self)
+        if page is None:
+            return self.render(plan.render([row async for row in queryset]))
+        return self.render(paginator.get_paginated_data(plan.render(page)))
+
+class AsyncDetailView(AsyncOwnedMixin, AsyncAPIView):
+    async def get(self, request, pk):
+        plan = self.get_plan()
+        row = await rows.rows_queryset(self.get_queryset().filter(pk=pk), plan).afirst()
+        if row is None:
+            raise NotFound(f'No {self.model._meta.object_name} matches the given query.')
+        return self.render(plan.render([row])[0])
+
+class AsyncClientListView(AsyncListView):
+    model = Client
+    serializer_class = ClientSerializer
+    owner_field = 'added_by'
+    filterset_class = ClientListCreateView.filterset_class
+    ordering_fields = ClientListCreateView.ordering_fields
+
+class AsyncClientDetailView(AsyncDetailView):
+    model = Client
+    serializer_class = ClientSerializer
+    owner_field = 'added_by'
+
+class AsyncProposalListView(AsyncListView):
+    model = Proposal
+    serializer_class = ProposalSerializer
+    owner_field = 'created_by'
+    deferred_fields = ('description',)
+    filterset_class = ProposalListCreateView.filterset_class
+    ordering_fields = ProposalListCreateView.ordering_fields
+
+class AsyncProposalDetailView(AsyncDetailView):
+    model = Proposal
+    serializer_class = ProposalSerializer
+    owner_field = 'created_by'
@@ -0,0 +1,104 @@
+"""
+Per-user response cache for the client and proposal list endpoints.
+
+Every cache key embeds a generation counter for (user, resource). A write bumps
+the counter, which orphans all of that user's cached pages at once; nothing is
+ever searched for or deleted. Orphaned entries simply expire.
+
+Invalidation runs on the same cache the pages live in, so it only reaches
+every worker process if that cache is shared. The default cache is
+per-process LocMem, so list caching stays off until LIST_CACHE_ALIAS names a
+cache, and `manage.py check` warns if that cache is LocMem.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+CLIENTS = 'clients'
+PROPOSALS = 'proposals'
+
+HITS_KEY = 'listcache:stats:hits'
+MISSES_KEY = 'listcache:stats:misses'
+
+
+def get_alias():
+    return getattr(settings, 'LIST_CACHE_ALIAS', None)
+
+
+def is_enabled():
+    return get_alias() is not None
+
+
+def get_cache():
+    return caches[get_alias() or 'default']
+
+
+def get_timeout():
+    return getattr(settings, 'LIST_CACHE_TIMEOUT', 300)
+
+
+def generation_key(user_id, resource):
+    return f'listcache:gen:{resource}:{user_id}'
+
+
+def get_generation(user_id, resource):
+    """
+    Return the current generation, starting a missing counter at the current
+    time in ms so it can never fall back to a value an older page was cached under.
+    """
+    cache = get_cache()
+    key = generation_key(user_id, resource)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, int(time.time() * 1000), None)
+        generation = cache.get(key)
+    return generation
+
+
+def _bump(user_id, resources):
+    cache = get_cache()
+    for resource in resources:
+        key = generation_key(user_id, resource)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, int(time.time() * 1000), None)
+
+
+def invalidate(user_id, *resources):
+    """
+    Invalidate a user's cached pages now, and again once the transaction
+    commits so a page cached from pre-commit data cannot outlive the write.
+    """
+    if user_id is None or not is_enabled():
+        return
+    _bump(user_id, resources)
+    transaction.on_commit(lambda: _bump(user_id, resources))
+
+
+def response_key(user_id, resource, path):
+    digest = hashlib.md5(path.encode(), usedforsecurity=False).hexdigest()
+    return f'listcache:page:{resource}:{user_id}:{get_generation(user_id, resource)}:{digest}'
+
+
+def record(hit):
+    cache = get_cache()
+    key = HITS_KEY if hit else MISSES_KEY
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def stats():
+    """
+    Return hit/miss counters and the hit rate.
+    """
+    values = get_cache().get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = values.get(HITS_KEY, 0), values.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
@@ -0,0 +1,21 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Warning, register
+
+from . import cache
+
+
+@register()
+def check_list_cache(app_configs, **kwargs):
+    """
+    Warn when list caching uses a per-process cache, which other worker
+    processes' invalidations never reach.
+    """
+    if not cache.is_enabled() or not isinstance(caches[cache.get_alias()], LocMemCache):
+        return []
+    return [Warning(
+        f"LIST_CACHE_ALIAS '{cache.get_alias()}' is a per-process LocMemCache.",
+        hint="With several worker processes, writes in one worker leave stale list pages in the others. "
+             "Point LIST_CACHE_ALIAS at a shared cache (Redis, Memcached or the database cache).",
+        id='proposals.W001',
+    )]
@@ -0,0 +1,92 @@
+"""
+Byte-range reads of large text columns.
+
+Ranges are served with database-side byte slicing (ByteSubstr), so only the
+requested bytes cross the driver. Values stored compressed by
+CompressedTextField cannot be sliced in SQL and are read whole instead.
+"""
+import re
+
+from django.db.models import BinaryField, Func, IntegerField, Value
+
+from .fields import MARKER
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class UTF8Bytes(Func):
+    """
+    The UTF-8 encoding of a text expression.
+    """
+    template = 'CAST(%(expressions)s AS BLOB)'
+    output_field = BinaryField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="CONVERT_TO(%(expressions)s, 'UTF8')", **extra_context)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='CAST(%(expressions)s AS BINARY)', **extra_context)
+
+
+class ByteLength(Func):
+    function = 'LENGTH'
+    output_field = IntegerField()
+
+    def __init__(self, expression, **extra):
+        super().__init__(UTF8Bytes(expression), **extra)
+
+
+class ByteSubstr(Func):
+    """
+    `length` bytes of a text expression's UTF-8 encoding, from 1-based `pos`.
+    """
+    function = 'SUBSTR'
+    output_field = BinaryField()
+
+    def __init__(self, expression, pos, length, **extra):
+        super().__init__(UTF8Bytes(expression), Value(pos), Value(length), **extra)
+
+
+def parse_range(header, size):
+    """
+    Return the (start, end) byte offsets, end exclusive, that a single-range
+    `Range` header asks for. Returns None to serve the whole body (no header,
+    several ranges, or a unit other than bytes) and raises ValueError if the
+    range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size
+    else:
+        start = int(first)
+        end = min(int(last) + 1, size) if last else size
+    if start >= size or start >= end:
+        raise ValueError(header)
+    return start, end
+
+
+def stored_info(queryset, field):
+    """
+    Return (byte length, compressed) for `field` of the single row in
+    `queryset`, or None if there is no row.
+    """
+    head = len(MARKER.encode())
+    row = queryset.values_list(ByteLength(field), ByteSubstr(field, 1, head)).first()
+    if row is None:
+        return None
+    size, prefix = row
+    return size, bytes(prefix or b'') == MARKER.encode()
+
+
+def read_chunks(queryset, field, start, end, chunk_size):
+    """
+    Yield the bytes in [start, end) of `field`, one query per chunk.
+    """
+    for offset in range(start, end, chunk_size):
+        length = min(chunk_size, end - offset)
+        yield bytes(queryset.values_list(ByteSubstr(field, offset + 1, length), flat=True).get())
@@ -0,0 +1,186 @@
+"""
+Rendered HTML documents for proposals.
+
+Renders are cached under (proposal id, version, TEMPLATE_VERSION), where the
+version digests the proposal's and client's updated_at and the author's name
+and email, so any change to what the document shows moves it to a new key.
+
+Misses are rendered on a small thread pool. The pool never touches the
+database: the caller reads everything the template needs into plain dicts
+first. At most DOCUMENT_RENDER_WORKERS * 2 renders are queued or running;
+past that, requests get RenderBusy and pre-warming is skipped. Concurrent
+requests for the same document share one render.
+
+Worker threads write to the cache, so DOCUMENT_CACHE_ALIAS should name a
+non-database cache.
+"""
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import Proposal
+
+TEMPLATE_NAME = 'proposals/document.html'
+# Bump whenever the template changes, to retire every cached render at once.
+TEMPLATE_VERSION = 1
+
+PROPOSAL_FIELDS = ('id', 'title', 'description', 'created_at', 'updated_at')
+CLIENT_FIELDS = ('company_name', 'address', 'phone_number', 'email')
+AUTHOR_FIELDS = ('name', 'email')
+VERSION_FIELDS = ('updated_at', 'client__updated_at', 'created_by__name', 'created_by__email')
+
+
+class RenderBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many documents are being rendered; try again shortly.'
+    default_code = 'render_busy'
+
+
+_executor = None
+_slots = None
+_inflight = {}
+_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[getattr(settings, 'DOCUMENT_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'DOCUMENT_CACHE_TIMEOUT', 7 * 24 * 3600)
+
+
+def get_workers():
+    return getattr(settings, 'DOCUMENT_RENDER_WORKERS', 2)
+
+
+def get_executor():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=get_workers(), thread_name_prefix='proposal-render')
+            _slots = threading.BoundedSemaphore(get_workers() * 2)
+        return _executor
+
+
+def document_key(proposal_id, version_values):
+    digest = hashlib.md5(repr(tuple(version_values)).encode(), usedforsecurity=False).hexdigest()
+    return f'document:{proposal_id}:{digest}:{TEMPLATE_VERSION}'
+
+
+def versions(queryset):
+    """
+    Return {proposal_id: cache key} for the proposals in `queryset`.
+    """
+    rows = queryset.order_by().values_list('id', *VERSION_FIELDS)
+    return {row[0]: document_key(row[0], row[1:]) for row in rows}
+
+
+def load_contexts(queryset):
+    """
+    Read the template context of each proposal in `queryset` as plain values.
+    """
+    lookups = (
+        [*PROPOSAL_FIELDS]
+        + [f'client__{name}' for name in CLIENT_FIELDS]
+        + ['created_by_id'] + [f'created_by__{name}' for name in AUTHOR_FIELDS]
+    )
+    contexts = {}
+    for row in queryset.order_by().values(*lookups, *VERSION_FIELDS):
+        contexts[row['id']] = (document_key(row['id'], [row[name] for name in VERSION_FIELDS]), {
+            'proposal': {name: row[name] for name in PROPOSAL_FIELDS},
+            'client': {name: row[f'client__{name}'] for name in CLIENT_FIELDS},
+            'author': (
+                {name: row[f'created_by__{name}'] for name in AUTHOR_FIELDS}
+                if row['created_by_id'] is not None else None
+            ),
+        })
+    return contexts
+
+
+def _render(key, context):
+    try:
+        html = render_to_string(TEMPLATE_NAME, context)
+        get_cache().set(key, html, get_timeout())
+        return html
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+        _slots.release()
+
+
+def submit(key, context, wait=True):
+    """
+    Queue a render of `context` unless one for `key` is already running, and
+    return its future. If the pool is full, raise RenderBusy, or return None
+    when `wait` is false.
+    """
+    executor = get_executor()
+    with _lock:
+        future = _inflight.get(key)
+    if future is not None:
+        return future
+    timeout = getattr(settings, 'DOCUMENT_RENDER_TIMEOUT', 10) if wait else None
+    if not _slots.acquire(blocking=wait, timeout=timeout):
+        if wait:
+            raise RenderBusy
+        return None
+    with _lock:
+        future = _inflight.get(key)
+        if future is None:
+            future = _inflight[key] = executor.submit(_render, key, context)
+            return future
+    _slots.release()
+    return future
+
+
+def get_document(queryset):
+    """
+    Return (html, cached) for the single proposal in `queryset`, or None if
+    there is none. Raises RenderBusy when the pool is saturated or the
+    render takes longer than DOCUMENT_RENDER_TIMEOUT; it still finishes and
+    is cached for the next request.
+    """
+    keys = versions(queryset)
+    if not keys:
+        return None
+    html = get_cache().get(next(iter(keys.values())))
+    if html is not None:
+        return html, True
+    contexts = load_contexts(queryset)
+    if not contexts:
+        return None
+    key, context = next(iter(contexts.values()))
+    future = submit(key, context)
+    try:
+        return future.result(timeout=getattr(settings, 'DOCUMENT_RENDER_TIMEOUT', 10)), False
+    except TimeoutError:
+        raise RenderBusy
+
+
+def prewarm(proposal_ids):
+    """
+    Render the given proposals in the background if they are not cached yet.
+    Returns the futures of the renders that were queued.
+    """
+    if not getattr(settings, 'DOCUMENT_PREWARM', True) or not proposal_ids:
+        return []
+    keys = versions(Proposal.objects.filter(pk__in=proposal_ids))
+    cached = get_cache().get_many(list(keys.values()))
+    # Never load more contexts than the pool could accept.
+    missing = [pk for pk, key in keys.items() if key not in cached][:get_workers() * 2]
+    if not missing:
+        return []
+    futures = []
+    for key, context in load_contexts(Proposal.objects.filter(pk__in=missing)).values():
+        future = submit(key, context, wait=False)
+        if future is None:
+            break
+        futures.append(future)
+    return futures
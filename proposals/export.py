@@ -0,0 +1,85 @@
+"""
+Streaming exports of a user's proposals.
+
+Rows are read as flat tuples with QuerySet.iterator() and written out one at a
+time, so memory use does not depend on how many proposals a user has.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+# (output column, queryset lookup)
+EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('title', 'title'),
+    ('description', 'description'),
+    ('client_id', 'client_id'),
+    ('client_company_name', 'client__company_name'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+)
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """
+    File-like object whose write() hands the line straight back to csv.writer.
+    """
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Lets content negotiation select CSV (`?format=csv` or `Accept: text/csv`).
+    Exports stream their own body; this only renders error payloads.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data.items() if isinstance(data, dict) else [(value,) for value in data]
+        writer = csv.writer(Echo())
+        return ''.join(writer.writerow(row) for row in rows).encode(self.charset)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Lets content negotiation select NDJSON (`?format=ndjson`).
+    Exports stream their own body; this only renders error payloads.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return (json.dumps(data, cls=DjangoJSONEncoder) + '\n').encode(self.charset)
+
+
+def export_rows(queryset):
+    """
+    Yield one list per proposal, in EXPORT_COLUMNS order, with datetimes as ISO 8601.
+    """
+    lookups = [lookup for _, lookup in EXPORT_COLUMNS]
+    for row in queryset.order_by('pk').values_list(*lookups).iterator(chunk_size=CHUNK_SIZE):
+        yield [value.isoformat() if hasattr(value, 'isoformat') else value for value in row]
+
+
+def stream_csv(queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    for row in export_rows(queryset):
+        yield writer.writerow(row)
+
+
+def stream_ndjson(queryset):
+    names = [name for name, _ in EXPORT_COLUMNS]
+    for row in export_rows(queryset):
+        yield json.dumps(dict(zip(names, row))) + '\n'
@@ -0,0 +1,72 @@
+import base64
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models
+
+from accounts import phones
+
+# Compressed values are stored as MARKER + base64(zlib(utf-8 text)).
+MARKER = '\x1bz:'
+
+
+def compress_text(value):
+    return MARKER + base64.b64encode(zlib.compress(value.encode())).decode('ascii')
+
+
+def decompress_text(value):
+    return zlib.decompress(base64.b64decode(value[len(MARKER):])).decode()
+
+
+class CompressedTextField(models.TextField):
+    """
+    TextField that stores values of TEXT_COMPRESSION_THRESHOLD bytes or more
+    zlib-compressed, when that makes them smaller. Reads decompress
+    transparently; values already stored stay as they are until next saved.
+
+    The column still holds text, so database-side lookups such as `icontains`
+    only see the uncompressed values. Compression is off when the setting is None.
+    """
+    def from_db_value(self, value, expression, connection):
+        if value is not None and value.startswith(MARKER):
+            return decompress_text(value)
+        return value
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None:
+            return value
+        # Text that happens to start with the marker is always stored
+        # compressed, so every stored value reads back unambiguously.
+        if value.startswith(MARKER):
+            return compress_text(value)
+        threshold = getattr(settings, 'TEXT_COMPRESSION_THRESHOLD', None)
+        if threshold is not None and len(value.encode()) >= threshold:
+            compressed = compress_text(value)
+            if len(compressed) < len(value):
+                return compressed
+        return value
+
+
+class NormalizedPhoneField(models.CharField):
+    """
+    CharField holding a phone number in E.164 form, so lookups and indexes
+    see a single spelling of each number. Values are normalized through
+    accounts.phones however they reach the database (forms, save(),
+    bulk_create(), update() or a lookup); text that is not a valid number
+    is kept as given, and fails model validation.
+    """
+    def pre_save(self, model_instance, add):
+        value = self.get_prep_value(getattr(model_instance, self.attname))
+        setattr(model_instance, self.attname, value)
+        return value
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        return phones.normalize(value) or value if value else value
+
+    def validate(self, value, model_instance):
+        super().validate(value, model_instance)
+        if value and phones.normalize(value) is None:
+            raise ValidationError(phones.INVALID, code='invalid_phone_number')
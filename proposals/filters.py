@@ -0,0 +1,97 @@
+"""
+Query-string filters and ordering for the client and proposal lists.
+
+Every filter here is backed by an index that leads with the owner column (see
+the models' Meta.indexes), since list queries are always scoped to one user.
+Prefix filters compare against LOWER(column) as a range rather than with
+LIKE, which SQLite and PostgreSQL can only answer by scanning.
+"""
+from django.db.models import Q, Value
+from django.db.models.functions import Concat, Lower
+from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter
+
+from accounts import phones
+
+from .models import Client, Proposal
+
+# Sorts after any character a prefix can continue with.
+MAX_CHAR = '\U0010ffff'
+
+
+class PrefixFilter(filters.CharFilter):
+    """
+    Case-insensitive prefix match on LOWER(field_name), answered from an
+    index on that expression.
+    """
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        alias = f'{self.field_name}_lower'
+        prefix = Lower(Value(value))
+        return qs.alias(**{alias: Lower(self.field_name)}).filter(**{
+            f'{alias}__gte': prefix,
+            f'{alias}__lt': Concat(prefix, Value(MAX_CHAR)),
+        })
+
+
+class PresenceFilter(filters.BooleanFilter):
+    """
+    `true` keeps rows where field_name is set and non-empty; `false` keeps the rest.
+    """
+    def filter(self, qs, value):
+        if value is None:
+            return qs
+        present = Q(**{f'{self.field_name}__gt': ''})
+        return qs.filter(present if value else ~present)
+
+
+class PhoneFilter(filters.CharFilter):
+    """
+    Exact match on a phone number stored in E.164 form, given in any format
+    accounts.phones accepts.
+    """
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        normalized = phones.normalize(value)
+        return qs.filter(**{self.field_name: normalized}) if normalized else qs.none()
+
+
+class ClientFilter(filters.FilterSet):
+    company_name = PrefixFilter(field_name='company_name')
+    phone_number = PhoneFilter(field_name='phone_number')
+    has_email = PresenceFilter(field_name='email')
+    has_phone = PresenceFilter(field_name='phone_number')
+
+    class Meta:
+        model = Client
+        fields = []
+
+
+class ProposalFilter(filters.FilterSet):
+    client = filters.NumberFilter(field_name='client_id')
+    # ?created_after= / ?created_before=, ISO 8601, both inclusive.
+    created = filters.IsoDateTimeFromToRangeFilter(field_name='created_at')
+    updated = filters.IsoDateTimeFromToRangeFilter(field_name='updated_at')
+    title = PrefixFilter(field_name='title')
+
+    class Meta:
+        model = Proposal
+        fields = []
+
+
+class OwnerOrderingFilter(OrderingFilter):
+    """
+    ?ordering= restricted to one of the view's `ordering_fields`, with the
+    primary key as tiebreak. OwnerCursorPagination pages on the result, so
+    only indexed columns should be listed.
+    """
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if not params:
+            return None
+        ordering = self.remove_invalid_fields(queryset, [params.split(',')[0].strip()], view, request)
+        if not ordering:
+            return None
+        return (ordering[0], '-pk' if ordering[0].startswith('-') else 'pk')
@@ -0,0 +1,136 @@
+import asyncio
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client as TestClient, override_settings
+from django.urls import reverse
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from accounts.async_views import AsyncAPIView, AsyncLoginView
+from accounts.views import LoginView
+from proposals.models import Client, Proposal
+
+PASSWORD = 'benchmark-password'
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput and latency of the DRF endpoints served over WSGI (threads) and ASGI, and of "
+        "their native async variants over ASGI. Runs against the configured database: the benchmark user "
+        "and their data are committed, then deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Requests per read scenario.")
+        parser.add_argument('--login-requests', type=int, default=16, help="Requests for the login scenario.")
+        parser.add_argument('--concurrency', type=int, default=16, help="Requests in flight at once.")
+        parser.add_argument('--proposals', type=int, default=200, help="Proposals owned by the benchmark user.")
+
+    def handle(self, *args, **options):
+        if min(options['requests'], options['login_requests'], options['concurrency'], options['proposals']) < 1:
+            raise CommandError("--requests, --login-requests, --concurrency and --proposals must be at least 1.")
+        email = f'benchmark-{uuid.uuid4().hex[:12]}@example.invalid'
+        owner = User.objects.create_user(name="Benchmark", email=email, password=PASSWORD)
+        try:
+            # Lift throttling so every run completes. DEBUG would log every query.
+            with mock.patch.object(APIView, 'throttle_classes', ()), \
+                    mock.patch.object(LoginView, 'throttle_classes', ()), \
+                    mock.patch.object(AsyncAPIView, 'throttle_classes', ()), \
+                    mock.patch.object(AsyncLoginView, 'throttle_classes', ()), \
+                    override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver']):
+                self.run(owner, options)
+        finally:
+            Proposal.objects.filter(created_by=owner).delete()
+            Client.objects.filter(added_by=owner).delete()
+            owner.delete()
+
+    def run(self, owner, options):
+        client = Client.objects.create(company_name="Benchmark Client", email=owner.email, added_by=owner)
+        Proposal.objects.bulk_create([
+            Proposal(client=client, title=f"Proposal {i}", description="Lorem ipsum. " * 50, created_by=owner)
+            for i in range(options['proposals'])
+        ])
+        proposal = Proposal.objects.filter(created_by=owner).first()
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(owner).access_token}'}
+        login = {'identifier': owner.email, 'password': PASSWORD}
+        count, concurrency = options['requests'], options['concurrency']
+        scenarios = (
+            ('profile', 'get', reverse('profile'), reverse('async-profile'), None, count),
+            # The cache-busting parameter keeps the DRF list cache out of the comparison.
+            (
+                'proposal list', 'get', reverse('proposals:proposal-list-create') + '?page_size=50&n={n}',
+                reverse('proposals:async-proposal-list') + '?page_size=50&n={n}', None, count,
+            ),
+            (
+                'proposal detail', 'get', reverse('proposals:proposal-detail', args=[proposal.pk]),
+                reverse('proposals:async-proposal-detail', args=[proposal.pk]), None, count,
+            ),
+            ('login', 'post', reverse('login'), reverse('async-login'), login, options['login_requests']),
+        )
+        self.stdout.write(f"{concurrency} concurrent requests")
+        for label, method, sync_url, async_url, data, total in scenarios:
+            self.stdout.write(f"{label} ({total} requests)")
+            for name, result in (
+                ('WSGI, sync view', self.run_wsgi(method, sync_url, data, headers, total, concurrency)),
+                ('ASGI, sync view', self.run_asgi(method, sync_url, data, headers, total, concurrency)),
+                ('ASGI, async view', self.run_asgi(method, async_url, data, headers, total, concurrency)),
+            ):
+                elapsed, latencies = result
+                self.stdout.write(
+                    f"  {name:<18} {total / elapsed:8.1f} req/s   p50 {percentile(latencies, 50):7.1f} ms   "
+                    f"p95 {percentile(latencies, 95):7.1f} ms"
+                )
+
+    def run_wsgi(self, method, url, data, headers, total, concurrency):
+        def request(n):
+            started = time.perf_counter()
+            try:
+                response = send(TestClient(), method, url.format(n=n), data, headers)
+            finally:
+                connection.close()
+            check(response, url)
+            return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(request, range(total)))
+        return time.perf_counter() - started, latencies
+
+    def run_asgi(self, method, url, data, headers, total, concurrency):
+        async def main():
+            slots = asyncio.Semaphore(concurrency)
+            client = AsyncClient()
+
+            async def request(n):
+                async with slots:
+                    started = time.perf_counter()
+                    check(await send(client, method, url.format(n=n), data, headers), url)
+                    return (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            latencies = await asyncio.gather(*(request(n) for n in range(total)))
+            return time.perf_counter() - started, latencies
+
+        return asyncio.run(main())
+
+
+def send(client, method, url, data, headers):
+    if method == 'post':
+        return client.post(url, data, content_type='application/json')
+    return client.get(url, headers=headers)
+
+
+def check(response, url):
+    if response.status_code != 200:
+        raise CommandError(f"{url} returned {response.status_code}.")
+
+
+def percentile(values, pct):
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1] if len(values) > 1 else values[0]
@@ -0,0 +1,83 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import User
+from proposals import rows
+from proposals.models import Client, Proposal
+from proposals.serializers import ProposalSerializer
+
+CASES = (
+    ('default', None, None),
+    ('fields=id,title', ['id', 'title'], None),
+    ('expand=client.added_by,created_by', None, ['client.added_by', 'created_by']),
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ProposalSerializer with the precompiled row path used by the list endpoints. "
+        "Proposals are generated inside a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000], help="Row counts to time.")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per measurement; the best one is kept.")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or min(options['rows']) < 1:
+            raise CommandError("--rows and --repeat must be at least 1.")
+        try:
+            with transaction.atomic():
+                self.run(sorted(options['rows']), options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, counts, repeat):
+        owner = User.objects.create_user(
+            name="Benchmark", email="benchmark@example.invalid", phone_number="+12025550100", password=None,
+        )
+        clients = Client.objects.bulk_create([
+            Client(company_name=f"Client {i}", email=f"client{i}@example.com", added_by=owner)
+            for i in range(100)
+        ])
+        created = 0
+        for count in counts:
+            Proposal.objects.bulk_create([
+                Proposal(
+                    client=clients[i % len(clients)], title=f"Proposal {i}",
+                    description="Lorem ipsum dolor sit amet. " * 20, created_by=owner,
+                )
+                for i in range(created, count)
+            ], batch_size=1000)
+            created = count
+            queryset = Proposal.objects.filter(created_by=owner).order_by('-created_at', '-pk')
+            self.stdout.write(f"{count} rows")
+            for label, fields, expand in CASES:
+                slow_data, slow = self.best(repeat, lambda: ProposalSerializer(
+                    ProposalSerializer.optimize_queryset(queryset, fields, expand),
+                    many=True, fields=fields, expand=expand,
+                ).data)
+                plan = rows.compile_rows(ProposalSerializer, fields, expand)
+                fast_data, fast = self.best(repeat, lambda: plan.render(rows.rows_queryset(queryset, plan)))
+                if JSONRenderer().render(fast_data) != JSONRenderer().render(slow_data):
+                    raise CommandError(f"{label}: row path output differs from the serializer.")
+                self.stdout.write(
+                    f"  {label:<36} serializer {slow * 1000:8.1f} ms   rows {fast * 1000:8.1f} ms   "
+                    f"{slow / fast:5.1f}x"
+                )
+
+    def best(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - started)
+        return result, min(timings)
@@ -0,0 +1,110 @@
+import os
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts import bulk_load
+from accounts.models import User
+from proposals.models import Client, ImportCheckpoint
+from proposals.serializers import ClientSerializer
+from proposals.signals import bulk_post_save
+
+FIELDS = ('company_name', 'address', 'phone_number', 'email')
+
+
+def fingerprint(path):
+    """
+    Identify this version of the file at `path` by its size and modification time.
+    """
+    stat = os.stat(path)
+    return f'{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def validate_batch(rows):
+    """
+    Validate (line, row) pairs with ClientSerializer's rules.
+    Returns a list of (line, row, validated_data, errors).
+    """
+    results = []
+    for line, row in rows:
+        data = {name: row[name].strip() for name in FIELDS if row.get(name) and row[name].strip()}
+        serializer = ClientSerializer(data=data)
+        if serializer.is_valid():
+            results.append((line, row, dict(serializer.validated_data), None))
+        else:
+            errors = {field: [str(message) for message in messages] for field, messages in serializer.errors.items()}
+            results.append((line, row, None, errors))
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        "Import clients from a CSV file with company_name, address, phone_number and email columns. "
+        "Rows are validated like the clients API and inserted in bulk_create batches. Each batch's "
+        "transaction also saves the row count to a checkpoint for the file and owner, and --resume "
+        "continues from there. The checkpoint is deleted once the whole file has been imported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file to import.")
+        parser.add_argument('--owner', required=True, help="Email or phone number of the user the clients belong to.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per bulk_create batch.")
+        parser.add_argument('--workers', type=int, default=0, help="Validate batches across this many processes.")
+        parser.add_argument('--resume', action='store_true', help="Skip the rows recorded in the checkpoint.")
+        parser.add_argument('--rejects', help="Write rejected rows and their errors to this CSV file.")
+
+    def handle(self, *args, **options):
+        try:
+            owner = User.objects.get_by_identifier(options['owner'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with identifier {options['owner']!r}.")
+
+        source_path = os.path.realpath(options['path'])
+        try:
+            version = fingerprint(source_path)
+        except OSError as exc:
+            raise CommandError(f"Cannot read {options['path']}: {exc.strerror}.")
+        checkpoint = ImportCheckpoint.objects.filter(source=source_path, owner=owner)
+        skip = self.read_checkpoint(checkpoint, version) if options['resume'] else 0
+
+        self.owner, self.source_path, self.version, self.done = owner, source_path, version, skip
+        with open(options['path'], newline='', encoding='utf-8-sig') as source:
+            rows = islice(bulk_load.read_csv(source, {'company_name'}), skip, None)
+            bulk_load.load(
+                self, rows, validate_batch, self.insert,
+                batch_size=options['batch_size'], workers=options['workers'], rejects=options['rejects'],
+                fields=FIELDS, verb='imported', noun='clients', skipped=skip,
+            )
+        checkpoint.delete()
+
+    def insert(self, results):
+        """
+        Insert the valid rows of one batch and move the checkpoint past the
+        whole batch, in one transaction.
+        """
+        done = self.done + len(results)
+        with transaction.atomic():
+            objs = Client.objects.bulk_create([
+                Client(**data, added_by=self.owner) for _, _, data, _ in results if data is not None
+            ])
+            bulk_post_save.send(sender=Client, instances=objs, created=True)
+            ImportCheckpoint.objects.update_or_create(
+                source=self.source_path, owner=self.owner, defaults={'fingerprint': self.version, 'rows': done},
+            )
+        self.done = done
+        return {}
+
+    def read_checkpoint(self, checkpoint, version):
+        """
+        The number of rows already committed, refusing a checkpoint saved
+        for another version of the file.
+        """
+        saved = checkpoint.values_list('fingerprint', 'rows').first()
+        if saved is None:
+            return 0
+        if saved[0] != version:
+            raise CommandError(
+                "The file changed since the checkpoint was saved; import it again without --resume."
+            )
+        return saved[1]
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from proposals import stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-user proposal statistics rollup from the proposals table."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt proposal statistics: {count} rollup rows."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from proposals import stats
+
+
+class Command(BaseCommand):
+    help = "Recompute Client.proposal_count and last_proposal_at wherever they have drifted from the proposals."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drifted clients without fixing them.")
+
+    def handle(self, *args, **options):
+        drifted = stats.repair_client_counters(dry_run=options['dry_run'])
+        verb = "Found" if options['dry_run'] else "Repaired"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(drifted)} drifted client(s)."))
+        if drifted and options['verbosity'] > 1:
+            self.stdout.write("Client ids: " + ", ".join(map(str, drifted)))
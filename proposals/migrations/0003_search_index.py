@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Create and populate the FTS5 table used by proposals.search.SQLiteFTSBackend.
+    Other databases use the unindexed fallback backend, so there is nothing to do.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE IF NOT EXISTS proposals_search_index '
+        'USING fts5(owner, title, body, extra)'
+    )
+    schema_editor.execute(
+        "INSERT INTO proposals_search_index (rowid, owner, title, body, extra) "
+        "SELECT id * 2, 'u' || added_by_id, company_name, "
+        "TRIM(COALESCE(address, '') || ' ' || COALESCE(email, '') || ' ' || COALESCE(phone_number, '')), '' "
+        "FROM proposals_client"
+    )
+    schema_editor.execute(
+        "INSERT INTO proposals_search_index (rowid, owner, title, body, extra) "
+        "SELECT p.id * 2 + 1, 'u' || p.created_by_id, p.title, p.description, c.company_name "
+        "FROM proposals_proposal p JOIN proposals_client c ON c.id = p.client_id"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS proposals_search_index')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proposals', '0002_owner_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
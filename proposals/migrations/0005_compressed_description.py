@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-17 01:08
+
+import proposals.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proposals', '0004_proposal_revisions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='proposal',
+            name='description',
+            field=proposals.fields.CompressedTextField(),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.1 on 2026-10-17 01:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, DateField, Max
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+
+def fill_stats(apps, schema_editor):
+    Proposal = apps.get_model('proposals', 'Proposal')
+    ProposalStat = apps.get_model('proposals', 'ProposalStat')
+    tzinfo = timezone.get_default_timezone() if settings.USE_TZ else None
+    rows = (
+        Proposal.objects.filter(created_by__isnull=False)
+        .annotate(stat_month=TruncMonth('created_at', output_field=DateField(), tzinfo=tzinfo))
+        .order_by()
+        .values('created_by_id', 'client_id', 'stat_month')
+        .annotate(proposal_count=Count('pk'), last_proposal_at=Max('created_at'))
+    )
+    ProposalStat.objects.bulk_create([
+        ProposalStat(
+            user_id=row['created_by_id'], client_id=row['client_id'], month=row['stat_month'],
+            proposal_count=row['proposal_count'], last_proposal_at=row['last_proposal_at'],
+        )
+        for row in rows.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proposals', '0005_compressed_description'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProposalStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('proposal_count', models.IntegerField(default=0)),
+                ('last_proposal_at', models.DateTimeField()),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='proposal_stats', to='proposals.client')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='proposal_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Proposal statistic',
+                'verbose_name_plural': 'Proposal statistics',
+                'constraints': [models.UniqueConstraint(fields=('user', 'client', 'month'), name='proposal_stat_bucket_uniq')],
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
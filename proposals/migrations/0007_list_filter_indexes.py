@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1 on 2026-10-17 01:29
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proposals', '0006_proposal_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(models.F('added_by'), django.db.models.functions.text.Lower('company_name'), name='client_owner_lname_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['added_by', 'email'], name='client_owner_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['added_by', 'phone_number'], name='client_owner_phone_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['added_by', 'created_at'], name='client_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proposal',
+            index=models.Index(fields=['created_by', 'client', 'created_at'], name='proposal_owner_client_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proposal',
+            index=models.Index(fields=['created_by', 'updated_at'], name='proposal_owner_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proposal',
+            index=models.Index(models.F('created_by'), django.db.models.functions.text.Lower('title'), name='proposal_owner_ltitle_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-17 01:34
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Client = apps.get_model('proposals', 'Client')
+    Proposal = apps.get_model('proposals', 'Proposal')
+    proposals = Proposal.objects.filter(client=OuterRef('pk')).order_by()
+    Client.objects.update(
+        proposal_count=Coalesce(Subquery(proposals.values('client').annotate(n=Count('pk')).values('n')), 0),
+        last_proposal_at=Subquery(proposals.order_by('-created_at').values('created_at')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proposals', '0007_list_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='last_proposal_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='proposal_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['added_by', 'proposal_count'], name='client_owner_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['added_by', 'last_proposal_at'], name='client_owner_active_idx'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
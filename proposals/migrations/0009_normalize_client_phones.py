@@ -0,0 +1,41 @@
+import phonenumbers
+from django.conf import settings
+from django.db import migrations
+
+
+def to_e164(value, region):
+    """
+    `value` in E.164 form, or None if it is not a valid phone number.
+    """
+    try:
+        number = phonenumbers.parse(value.strip(), region)
+    except phonenumbers.NumberParseException:
+        return None
+    if not phonenumbers.is_valid_number(number):
+        return None
+    return phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.E164)
+
+
+def normalize_phones(apps, schema_editor):
+    Client = apps.get_model('proposals', 'Client')
+    clients = Client.objects.filter(phone_number__gt='').only('phone_number')
+    region = getattr(settings, 'PHONENUMBER_DEFAULT_REGION', None)
+    changed = []
+    for client in clients.iterator():
+        # Numbers that do not parse are left as they are.
+        normalized = to_e164(client.phone_number, region)
+        if normalized and normalized != client.phone_number:
+            client.phone_number = normalized
+            changed.append(client)
+    Client.objects.bulk_update(changed, ['phone_number'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proposals', '0008_client_proposal_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_phones, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-17 02:58
+
+import proposals.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proposals', '0010_import_checkpoints'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='client',
+            name='phone_number',
+            field=proposals.fields.NormalizedPhoneField(blank=True, max_length=20, null=True),
+        ),
+    ]
@@ -1,6 +1,9 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth import get_user_model
 
+from .fields import CompressedTextField, NormalizedPhoneField
+
 User = get_user_model()
 
 class BaseModel(models.Model):
@@ -19,9 +22,15 @@ class Client(BaseModel):
     """
     company_name = models.CharField(max_length=255)
     address = models.TextField(blank=True, null=True)
-    phone_number = models.CharField(max_length=20, blank=True, null=True)
+    phone_number = NormalizedPhoneField(max_length=20, blank=True, null=True)
     email = models.EmailField(blank=True, null=True)
     added_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='clients_added')
+    # Maintained from the proposal signals (see proposals.stats).
+    proposal_count = models.IntegerField(default=0)
+    last_proposal_at = models.DateTimeField(blank=True, null=True)
+
+    # Columns written with queryset.update(), which leaves updated_at alone.
+    DENORMALIZED_FIELDS = ('proposal_count', 'last_proposal_at')
 
     def __str__(self):
         return self.company_name or self.user.name
@@ -30,6 +39,16 @@ class Client(BaseModel):
         verbose_name = 'Client'
         verbose_name_plural = 'Clients'
         ordering = ['company_name']
+        indexes = [
+            models.Index(fields=['added_by', 'company_name'], name='client_owner_name_idx'),
+            # Backing the list filters and orderings in proposals.filters.
+            models.Index('added_by', Lower('company_name'), name='client_owner_lname_idx'),
+            models.Index(fields=['added_by', 'email'], name='client_owner_email_idx'),
+            models.Index(fields=['added_by', 'phone_number'], name='client_owner_phone_idx'),
+            models.Index(fields=['added_by', 'created_at'], name='client_owner_created_idx'),
+            models.Index(fields=['added_by', 'proposal_count'], name='client_owner_count_idx'),
+            models.Index(fields=['added_by', 'last_proposal_at'], name='client_owner_active_idx'),
+        ]
         
         
 class Proposal(BaseModel):
@@ -38,13 +57,94 @@ class Proposal(BaseModel):
     """
     client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='proposals')
     title = models.CharField(max_length=255)
-    description = models.TextField()
+    description = CompressedTextField()
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='proposals_created')
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The client as stored, so saving a reassignment can move the
+        # proposal's statistics (see proposals.stats).
+        instance._loaded_client_id = instance.__dict__.get('client_id')
+        return instance
+
     class Meta:
         verbose_name = 'Proposal'
         verbose_name_plural = 'Proposals'
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_by', 'created_at'], name='proposal_owner_created_idx'),
+            # Backing the list filters and orderings in proposals.filters.
+            models.Index(fields=['created_by', 'client', 'created_at'], name='proposal_owner_client_idx'),
+            models.Index(fields=['created_by', 'updated_at'], name='proposal_owner_updated_idx'),
+            models.Index('created_by', Lower('title'), name='proposal_owner_ltitle_idx'),
+        ]
+
+class ProposalRevision(models.Model):
+    """
+    One saved version of a proposal's title and description. The content is
+    stored compressed, either in full (a snapshot) or as a line delta against
+    the previous revision; see proposals.revisions.
+    """
+    proposal = models.ForeignKey(Proposal, on_delete=models.CASCADE, related_name='revisions')
+    number = models.PositiveIntegerField()
+    is_snapshot = models.BooleanField(default=False)
+    data = models.BinaryField()
+    checksum = models.PositiveBigIntegerField()
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='proposal_revisions')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.proposal_id} #{self.number}'
+
+    class Meta:
+        verbose_name = 'Proposal revision'
+        verbose_name_plural = 'Proposal revisions'
+        ordering = ['-number']
+        constraints = [
+            models.UniqueConstraint(fields=['proposal', 'number'], name='proposal_revision_number_uniq'),
+        ]
+
+class ProposalStat(models.Model):
+    """
+    The number of proposals one user made for one client in one calendar
+    month, and the latest of them; maintained by proposals.stats.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='proposal_stats')
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='proposal_stats')
+    month = models.DateField()
+    proposal_count = models.IntegerField(default=0)
+    last_proposal_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.user_id} / {self.client_id} / {self.month:%Y-%m}'
+
+    class Meta:
+        verbose_name = 'Proposal statistic'
+        verbose_name_plural = 'Proposal statistics'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'client', 'month'], name='proposal_stat_bucket_uniq'),
+        ]
+
+class ImportCheckpoint(models.Model):
+    """
+    How many rows of a CSV file import_clients has committed for an owner.
+    Saved in each batch's transaction, so it never disagrees with the rows
+    actually imported. `fingerprint` identifies the file's version.
+    """
+    source = models.CharField(max_length=1024)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    fingerprint = models.CharField(max_length=64)
+    rows = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.source} ({self.rows} rows)'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'owner'], name='import_checkpoint_source_owner_uniq'),
+        ]
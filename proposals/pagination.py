@@ -0,0 +1,194 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+from rest_framework.response import Response
+
+
+def approximate_count(queryset, cap):
+    """
+    Count rows in the queryset, reading at most `cap` of them.
+
+    Returns a (count, exact) tuple. Past the cap, PostgreSQL's planner
+    estimate is used instead of walking the whole index.
+    """
+    count = queryset.order_by()[:cap].count()
+    if count < cap:
+        return count, True
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return max(cap, int(plan[0]['Plan']['Plan Rows'])), False
+    return cap, False
+
+
+async def aapproximate_count(queryset, cap):
+    """
+    approximate_count() for async callers.
+    """
+    count = await queryset.order_by()[:cap].acount()
+    if count < cap:
+        return count, True
+    if connections[queryset.db].vendor == 'postgresql':
+        return await sync_to_async(approximate_count)(queryset, cap)
+    return cap, False
+
+
+class OwnerCursorPagination(CursorPagination):
+    """
+    Keyset pagination over a per-user list.
+
+    Follows the model's Meta.ordering, so every page is a range scan on the
+    matching (owner, ordering) index and page N costs the same as page 1.
+    Pass `?count=true` to include an approximate total.
+
+    Nullable ordering columns sort NULL before every value on all backends,
+    and a NULL cursor position is encoded as NULL_POSITION.
+    """
+    NULL_POSITION = '\x00'
+
+    ordering = None
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    count_query_param = 'count'
+    count_cap = 10000
+
+    def get_ordering(self, request, queryset, view):
+        if self.ordering is None:
+            ordering = tuple(queryset.model._meta.ordering)
+            tiebreak = '-pk' if ordering[0].startswith('-') else 'pk'
+            self.ordering = ordering + (tiebreak,)
+        return super().get_ordering(request, queryset, view)
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = approximate_count(queryset, self.count_cap) if self.wants_count(request) else None
+        page_queryset = self.get_page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+        return self.set_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset() for async views, reading rows with the async ORM.
+        """
+        self.count = await aapproximate_count(queryset, self.count_cap) if self.wants_count(request) else None
+        page_queryset = self.get_page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+        return self.set_page([row async for row in page_queryset])
+
+    # CursorPagination.paginate_queryset(), split around the one query it runs
+    # so the sync and async paths can share it.
+    def get_page_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+        self.page_cursor = (offset, reverse, current_position)
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*self.get_order_expressions(queryset.model, ordering))
+
+        if current_position is not None:
+            order = self.ordering[0]
+            is_reversed = order.startswith('-')
+            order_attr = order.lstrip('-')
+            lookup = 'lt' if self.cursor.reverse != is_reversed else 'gt'
+            queryset = queryset.filter(self.get_position_filter(queryset.model, order_attr, lookup, current_position))
+
+        # Fetch one extra row to learn whether another page follows.
+        return queryset[offset:offset + self.page_size + 1]
+
+    def is_nullable(self, model, name):
+        return name != 'pk' and model._meta.get_field(name).null
+
+    def get_order_expressions(self, model, ordering):
+        expressions = []
+        for name in ordering:
+            attr = name.lstrip('-')
+            if not self.is_nullable(model, attr):
+                expressions.append(name)
+            elif name.startswith('-'):
+                expressions.append(F(attr).desc(nulls_last=True))
+            else:
+                expressions.append(F(attr).asc(nulls_first=True))
+        return expressions
+
+    def get_position_filter(self, model, name, lookup, position):
+        if position == self.NULL_POSITION:
+            # Nothing sorts before NULL; everything else sorts after it.
+            return Q(**{f'{name}__isnull': False}) if lookup == 'gt' else Q(pk__in=[])
+        condition = Q(**{f'{name}__{lookup}': position})
+        if lookup == 'lt' and self.is_nullable(model, name):
+            condition |= Q(**{f'{name}__isnull': True})
+        return condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        field_name = ordering[0].lstrip('-')
+        attr = instance[field_name] if isinstance(instance, dict) else getattr(instance, field_name)
+        return self.NULL_POSITION if attr is None else str(attr)
+
+    def set_page(self, results):
+        offset, reverse, current_position = self.page_cursor
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_paginated_data(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+        if self.count is not None:
+            payload['count'], payload['count_is_exact'] = self.count
+        payload['results'] = data
+        return payload
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
@@ -0,0 +1,182 @@
+"""
+Revision history for proposals.
+
+Each revision stores the proposal's title and description, zlib-compressed.
+Most revisions hold only a line delta of the description against the previous
+revision: runs of unchanged lines become [start, end] references and changed
+lines are stored as text. Every REVISION_SNAPSHOT_INTERVAL revisions a full
+snapshot is stored instead, so rebuilding any version applies at most that
+many deltas, read with one query.
+
+Each revision also records a CRC-32 of its full content. If the content a new
+delta would be based on no longer matches the latest revision's checksum
+(e.g. the proposal was changed somewhere that records no history), a snapshot
+is written instead of a delta.
+"""
+import json
+import zlib
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+
+from .models import Proposal, ProposalRevision
+
+
+class CorruptRevision(Exception):
+    pass
+
+
+def get_snapshot_interval():
+    return getattr(settings, 'REVISION_SNAPSHOT_INTERVAL', 20)
+
+
+def checksum(title, description):
+    return zlib.crc32(description.encode(), zlib.crc32(title.encode()))
+
+
+def pack(payload):
+    return zlib.compress(json.dumps(payload, separators=(',', ':')).encode())
+
+
+def unpack(data):
+    return json.loads(zlib.decompress(bytes(data)))
+
+
+def diff(old, new):
+    """
+    Return the ops turning `old` into `new`: [start, end] copies a run of old
+    lines, a string is inserted as is.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    # Most edits touch a few lines; match the unchanged head and tail directly
+    # and only run SequenceMatcher over what lies between.
+    limit = min(len(old_lines), len(new_lines))
+    head = 0
+    while head < limit and old_lines[head] == new_lines[head]:
+        head += 1
+    tail = 0
+    while tail < limit - head and old_lines[-1 - tail] == new_lines[-1 - tail]:
+        tail += 1
+    ops = [[0, head]] if head else []
+    matcher = SequenceMatcher(
+        None, old_lines[head:len(old_lines) - tail], new_lines[head:len(new_lines) - tail], autojunk=False,
+    )
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([head + i1, head + i2])
+        elif j1 != j2:
+            ops.append(''.join(new_lines[head + j1:head + j2]))
+    if tail:
+        ops.append([len(old_lines) - tail, len(old_lines)])
+    return ops
+
+
+def patch(old, ops):
+    old_lines = old.splitlines(keepends=True)
+    return ''.join(op if isinstance(op, str) else ''.join(old_lines[op[0]:op[1]]) for op in ops)
+
+
+def latest(proposal_ids):
+    """
+    Return {proposal_id: (number, checksum)} for the newest revision of each proposal.
+    """
+    if len(proposal_ids) == 1:
+        # The common single save: a plain index lookup is cheaper to build and run.
+        row = (
+            ProposalRevision.objects.filter(proposal_id=proposal_ids[0])
+            .order_by('-number').values_list('number', 'checksum').first()
+        )
+        return {proposal_ids[0]: row} if row is not None else {}
+    newest = (
+        ProposalRevision.objects.filter(proposal=OuterRef('proposal'))
+        .order_by('-number').values('number')[:1]
+    )
+    rows = (
+        ProposalRevision.objects.filter(proposal_id__in=proposal_ids, number=Subquery(newest))
+        .values_list('proposal_id', 'number', 'checksum')
+    )
+    return {proposal_id: (number, crc) for proposal_id, number, crc in rows}
+
+
+def build(proposal, previous, last, user):
+    """
+    Return the unsaved revision for `proposal`'s current content, or None if
+    it is unchanged. `previous` is the (title, description) the write started
+    from and `last` the newest revision's (number, checksum), if any.
+    """
+    title, description = proposal.title, proposal.description
+    crc = checksum(title, description)
+    if last is not None and last[1] == crc and previous == (title, description):
+        return None
+    number = last[0] + 1 if last is not None else 1
+    snapshot = (
+        last is None or previous is None
+        or (number - 1) % get_snapshot_interval() == 0
+        or checksum(*previous) != last[1]
+    )
+    payload = [title, description] if snapshot else [title, diff(previous[1], description)]
+    return ProposalRevision(
+        proposal=proposal, number=number, is_snapshot=snapshot, data=pack(payload), checksum=crc,
+        created_by=user,
+    )
+
+
+def record(changes, user):
+    """
+    Record a revision for each (proposal, previous) pair whose content changed.
+    `previous` is the (title, description) before the write, or None for new
+    proposals. Must run in a transaction: the existing proposals are locked
+    before their newest revision numbers are read, so concurrent saves of a
+    proposal number their revisions one after the other. Runs at most three
+    queries however many proposals there are.
+    """
+    changes = list(changes)
+    existing = [proposal.pk for proposal, previous in changes if previous is not None]
+    last = {}
+    if existing:
+        # Ordered by pk so overlapping bulk saves take their locks in the same order.
+        list(Proposal.objects.select_for_update().filter(pk__in=existing).order_by('pk').values_list('pk'))
+        last = latest(existing)
+    revisions = [build(proposal, previous, last.get(proposal.pk), user) for proposal, previous in changes]
+    revisions = [revision for revision in revisions if revision is not None]
+    return ProposalRevision.objects.bulk_create(revisions) if revisions else []
+
+
+def get_version(proposal_id, number):
+    """
+    Return revision `number` of a proposal with `title` and `description` set
+    to the content at that version. Raises ProposalRevision.DoesNotExist.
+    """
+    chain = list(
+        ProposalRevision.objects.filter(
+            proposal_id=proposal_id, number__gt=number - get_snapshot_interval(), number__lte=number,
+        ).order_by('number')
+    )
+    if not chain or chain[-1].number != number:
+        raise ProposalRevision.DoesNotExist(f'Proposal {proposal_id} has no revision {number}.')
+    start = max((i for i, revision in enumerate(chain) if revision.is_snapshot), default=None)
+    if start is None:
+        # Written under a longer snapshot interval; read back to its snapshot.
+        base = (
+            ProposalRevision.objects.filter(proposal_id=proposal_id, number__lte=number, is_snapshot=True)
+            .values_list('number', flat=True).first()
+        )
+        if base is None:
+            raise CorruptRevision(f'Proposal {proposal_id} has no snapshot before revision {number}.')
+        chain = list(
+            ProposalRevision.objects.filter(proposal_id=proposal_id, number__gte=base, number__lte=number)
+            .order_by('number')
+        )
+        start = 0
+    title = description = None
+    for revision in chain[start:]:
+        payload = unpack(revision.data)
+        title = payload[0]
+        description = payload[1] if revision.is_snapshot else patch(description, payload[1])
+    revision = chain[-1]
+    if checksum(title, description) != revision.checksum:
+        raise CorruptRevision(f'Revision {number} of proposal {proposal_id} failed its checksum.')
+    revision.title, revision.description = title, description
+    return revision
@@ -0,0 +1,165 @@
+"""
+Read-only fast path for list endpoints.
+
+The serializers walk DRF's field machinery for every field of every row.
+compile_rows() does that walk once per (serializer class, fields, expand) and
+turns it into a single function that builds the output dict straight from a
+values_list() row, converting only the columns whose representation differs
+from the database value. The output is identical to the serializer's.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# Model fields whose database value is already the serializer's representation.
+PLAIN_MODEL_FIELDS = (
+    models.AutoField, models.BigAutoField, models.IntegerField,
+    models.CharField, models.EmailField, models.TextField,
+)
+PLAIN_SERIALIZER_FIELDS = (serializers.IntegerField, serializers.CharField, serializers.EmailField)
+# Distinct raw values remembered per converted text column (e.g. phone numbers).
+TEXT_CACHE_SIZE = 1024
+
+
+class RowPlan:
+    """
+    The values_list() lookups to read and a compiled builder for their rows.
+    """
+    def __init__(self, lookups, source, namespace):
+        self.lookups = lookups
+        self.source = source
+        exec(compile(f'def build(row, tz):\n    return {source}\n', '<row plan>', 'exec'), namespace)
+        self.build = namespace['build']
+
+    def render(self, rows):
+        """
+        Return the serializer's output for each row.
+        """
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        build = self.build
+        return [build(row, tz) for row in rows]
+
+
+def _datetime_converter(field):
+    """
+    DateTimeField.to_representation with the timezone looked up once per page
+    rather than once per value.
+    """
+    def convert(value, tz):
+        if tz is not None and timezone.is_aware(value):
+            value = value.astimezone(tz)
+        else:
+            value = field.enforce_timezone(value)
+        value = value.isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def _text_converter(field, model_field):
+    """
+    Convert a raw text column the way loading it through the model field and
+    rendering it would, remembering recent results.
+    """
+    @lru_cache(maxsize=TEXT_CACHE_SIZE)
+    def convert(raw):
+        return field.to_representation(model_field.to_python(raw))
+    return convert
+
+
+def _is_default_datetime(field):
+    return (
+        type(field) is serializers.DateTimeField
+        and not hasattr(field, 'format') and not hasattr(field, 'timezone')
+        and (api_settings.DATETIME_FORMAT or '').lower() == ISO_8601
+    )
+
+
+class _Compiler:
+    def __init__(self):
+        self.lookups = []
+        self.indexes = {}
+        self.namespace = {}
+
+    def column(self, lookup, raw=False):
+        key = (lookup, raw)
+        if key not in self.indexes:
+            self.indexes[key] = len(self.lookups)
+            if raw:
+                lookup = models.ExpressionWrapper(models.F(lookup), output_field=models.TextField())
+            self.lookups.append(lookup)
+        return f'row[{self.indexes[key]}]'
+
+    def function(self, func):
+        name = f'f{len(self.namespace)}'
+        self.namespace[name] = func
+        return name
+
+    def field(self, field, model, prefix):
+        model_field = model._meta.get_field(field.source)
+        lookup = f'{prefix}{field.source}'
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            return self.column(lookup)
+        if type(model_field) in PLAIN_MODEL_FIELDS and type(field) in PLAIN_SERIALIZER_FIELDS:
+            return self.column(lookup)
+        if _is_default_datetime(field):
+            value = self.column(lookup)
+            return f'(None if {value} is None else {self.function(_datetime_converter(field))}({value}, tz))'
+        if isinstance(model_field, models.CharField) and type(field) in PLAIN_SERIALIZER_FIELDS:
+            # Text stored under a custom type (e.g. PhoneNumberField): read it
+            # raw and convert each distinct value once.
+            value = self.column(lookup, raw=True)
+            return f'(None if {value} is None else {self.function(_text_converter(field, model_field))}({value}))'
+        value = self.column(lookup)
+        return f'(None if {value} is None else {self.function(field.to_representation)}({value}))'
+
+    def serializer(self, serializer, prefix=''):
+        model = serializer.Meta.model
+        items = []
+        for field in serializer._readable_fields:
+            if len(field.source_attrs) != 1:
+                raise ValueError(f'{field.field_name}: only direct model attributes are supported.')
+            if isinstance(field, serializers.BaseSerializer):
+                if model._meta.get_field(field.source).related_model is not field.Meta.model:
+                    raise ValueError(f'{field.field_name}: nested serializer does not match the relation.')
+                present = self.column(f'{prefix}{field.source}')
+                nested = self.serializer(field, f'{prefix}{field.source}__')
+                value = f'(None if {present} is None else {nested})'
+            else:
+                value = self.field(field, model, prefix)
+            items.append(f'{field.field_name!r}: {value}')
+        return '{' + ', '.join(items) + '}'
+
+
+@lru_cache(maxsize=256)
+def _compile_rows(serializer_class, fields, expand):
+    serializer = serializer_class(
+        fields=list(fields) if fields is not None else None,
+        expand=list(expand) if expand is not None else None,
+    )
+    compiler = _Compiler()
+    source = compiler.serializer(serializer)
+    return RowPlan(compiler.lookups, source, compiler.namespace)
+
+
+def compile_rows(serializer_class, fields=None, expand=None):
+    """
+    Return the cached RowPlan for a SparseFieldsMixin serializer.
+    """
+    return _compile_rows(
+        serializer_class,
+        tuple(fields) if fields is not None else None,
+        tuple(expand) if expand is not None else None,
+    )
+
+
+def rows_queryset(queryset, plan, extra=()):
+    """
+    Read the plan's columns as named rows, plus any `extra` lookups the
+    caller needs (e.g. ordering keys for cursor pagination).
+    """
+    lookups = plan.lookups + [lookup for lookup in extra if lookup not in plan.lookups]
+    return queryset.values_list(*lookups, named=True)
@@ -0,0 +1,293 @@
+"""
+Full-text search over a user's clients and proposals.
+
+The backend is chosen with the SEARCH_BACKEND setting. SQLiteFTSBackend keeps
+an FTS5 index in sync from the model signals (see proposals.signals); on other
+databases SimpleSearchBackend falls back to plain `icontains` lookups.
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Client, Proposal
+
+CLIENT = 'client'
+PROPOSAL = 'proposal'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TOKENS = 16
+
+
+def tokenize(query):
+    """
+    Split a user query into at most MAX_TOKENS word tokens.
+    """
+    return TOKEN_RE.findall(query or '')[:MAX_TOKENS]
+
+
+class BaseSearchBackend:
+    """
+    Interface for search backends. `owner` is a user id; None searches everything.
+    """
+    def index_clients(self, clients, created=False):
+        pass
+
+    def index_proposals(self, proposals):
+        pass
+
+    def remove_clients(self, pks):
+        pass
+
+    def remove_proposals(self, pks):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, owner=None, kind=None, limit=20, offset=0):
+        """
+        Return up to `limit` hits, best first, as dicts with
+        type, id, title, snippet and score.
+        """
+        raise NotImplementedError
+
+    def search_ids(self, kind, query):
+        """
+        Return every matching primary key for `kind`, as a list or a subquery
+        to filter `pk__in` on, or None if the backend cannot do better than
+        the caller's own filtering.
+        """
+        return None
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """
+    Unindexed fallback using `icontains`; titles that match rank first.
+    """
+    def _search_model(self, model, owner_field, title_field, text_fields, tokens, owner):
+        queryset = model.objects.all()
+        if owner is not None:
+            queryset = queryset.filter(**{owner_field: owner})
+        for token in tokens:
+            match = Q()
+            for name in text_fields:
+                match |= Q(**{f'{name}__icontains': token})
+            queryset = queryset.filter(match)
+        return queryset.annotate(
+            score=Case(
+                When(**{f'{title_field}__icontains': tokens[0]}, then=Value(2)),
+                default=Value(1),
+                output_field=IntegerField(),
+            )
+        ).values_list('pk', title_field, 'score')
+
+    def search(self, query, owner=None, kind=None, limit=20, offset=0):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        hits = []
+        if kind in (None, CLIENT):
+            rows = self._search_model(
+                Client, 'added_by', 'company_name',
+                ['company_name', 'address', 'email', 'phone_number'], tokens, owner,
+            )
+            hits += [(score, CLIENT, pk, title) for pk, title, score in rows[:offset + limit]]
+        if kind in (None, PROPOSAL):
+            rows = self._search_model(
+                Proposal, 'created_by', 'title',
+                ['title', 'description', 'client__company_name'], tokens, owner,
+            )
+            hits += [(score, PROPOSAL, pk, title) for pk, title, score in rows[:offset + limit]]
+        hits.sort(key=lambda hit: -hit[0])
+        return [
+            {'type': kind_, 'id': pk, 'title': title, 'snippet': '', 'score': float(score)}
+            for score, kind_, pk, title in hits[offset:offset + limit]
+        ]
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 index with one row per client and proposal.
+
+    Rows are keyed by rowid (pk * 2 for clients, pk * 2 + 1 for proposals), so
+    every sync is a rowid lookup. The owner is stored as an indexed `u<id>`
+    token, which lets the match itself do the per-user scoping.
+    """
+    table = 'proposals_search_index'
+    # bm25 weights for (owner, title, body, extra).
+    weights = (0.0, 10.0, 1.0, 2.0)
+    rebuild_batch_size = 2000
+
+    @staticmethod
+    def rowid(kind, pk):
+        return pk * 2 + (1 if kind == PROPOSAL else 0)
+
+    @staticmethod
+    def owner_token(owner_id):
+        return f'u{owner_id}' if owner_id is not None else None
+
+    def _replace(self, rows):
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {self.table} (rowid, owner, title, body, extra) '
+                'VALUES (%s, %s, %s, %s, %s)',
+                rows,
+            )
+
+    def _remove(self, kind, pks):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [(self.rowid(kind, pk),) for pk in pks]
+            )
+
+    def index_clients(self, clients, created=False):
+        clients = list(clients)
+        if not clients:
+            return
+        indexed_names = {}
+        if not created:
+            rowids = [self.rowid(CLIENT, client.pk) for client in clients]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT rowid, title FROM {self.table} WHERE rowid IN ({", ".join(["%s"] * len(rowids))})',
+                    rowids,
+                )
+                indexed_names = dict(cursor.fetchall())
+        self._replace([
+            (
+                self.rowid(CLIENT, client.pk),
+                self.owner_token(client.added_by_id),
+                client.company_name,
+                ' '.join(filter(None, [client.address, client.email, client.phone_number])),
+                '',
+            )
+            for client in clients
+        ])
+        # Proposals carry their client's name, so a rename has to reach them too.
+        renamed = [
+            (client.company_name, client.pk) for client in clients
+            if indexed_names.get(self.rowid(CLIENT, client.pk), client.company_name) != client.company_name
+        ]
+        if renamed:
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f'UPDATE {self.table} SET extra = %s WHERE rowid IN '
+                    f'(SELECT id * 2 + 1 FROM {Proposal._meta.db_table} WHERE client_id = %s)',
+                    renamed,
+                )
+
+    def index_proposals(self, proposals):
+        proposals = list(proposals)
+        if not proposals:
+            return
+        names = {
+            p.client_id: p.client.company_name for p in proposals if Proposal.client.is_cached(p)
+        }
+        missing = {p.client_id for p in proposals} - set(names)
+        if missing:
+            names.update(Client.objects.filter(pk__in=missing).values_list('pk', 'company_name'))
+        self._replace([
+            (
+                self.rowid(PROPOSAL, proposal.pk),
+                self.owner_token(proposal.created_by_id),
+                proposal.title,
+                proposal.description,
+                names.get(proposal.client_id, ''),
+            )
+            for proposal in proposals
+        ])
+
+    def remove_clients(self, pks):
+        self._remove(CLIENT, pks)
+
+    def remove_proposals(self, pks):
+        self._remove(PROPOSAL, pks)
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+        for model, index in ((Client, self.index_clients), (Proposal, self.index_proposals)):
+            batch = []
+            for obj in model.objects.order_by().iterator(chunk_size=self.rebuild_batch_size):
+                batch.append(obj)
+                if len(batch) == self.rebuild_batch_size:
+                    index(batch)
+                    batch = []
+            index(batch)
+
+    def _match(self, tokens, owner):
+        terms = ' AND '.join(f'"{token}"' for token in tokens[:-1])
+        last = f'"{tokens[-1]}"*'
+        terms = f'{terms} AND {last}' if terms else last
+        match = f'{{title body extra}}: ({terms})'
+        if owner is not None:
+            match = f'owner: "{self.owner_token(owner)}" AND {match}'
+        return match
+
+    def _query(self, tokens, owner, kind, limit, offset):
+        rank = 'bm25({}, {})'.format(self.table, ', '.join(str(w) for w in self.weights))
+        sql = (
+            f'SELECT rowid, title, snippet({self.table}, 2, \'\', \'\', \'…\', 12), {rank} '
+            f'FROM {self.table} WHERE {self.table} MATCH %s'
+        )
+        params = [self._match(tokens, owner)]
+        if kind is not None:
+            sql += ' AND (rowid %% 2) = %s'
+            params.append(1 if kind == PROPOSAL else 0)
+        sql += f' ORDER BY {rank} LIMIT %s OFFSET %s'
+        params += [limit, offset]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def search(self, query, owner=None, kind=None, limit=20, offset=0):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        return [
+            {
+                'type': PROPOSAL if rowid % 2 else CLIENT,
+                'id': rowid // 2,
+                'title': title,
+                'snippet': snippet,
+                'score': round(-rank, 6),
+            }
+            for rowid, title, snippet, rank in self._query(tokens, owner, kind, limit, offset)
+        ]
+
+    def search_ids(self, kind, query):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # A subquery rather than a list: no cap on the number of matches, and
+        # nothing to rank since the caller applies its own ordering.
+        sql = f'SELECT rowid / 2 FROM {self.table} WHERE {self.table} MATCH %s'
+        params = [self._match(tokens, None)]
+        if kind is not None:
+            sql += ' AND (rowid %% 2) = %s'
+            params.append(1 if kind == PROPOSAL else 0)
+        return RawSQL(sql, params)
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path):
+    return import_string(path)()
+
+
+def get_search_backend():
+    """
+    Return the configured backend, falling back to SimpleSearchBackend when
+    the FTS5 backend is configured but the database is not SQLite.
+    """
+    path = getattr(settings, 'SEARCH_BACKEND', 'proposals.search.SQLiteFTSBackend')
+    backend = _load_backend(path)
+    if isinstance(backend, SQLiteFTSBackend) and connection.vendor != 'sqlite':
+        return _load_backend('proposals.search.SimpleSearchBackend')
+    return backend
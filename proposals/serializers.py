@@ -1,27 +1,180 @@
 from rest_framework import serializers
-from .models import Client, Proposal
+from django.db import transaction
+from django.utils import timezone
+from . import revisions
+from .models import Client, Proposal, ProposalRevision
+from .signals import bulk_post_save
 from django.contrib.auth import get_user_model
+from accounts.serializers import PhoneNumberField
 
 User = get_user_model()
 
-class UserSerializer(serializers.ModelSerializer):
+
+def parse_expand(expand):
+    """
+    Turn ['client', 'client.added_by', 'created_by'] into
+    {'client': ['added_by'], 'created_by': []}.
+    """
+    tree = {}
+    for path in expand or ():
+        name, _, rest = path.partition('.')
+        nested = tree.setdefault(name, [])
+        if rest:
+            nested.append(rest)
+    return tree
+
+
+class SparseFieldsMixin:
+    """
+    Serializer support for sparse fieldsets and opt-in expansion.
+
+    `fields` limits the output to the named fields. Relations listed in
+    `expandable_fields` are rendered as primary keys unless named in `expand`,
+    which swaps in the nested serializer (dotted paths expand deeper levels).
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, nested in parse_expand(expand).items():
+            if name in self.expandable_fields and name in self.fields:
+                self.fields[name] = self.expandable_fields[name](read_only=True, expand=nested)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                if not self.fields[name].write_only:
+                    self.fields.pop(name)
+
+    @classmethod
+    def get_query_plan(cls, fields=None, expand=None):
+        """
+        Return the (select_related, only) paths needed to render `fields` with `expand`.
+        """
+        model_fields = {f.name for f in cls.Meta.model._meta.concrete_fields}
+        select_related, only = [], []
+        tree = parse_expand(expand)
+        for name in cls.Meta.fields:
+            if fields is not None and name not in fields:
+                continue
+            if name not in model_fields:
+                continue
+            only.append(name)
+            if name in tree and name in cls.expandable_fields:
+                nested_related, nested_only = cls.expandable_fields[name].get_query_plan(expand=tree[name])
+                select_related.append(name)
+                select_related += [f'{name}__{path}' for path in nested_related]
+                only += [f'{name}__{path}' for path in nested_only]
+        return select_related, only
+
+    @classmethod
+    def optimize_queryset(cls, queryset, fields=None, expand=None, extra=()):
+        """
+        Join the expanded relations and, when `fields` is given, load only those
+        columns plus any `extra` ones the caller needs (e.g. ordering keys).
+        """
+        select_related, only = cls.get_query_plan(fields, expand)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if fields is not None:
+            queryset = queryset.only('pk', *only, *extra)
+        return queryset
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Validate a list of items in one pass and write them in a single transaction
+    with bulk_create()/bulk_update(). Errors come back as one entry per item.
+
+    For updates, pass `instance` as a {pk: object} map; every item must carry
+    the `id` of the object it updates, at most once. The child may define `prepare_bulk(data)`
+    to resolve related objects for the whole list up front.
+    """
+    batch_size = 500
+
+    def to_internal_value(self, data):
+        self._bulk_instances = []
+        self._bulk_seen = set()
+        if isinstance(data, list) and hasattr(self.child, 'prepare_bulk'):
+            self.child.prepare_bulk(data)
+        return super().to_internal_value(data)
+
+    def run_child_validation(self, data):
+        if self.instance is None:
+            return super().run_child_validation(data)
+        pk = data.get('id') if isinstance(data, dict) else None
+        try:
+            instance = self.instance[int(pk)]
+        except (KeyError, TypeError, ValueError):
+            raise serializers.ValidationError({'id': [f'Invalid pk "{pk}" - object does not exist.']})
+        if instance.pk in self._bulk_seen:
+            raise serializers.ValidationError({'id': ['Duplicate id in request.']})
+        self._bulk_seen.add(instance.pk)
+        self.child.instance = instance
+        self.child.initial_data = data
+        validated = super().run_child_validation(data)
+        self._bulk_instances.append(instance)
+        return validated
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        owner = {self.child.owner_field: self.context['request'].user}
+        objs = [model(**attrs, **owner) for attrs in validated_data]
+        with transaction.atomic():
+            objs = model.objects.bulk_create(objs, batch_size=self.batch_size)
+            bulk_post_save.send(sender=model, instances=objs, created=True)
+            self.saved(objs, created=True)
+        return objs
+
+    def update(self, instance, validated_data):
+        model = self.child.Meta.model
+        now = timezone.now()
+        fields = {'updated_at'}
+        objs = []
+        for obj, attrs in zip(self._bulk_instances, validated_data):
+            for name, value in attrs.items():
+                setattr(obj, name, value)
+            obj.updated_at = now
+            fields.update(attrs)
+            objs.append(obj)
+        with transaction.atomic():
+            model.objects.bulk_update(objs, sorted(fields), batch_size=self.batch_size)
+            bulk_post_save.send(sender=model, instances=objs, created=False)
+            self.saved(objs, created=False)
+        return objs
+
+    def saved(self, objs, created):
+        """
+        Hook run inside the write's transaction.
+        """
+
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'name', 'email', 'phone_number']
 
-class ClientSerializer(serializers.ModelSerializer):
-    added_by = UserSerializer(read_only=True)
-    
+class ClientSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    added_by = serializers.PrimaryKeyRelatedField(read_only=True)
+    # Stored in E.164 form, so lookups and duplicate checks are exact matches.
+    phone_number = PhoneNumberField(required=False, allow_null=True, allow_blank=True)
+    expandable_fields = {'added_by': UserSerializer}
+    owner_field = 'added_by'
+
     class Meta:
         model = Client
-        fields = ['id', 'company_name', 'address', 'phone_number', 'email', 'added_by', 'created_at', 'updated_at']
-        read_only_fields = ['created_at', 'updated_at']
+        fields = [
+            'id', 'company_name', 'address', 'phone_number', 'email', 'added_by', 'proposal_count',
+            'last_proposal_at', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['proposal_count', 'last_proposal_at', 'created_at', 'updated_at']
 
     def validate(self, data):
         """
-        Ensure at least one contact field is provided.
+        Ensure at least one contact field is provided, falling back to the
+        stored values on partial updates.
         """
-        if not data.get('phone_number') and not data.get('email'):
+        phone_number = data.get('phone_number', getattr(self.instance, 'phone_number', None))
+        email = data.get('email', getattr(self.instance, 'email', None))
+        if not phone_number and not email:
             raise serializers.ValidationError("Either phone_number or email must be provided.")
         return data
 
@@ -33,12 +186,22 @@ class ClientSerializer(serializers.ModelSerializer):
         validated_data['added_by'] = request.user
         return super().create(validated_data)
 
-class ProposalSerializer(serializers.ModelSerializer):
-    client = ClientSerializer(read_only=True)
-    client_id = serializers.PrimaryKeyRelatedField(
-        queryset=Client.objects.all(), source='client', write_only=True
-    )
-    created_by = UserSerializer(read_only=True)
+class OwnedClientField(serializers.PrimaryKeyRelatedField):
+    """
+    A client id, resolved only among the requesting user's clients.
+    """
+    def get_queryset(self):
+        request = self.context.get('request')
+        if request is None:
+            return Client.objects.none()
+        return Client.objects.select_related('added_by').filter(added_by=request.user)
+
+class ProposalSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    client = serializers.PrimaryKeyRelatedField(read_only=True)
+    client_id = OwnedClientField(source='client', write_only=True)
+    created_by = serializers.PrimaryKeyRelatedField(read_only=True)
+    expandable_fields = {'client': ClientSerializer, 'created_by': UserSerializer}
+    owner_field = 'created_by'
 
     class Meta:
         model = Proposal
@@ -47,8 +210,85 @@ class ProposalSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """
-        Set the created_by field to the current user.
+        Set the created_by field to the current user and record the first revision.
         """
         request = self.context.get('request')
         validated_data['created_by'] = request.user
-        return super().create(validated_data)
\ No newline at end of file
+        with transaction.atomic():
+            proposal = super().create(validated_data)
+            revisions.record([(proposal, None)], request.user)
+        return proposal
+
+    def update(self, instance, validated_data):
+        """
+        Save the changes and record a revision if the content changed.
+        """
+        previous = (instance.title, instance.description)
+        with transaction.atomic():
+            proposal = super().update(instance, validated_data)
+            revisions.record([(proposal, previous)], self.context['request'].user)
+        return proposal
+
+
+class ProposalBulkListSerializer(BulkListSerializer):
+    """
+    BulkListSerializer that records proposal revisions for the whole list.
+    """
+    def update(self, instance, validated_data):
+        self._previous = {obj.pk: (obj.title, obj.description) for obj in self._bulk_instances}
+        return super().update(instance, validated_data)
+
+    def saved(self, objs, created):
+        previous = {} if created else self._previous
+        revisions.record([(obj, previous.get(obj.pk)) for obj in objs], self.context['request'].user)
+
+
+class ProposalRevisionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProposalRevision
+        fields = ['number', 'is_snapshot', 'created_by', 'created_at']
+        read_only_fields = fields
+
+
+class ProposalVersionSerializer(ProposalRevisionSerializer):
+    """
+    A revision with the title and description rebuilt for that version.
+    """
+    title = serializers.CharField(read_only=True)
+    description = serializers.CharField(read_only=True)
+
+    class Meta(ProposalRevisionSerializer.Meta):
+        fields = ProposalRevisionSerializer.Meta.fields + ['title', 'description']
+        read_only_fields = fields
+
+
+class BulkClientSerializer(ClientSerializer):
+    class Meta(ClientSerializer.Meta):
+        list_serializer_class = BulkListSerializer
+
+
+class BulkProposalSerializer(ProposalSerializer):
+    """
+    ProposalSerializer for bulk writes: every client_id in the list is resolved
+    with one query, restricted to the requesting user's clients.
+    """
+    client_id = serializers.IntegerField(source='client', write_only=True)
+
+    class Meta(ProposalSerializer.Meta):
+        list_serializer_class = ProposalBulkListSerializer
+
+    def prepare_bulk(self, data):
+        ids = set()
+        for item in data:
+            try:
+                ids.add(int(item['client_id']))
+            except (KeyError, TypeError, ValueError):
+                continue
+        request = self.context['request']
+        self._clients = Client.objects.filter(added_by=request.user, pk__in=ids).in_bulk()
+
+    def validate_client_id(self, value):
+        client = self._clients.get(value)
+        if client is None:
+            raise serializers.ValidationError(f'Invalid pk "{value}" - object does not exist.')
+        return client
@@ -0,0 +1,138 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from . import cache, documents, stats
+from .models import Client, Proposal
+from .search import get_search_backend
+
+User = get_user_model()
+
+# Sent after bulk_create()/bulk_update(), which skip post_save.
+# Receivers get `instances` (a list) and `created` (bool).
+bulk_post_save = Signal()
+
+
+@receiver(post_save, sender=Client)
+def index_client(sender, instance, created, **kwargs):
+    """
+    Keep the search index in sync when a client is saved.
+    """
+    get_search_backend().index_clients([instance], created=created)
+
+
+@receiver(bulk_post_save, sender=Client)
+def index_clients(sender, instances, created, **kwargs):
+    get_search_backend().index_clients(instances, created=created)
+
+
+@receiver(post_delete, sender=Client)
+def unindex_client(sender, instance, **kwargs):
+    get_search_backend().remove_clients([instance.pk])
+
+
+@receiver(post_save, sender=Proposal)
+def index_proposal(sender, instance, **kwargs):
+    """
+    Keep the search index in sync when a proposal is saved.
+    """
+    get_search_backend().index_proposals([instance])
+
+
+@receiver(bulk_post_save, sender=Proposal)
+def index_proposals(sender, instances, **kwargs):
+    get_search_backend().index_proposals(instances)
+
+
+@receiver(post_delete, sender=Proposal)
+def unindex_proposal(sender, instance, **kwargs):
+    get_search_backend().remove_proposals([instance.pk])
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def invalidate_client_lists(sender, instance, **kwargs):
+    """
+    Proposal pages can embed the client (?expand=client), so both lists go stale.
+    """
+    cache.invalidate(instance.added_by_id, cache.CLIENTS, cache.PROPOSALS)
+
+
+@receiver(post_save, sender=Proposal)
+@receiver(post_delete, sender=Proposal)
+def invalidate_proposal_lists(sender, instance, **kwargs):
+    """
+    Client pages show each client's proposal count and latest proposal.
+    """
+    cache.invalidate(instance.created_by_id, cache.PROPOSALS, cache.CLIENTS)
+
+
+@receiver(bulk_post_save, sender=Client)
+def invalidate_bulk_client_lists(sender, instances, **kwargs):
+    for owner_id in {client.added_by_id for client in instances}:
+        cache.invalidate(owner_id, cache.CLIENTS, cache.PROPOSALS)
+
+
+@receiver(bulk_post_save, sender=Proposal)
+def invalidate_bulk_proposal_lists(sender, instances, **kwargs):
+    for owner_id in {proposal.created_by_id for proposal in instances}:
+        cache.invalidate(owner_id, cache.PROPOSALS, cache.CLIENTS)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_lists(sender, instance, **kwargs):
+    """
+    Expanded pages embed the user's own details.
+    """
+    cache.invalidate(instance.pk, cache.CLIENTS, cache.PROPOSALS)
+
+
+@receiver(post_save, sender=Proposal)
+def prewarm_document(sender, instance, **kwargs):
+    """
+    Render the saved proposal's document in the background once the write commits.
+    """
+    transaction.on_commit(lambda: documents.prewarm([instance.pk]))
+
+
+@receiver(bulk_post_save, sender=Proposal)
+def prewarm_documents(sender, instances, **kwargs):
+    ids = [proposal.pk for proposal in instances]
+    transaction.on_commit(lambda: documents.prewarm(ids))
+
+
+@receiver(post_save, sender=Proposal)
+def update_stats(sender, instance, created, **kwargs):
+    """
+    Count a new proposal in the stats rollup and its client's counters, or
+    move one reassigned to another client.
+    """
+    previous = getattr(instance, '_loaded_client_id', None)
+    if created:
+        stats.record(added=[stats.entry(instance)])
+    elif previous is not None and previous != instance.client_id:
+        stats.record(added=[stats.entry(instance)], removed=[stats.entry(instance, previous)])
+    instance._loaded_client_id = instance.client_id
+
+
+@receiver(bulk_post_save, sender=Proposal)
+def update_bulk_stats(sender, instances, created, **kwargs):
+    moved = [] if created else [
+        proposal for proposal in instances
+        if getattr(proposal, '_loaded_client_id', None) not in (None, proposal.client_id)
+    ]
+    stats.record(
+        added=[stats.entry(proposal) for proposal in (instances if created else moved)],
+        removed=[stats.entry(proposal, proposal._loaded_client_id) for proposal in moved],
+    )
+    for proposal in instances:
+        proposal._loaded_client_id = proposal.client_id
+
+
+@receiver(post_delete, sender=Proposal)
+def remove_from_stats(sender, instance, origin=None, **kwargs):
+    # Deleting a client deletes its rollup rows and counters along with its proposals.
+    if isinstance(origin, Client) or getattr(origin, 'model', None) is Client:
+        return
+    stats.record(removed=[stats.entry(instance)])
@@ -0,0 +1,239 @@
+"""
+Per-user proposal statistics, kept as a rollup of (user, client, month) rows,
+and the proposal_count / last_proposal_at counters on each client.
+
+The signals in proposals.signals apply every proposal create, delete and
+client reassignment to both as it happens, so reading a user's stats costs
+one query over their rollup rows however many proposals they have.
+Additions are atomic increments (an upsert for the rollup, F() for clients);
+removals decrement and recompute the latest proposal time of just the
+buckets and clients involved.
+
+Writes that skip the signals (queryset update(), raw SQL) leave the rollup
+stale until `manage.py rebuild_proposal_stats` and
+`manage.py repair_client_counters`. Months are calendar months in the default
+time zone.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, Count, DateField, DateTimeField, F, Max, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest, TruncMonth
+from django.utils import timezone
+
+from .models import Client, Proposal, ProposalStat
+
+BATCH_SIZE = 100
+
+
+def month_of(value):
+    if settings.USE_TZ and timezone.is_aware(value):
+        value = timezone.localtime(value, timezone.get_default_timezone())
+    return value.date().replace(day=1)
+
+
+def truncated_month(lookup='created_at'):
+    tzinfo = timezone.get_default_timezone() if settings.USE_TZ else None
+    return TruncMonth(lookup, output_field=DateField(), tzinfo=tzinfo)
+
+
+def entry(proposal, client_id=None):
+    """
+    The (user id, client id, created_at) of `proposal`, optionally as if it
+    belonged to `client_id`.
+    """
+    return proposal.created_by_id, client_id or proposal.client_id, proposal.created_at
+
+
+def record(added=(), removed=()):
+    """
+    Apply proposals entering (`added`) and leaving (`removed`) the rollup
+    and client counters, each given as entry() tuples. Proposals without an
+    owner count towards their client but not in the rollup.
+    """
+    added, removed = list(added), list(removed)
+    _count_clients(added, removed)
+    additions = defaultdict(lambda: [0, None])
+    for user_id, client_id, created_at in added:
+        if user_id is not None:
+            bucket = additions[user_id, client_id, month_of(created_at)]
+            bucket[0] += 1
+            bucket[1] = created_at if bucket[1] is None else max(bucket[1], created_at)
+    removals = defaultdict(int)
+    for user_id, client_id, created_at in removed:
+        if user_id is not None:
+            removals[user_id, client_id, month_of(created_at)] += 1
+    if additions:
+        _add(additions)
+    if removals:
+        _remove(removals)
+
+
+def _per_client(values, **kwargs):
+    return Case(*[When(pk=pk, then=Value(value)) for pk, value in values.items()], **kwargs)
+
+
+def latest_proposal():
+    """
+    The created_at of the newest proposal of the client in OuterRef('pk').
+    """
+    return Subquery(
+        Proposal.objects.filter(client=OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
+    )
+
+
+def _count_clients(added, removed):
+    gained, latest = defaultdict(int), {}
+    for _, client_id, created_at in added:
+        gained[client_id] += 1
+        latest[client_id] = max(latest.get(client_id, created_at), created_at)
+    lost = defaultdict(int)
+    for _, client_id, _ in removed:
+        lost[client_id] += 1
+    if gained:
+        newest = _per_client(latest, output_field=DateTimeField())
+        Client.objects.filter(pk__in=gained).update(
+            proposal_count=F('proposal_count') + _per_client(gained, default=Value(0)),
+            last_proposal_at=Greatest(Coalesce('last_proposal_at', newest), newest),
+        )
+    if lost:
+        Client.objects.filter(pk__in=lost).update(
+            proposal_count=F('proposal_count') - _per_client(lost, default=Value(0)),
+            last_proposal_at=latest_proposal(),
+        )
+
+
+def repair_client_counters(dry_run=False, batch_size=500):
+    """
+    Recompute the counters of every client whose stored values have drifted
+    from its proposals. Returns the ids of those clients.
+    """
+    count = Subquery(
+        Proposal.objects.filter(client=OuterRef('pk')).order_by().values('client')
+        .annotate(n=Count('pk')).values('n')
+    )
+    rows = Client.objects.annotate(
+        actual_count=Coalesce(count, 0), actual_latest=latest_proposal(),
+    ).order_by('pk').values_list('pk', 'proposal_count', 'last_proposal_at', 'actual_count', 'actual_latest')
+    drifted = [pk for pk, *stored, count_, latest in rows.iterator() if stored != [count_, latest]]
+    if not dry_run:
+        for start in range(0, len(drifted), batch_size):
+            Client.objects.filter(pk__in=drifted[start:start + batch_size]).update(
+                proposal_count=Coalesce(count, 0), last_proposal_at=latest_proposal(),
+            )
+    return drifted
+
+
+def _add(buckets):
+    if not connection.features.supports_update_conflicts_with_target:
+        for (user_id, client_id, month), (count, latest) in buckets.items():
+            updated = ProposalStat.objects.filter(user_id=user_id, client_id=client_id, month=month).update(
+                proposal_count=F('proposal_count') + count,
+                last_proposal_at=Greatest('last_proposal_at', Value(latest)),
+            )
+            if not updated:
+                ProposalStat.objects.create(
+                    user_id=user_id, client_id=client_id, month=month, proposal_count=count, last_proposal_at=latest,
+                )
+        return
+    # One INSERT ... ON CONFLICT DO UPDATE per batch, so concurrent writers
+    # add to a bucket rather than overwrite it.
+    meta = ProposalStat._meta
+    fields = [meta.get_field(name) for name in ('user', 'client', 'month', 'proposal_count', 'last_proposal_at')]
+    table = connection.ops.quote_name(meta.db_table)
+    user, client, month, count, latest = (connection.ops.quote_name(field.column) for field in fields)
+    greatest = 'MAX' if connection.vendor == 'sqlite' else 'GREATEST'
+    rows = [(*key, count_, latest_) for key, (count_, latest_) in buckets.items()]
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), BATCH_SIZE):
+            batch = rows[start:start + BATCH_SIZE]
+            values = ', '.join(['(%s, %s, %s, %s, %s)'] * len(batch))
+            params = [
+                field.get_db_prep_save(value, connection)
+                for row in batch for field, value in zip(fields, row)
+            ]
+            cursor.execute(
+                f'INSERT INTO {table} ({user}, {client}, {month}, {count}, {latest}) VALUES {values} '
+                f'ON CONFLICT ({user}, {client}, {month}) DO UPDATE SET '
+                f'{count} = {table}.{count} + excluded.{count}, '
+                f'{latest} = {greatest}({table}.{latest}, excluded.{latest})',
+                params,
+            )
+
+
+def _remove(buckets):
+    # Filter on the cross product of the keys: recomputing an untouched
+    # bucket's latest time is harmless, and the query stays small.
+    stats = ProposalStat.objects.filter(
+        user_id__in={key[0] for key in buckets},
+        client_id__in={key[1] for key in buckets},
+        month__in={key[2] for key in buckets},
+    )
+    latest = (
+        Proposal.objects
+        .filter(created_by=OuterRef('user_id'), client=OuterRef('client_id'))
+        .annotate(stat_month=truncated_month())
+        .filter(stat_month=OuterRef('month'))
+        .order_by('-created_at')
+        .values('created_at')[:1]
+    )
+    stats.update(
+        proposal_count=F('proposal_count') - Case(
+            *[
+                When(user_id=user_id, client_id=client_id, month=month, then=Value(count))
+                for (user_id, client_id, month), count in buckets.items()
+            ],
+            default=Value(0),
+        ),
+        # Emptied buckets keep their old value until they are deleted below.
+        last_proposal_at=Coalesce(Subquery(latest), 'last_proposal_at'),
+    )
+    stats.filter(proposal_count__lte=0).delete()
+
+
+def rebuild():
+    """
+    Recompute the whole rollup from the proposals table. Returns the number
+    of rollup rows.
+    """
+    rows = (
+        Proposal.objects.filter(created_by__isnull=False)
+        .annotate(stat_month=truncated_month())
+        .order_by()
+        .values('created_by_id', 'client_id', 'stat_month')
+        .annotate(proposal_count=Count('pk'), last_proposal_at=Max('created_at'))
+    )
+    ProposalStat.objects.all().delete()
+    created = ProposalStat.objects.bulk_create([
+        ProposalStat(
+            user_id=row['created_by_id'], client_id=row['client_id'], month=row['stat_month'],
+            proposal_count=row['proposal_count'], last_proposal_at=row['last_proposal_at'],
+        )
+        for row in rows.iterator()
+    ], batch_size=1000)
+    return len(created)
+
+
+def summarize(user_id, recent=5):
+    """
+    The dashboard figures for one user, read from their rollup rows only.
+    """
+    rows = ProposalStat.objects.filter(user_id=user_id).values_list(
+        'client_id', 'client__company_name', 'month', 'proposal_count', 'last_proposal_at',
+    )
+    clients = {}
+    months = defaultdict(int)
+    for client_id, company_name, month, count, latest in rows:
+        client = clients.setdefault(client_id, {
+            'client': client_id, 'company_name': company_name, 'proposal_count': 0, 'last_proposal_at': latest,
+        })
+        client['proposal_count'] += count
+        client['last_proposal_at'] = max(client['last_proposal_at'], latest)
+        months[month] += count
+    return {
+        'total': sum(months.values()),
+        'by_client': sorted(clients.values(), key=lambda c: (-c['proposal_count'], c['company_name'], c['client'])),
+        'by_month': [{'month': f'{month:%Y-%m}', 'proposal_count': count} for month, count in sorted(months.items())],
+        'recent_clients': sorted(clients.values(), key=lambda c: c['last_proposal_at'], reverse=True)[:recent],
+    }
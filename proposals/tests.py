@@ -1,14 +1,48 @@
+import csv
+import importlib
+import io
+import json
 import pytest
+import threading
+from unittest import mock
+from datetime import date, timedelta
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import QuerySet
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.tokens import RefreshToken
-from proposals.models import Client, Proposal
+from proposals import cache as proposals_cache, documents, stats
+from proposals.checks import check_list_cache
+from proposals.search import get_search_backend
+from proposals.fields import MARKER
+from proposals.management.commands.import_clients import fingerprint
+from proposals.models import Client, ImportCheckpoint, Proposal, ProposalStat
 from proposals.serializers import ClientSerializer, ProposalSerializer
+from proposals.views import (
+    ClientBulkView, ClientListCreateView, ClientDetailView, ProposalBulkView, ProposalContentView,
+    ProposalListCreateView, ProposalDetailView, ProposalRevisionDetailView, ProposalStatsView,
+)
 
 User = get_user_model()
 
+@pytest.fixture(autouse=True)
+def clear_cache(settings):
+    """
+    Start every test with an empty cache, used for list caching.
+    """
+    settings.LIST_CACHE_ALIAS = 'default'
+    cache.clear()
+    yield
+    cache.clear()
+
 @pytest.fixture
 def user():
     """
@@ -114,7 +148,7 @@ class TestClientAPI:
         response = self.client.post(url, data, format='json')
         assert response.status_code == status.HTTP_201_CREATED
         assert response.data['company_name'] == "Acme Corp"
-        assert response.data['added_by']['id'] == user.id
+        assert response.data['added_by'] == user.id
 
     def test_create_client_unauthenticated(self):
         url = reverse('proposals:client-list-create')
@@ -131,8 +165,8 @@ class TestClientAPI:
         url = reverse('proposals:client-list-create')
         response = self.client.get(url)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 1
-        assert response.data[0]['company_name'] == "Test Client"
+        assert len(response.data['results']) == 1
+        assert response.data['results'][0]['company_name'] == "Test Client"
 
     def test_list_clients_other_user(self, user, other_user, client_instance):
         refresh = RefreshToken.for_user(other_user)
@@ -140,7 +174,7 @@ class TestClientAPI:
         url = reverse('proposals:client-list-create')
         response = self.client.get(url)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 0  # Other user sees no clients
+        assert len(response.data['results']) == 0  # Other user sees no clients
 
     def test_retrieve_client(self, user, client_instance):
         refresh = RefreshToken.for_user(user)
@@ -194,8 +228,8 @@ class TestProposalAPI:
         response = self.client.post(url, data, format='json')
         assert response.status_code == status.HTTP_201_CREATED
         assert response.data['title'] == "Website Redesign"
-        assert response.data['created_by']['id'] == user.id
-        assert response.data['client']['id'] == client_instance.id
+        assert response.data['created_by'] == user.id
+        assert response.data['client'] == client_instance.id
 
     def test_create_proposal_unauthenticated(self):
         url = reverse('proposals:proposal-list-create')
@@ -220,6 +254,25 @@ class TestProposalAPI:
         assert response.status_code == status.HTTP_400_BAD_REQUEST
         assert "client_id" in response.data
 
+    def test_other_users_client_is_rejected(self, user, other_user, client_instance):
+        foreign = Client.objects.create(company_name="Not mine", email="x@example.com", added_by=other_user)
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        url = reverse('proposals:proposal-list-create')
+        data = {"client_id": foreign.id, "title": "Website Redesign", "description": "Redesign client website."}
+        response = self.client.post(url, data, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "client_id" in response.data
+        proposal = Proposal.objects.create(client=client_instance, title="Mine", description="x", created_by=user)
+        detail = reverse('proposals:proposal-detail', args=[proposal.id])
+        response = self.client.put(detail, data, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "client_id" in response.data
+        proposal.refresh_from_db()
+        foreign.refresh_from_db()
+        assert proposal.client_id == client_instance.id
+        assert foreign.proposal_count == 0
+
     def test_list_proposals(self, user, client_instance):
         Proposal.objects.create(
             client=client_instance,
@@ -232,8 +285,8 @@ class TestProposalAPI:
         url = reverse('proposals:proposal-list-create')
         response = self.client.get(url)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 1
-        assert response.data[0]['title'] == "Test Proposal"
+        assert len(response.data['results']) == 1
+        assert response.data['results'][0]['title'] == "Test Proposal"
 
     def test_list_proposals_other_user(self, user, other_user, client_instance):
         Proposal.objects.create(
@@ -247,7 +300,7 @@ class TestProposalAPI:
         url = reverse('proposals:proposal-list-create')
         response = self.client.get(url)
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 0  # Other user sees no proposals
+        assert len(response.data['results']) == 0  # Other user sees no proposals
 
     def test_retrieve_proposal(self, user, client_instance):
         proposal = Proposal.objects.create(
@@ -307,4 +360,1320 @@ class TestProposalAPI:
         url = reverse('proposals:proposal-detail', kwargs={'pk': proposal.id})
         response = self.client.delete(url)
         assert response.status_code == status.HTTP_204_NO_CONTENT
-        assert Proposal.objects.count() == 0
\ No newline at end of file
+        assert Proposal.objects.count() == 0
+@pytest.mark.django_db
+class TestPagination:
+    def setup_method(self):
+        self.client = APIClient()
+
+    def test_proposal_pages_follow_created_at(self, user, client_instance):
+        for i in range(5):
+            Proposal.objects.create(
+                client=client_instance,
+                title=f"Proposal {i}",
+                description="Test description",
+                created_by=user
+            )
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        url = reverse('proposals:proposal-list-create')
+        titles = []
+        response = self.client.get(url, {'page_size': 2})
+        while True:
+            assert response.status_code == status.HTTP_200_OK
+            assert len(response.data['results']) <= 2
+            titles += [row['title'] for row in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        assert titles == [f"Proposal {i}" for i in reversed(range(5))]
+
+    def test_client_pages_follow_company_name(self, user):
+        for name in ["Charlie", "Alpha", "Bravo"]:
+            Client.objects.create(company_name=name, email="c@example.com", added_by=user)
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        url = reverse('proposals:client-list-create')
+        response = self.client.get(url, {'page_size': 2})
+        assert [row['company_name'] for row in response.data['results']] == ["Alpha", "Bravo"]
+        response = self.client.get(response.data['next'])
+        assert [row['company_name'] for row in response.data['results']] == ["Charlie"]
+        assert response.data['next'] is None
+
+    def test_optional_count(self, user, client_instance):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        url = reverse('proposals:client-list-create')
+        response = self.client.get(url)
+        assert 'count' not in response.data
+        response = self.client.get(url, {'count': 'true'})
+        assert response.data['count'] == 1
+        assert response.data['count_is_exact'] is True
+
+@pytest.mark.django_db
+class TestQueryBudget:
+    """
+    Each endpoint must stay within its declared query_budget regardless of row
+    count. Writes run their on_commit callbacks inside the count, as they do
+    after a real request's transaction commits.
+    """
+    def setup_method(self):
+        self.client = APIClient()
+
+    @pytest.fixture(params=[1, 25], ids=['1-row', '25-rows'])
+    def rows(self, request, user):
+        clients = [
+            Client.objects.create(company_name=f"Client {i}", email="c@example.com", added_by=user)
+            for i in range(request.param)
+        ]
+        proposals = [
+            Proposal.objects.create(client=c, title="Proposal", description="Text", created_by=user)
+            for c in clients
+        ]
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        return clients, proposals
+
+    @pytest.fixture
+    def request_within_budget(self, django_assert_max_num_queries, django_capture_on_commit_callbacks):
+        def request(view, method, url, data=None):
+            with django_assert_max_num_queries(view.query_budget[method]):
+                with django_capture_on_commit_callbacks(execute=True):
+                    response = getattr(self.client, method.lower())(url, data, format='json')
+            assert response.status_code < 400
+            return response
+        return request
+
+    def test_client_endpoints(self, rows, request_within_budget):
+        clients, _ = rows
+        list_url = reverse('proposals:client-list-create')
+        detail_url = reverse('proposals:client-detail', kwargs={'pk': clients[0].id})
+        payload = {"company_name": "Acme Corp", "email": "contact@acme.com"}
+        request_within_budget(ClientListCreateView, 'GET', list_url)
+        request_within_budget(ClientListCreateView, 'POST', list_url, payload)
+        request_within_budget(ClientDetailView, 'GET', detail_url)
+        request_within_budget(ClientDetailView, 'PUT', detail_url, payload)
+        request_within_budget(ClientDetailView, 'PATCH', detail_url, payload)
+        request_within_budget(ClientDetailView, 'DELETE', detail_url)
+
+    def test_proposal_endpoints(self, rows, request_within_budget):
+        clients, proposals = rows
+        list_url = reverse('proposals:proposal-list-create')
+        detail_url = reverse('proposals:proposal-detail', kwargs={'pk': proposals[0].id})
+        payload = {"client_id": clients[-1].id, "title": "Updated", "description": "Text"}
+        request_within_budget(ProposalListCreateView, 'GET', list_url)
+        request_within_budget(ProposalListCreateView, 'POST', list_url, payload)
+        request_within_budget(ProposalDetailView, 'GET', detail_url)
+        request_within_budget(ProposalDetailView, 'PUT', detail_url, payload)
+        request_within_budget(ProposalDetailView, 'PATCH', detail_url, {"title": "Patched"})
+        request_within_budget(ProposalDetailView, 'DELETE', detail_url)
+
+@pytest.mark.django_db
+class TestSparseFields:
+    def setup_method(self):
+        self.client = APIClient()
+
+    @pytest.fixture
+    def proposal(self, user, client_instance):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        return Proposal.objects.create(
+            client=client_instance,
+            title="Test Proposal",
+            description="Test description",
+            created_by=user
+        )
+
+    def test_relations_default_to_ids(self, user, client_instance, proposal):
+        url = reverse('proposals:proposal-detail', kwargs={'pk': proposal.id})
+        response = self.client.get(url)
+        assert response.data['client'] == client_instance.id
+        assert response.data['created_by'] == user.id
+
+    def test_fields_limit_output(self, proposal, django_assert_num_queries):
+        url = reverse('proposals:proposal-list-create')
+        with django_assert_num_queries(2) as captured:
+            response = self.client.get(url, {'fields': 'id,title,updated_at'})
+        assert set(response.data['results'][0]) == {'id', 'title', 'updated_at'}
+        assert '"description"' not in captured.captured_queries[-1]['sql']
+
+    def test_expand_nested(self, user, client_instance, proposal, django_assert_num_queries):
+        url = reverse('proposals:proposal-list-create')
+        with django_assert_num_queries(2):
+            response = self.client.get(url, {'expand': 'client.added_by,created_by'})
+        row = response.data['results'][0]
+        assert row['client']['company_name'] == "Test Client"
+        assert row['client']['added_by']['id'] == user.id
+        assert row['created_by']['email'] == user.email
+
+    def test_fields_with_expand(self, client_instance, proposal):
+        url = reverse('proposals:proposal-detail', kwargs={'pk': proposal.id})
+        response = self.client.get(url, {'fields': 'id,client', 'expand': 'client'})
+        assert set(response.data) == {'id', 'client'}
+        assert response.data['client']['added_by'] == client_instance.added_by_id
+
+@pytest.mark.django_db
+class TestSearchAPI:
+    def setup_method(self):
+        self.client = APIClient()
+
+    def search(self, user, **params):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        response = self.client.get(reverse('proposals:search'), params)
+        assert response.status_code == status.HTTP_200_OK
+        return response.data
+
+    def test_search_ranks_title_matches_first(self, user, client_instance):
+        body_match = Proposal.objects.create(
+            client=client_instance, title="Branding", description="Includes a website audit", created_by=user
+        )
+        title_match = Proposal.objects.create(
+            client=client_instance, title="Website Redesign", description="Full rebuild", created_by=user
+        )
+        data = self.search(user, q="website", type="proposal")
+        assert [hit['id'] for hit in data['results']] == [title_match.id, body_match.id]
+
+    def test_search_matches_prefix_and_client_name(self, user, client_instance):
+        proposal = Proposal.objects.create(
+            client=client_instance, title="Audit", description="Yearly audit", created_by=user
+        )
+        data = self.search(user, q="test cli")
+        assert {(hit['type'], hit['id']) for hit in data['results']} == {
+            ('client', client_instance.id), ('proposal', proposal.id)
+        }
+
+    def test_search_is_scoped_to_user(self, user, other_user, client_instance):
+        Proposal.objects.create(client=client_instance, title="Secret plan", description="x", created_by=user)
+        assert self.search(other_user, q="secret")['results'] == []
+        assert self.search(other_user, q=f"owner u{user.id} secret")['results'] == []
+
+    def test_index_follows_updates_and_deletes(self, user, client_instance):
+        proposal = Proposal.objects.create(
+            client=client_instance, title="Old title", description="x", created_by=user
+        )
+        proposal.title = "Fresh title"
+        proposal.save()
+        assert self.search(user, q="old")['results'] == []
+        assert self.search(user, q="fresh")['results'][0]['id'] == proposal.id
+        client_instance.company_name = "Renamed Corp"
+        client_instance.save()
+        assert {hit['type'] for hit in self.search(user, q="renamed")['results']} == {'client', 'proposal'}
+        proposal.delete()
+        assert self.search(user, q="fresh")['results'] == []
+
+    def test_search_paginates(self, user, client_instance):
+        for i in range(3):
+            Proposal.objects.create(client=client_instance, title=f"Plan {i}", description="x", created_by=user)
+        data = self.search(user, q="plan", limit=2)
+        assert len(data['results']) == 2
+        assert data['next'] is not None
+        data = self.client.get(data['next']).data
+        assert len(data['results']) == 1
+        assert data['next'] is None
+
+    def test_admin_search_returns_every_match(self, client, user, client_instance):
+        clients = Client.objects.bulk_create([
+            Client(company_name=f"Bulk Corp {i}", email=f"bulk{i}@example.com", added_by=user) for i in range(1100)
+        ])
+        get_search_backend().index_clients(clients, created=True)
+        client.force_login(User.objects.create_superuser(name="Admin", email="admin@example.com", password="x"))
+        response = client.get(reverse('admin:proposals_client_changelist'), {'q': 'bulk corp'})
+        assert response.status_code == 200
+        assert response.context_data['cl'].result_count == 1100
+
+@pytest.mark.django_db
+class TestBulkAPI:
+    def setup_method(self):
+        self.client = APIClient()
+
+    def authenticate(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+
+    def test_bulk_create_clients(self, user, django_assert_max_num_queries, django_capture_on_commit_callbacks):
+        self.authenticate(user)
+        url = reverse('proposals:client-bulk')
+        data = [{"company_name": f"Client {i}", "email": f"c{i}@example.com"} for i in range(50)]
+        with django_assert_max_num_queries(ClientBulkView.query_budget['POST']):
+            with django_capture_on_commit_callbacks(execute=True):
+                response = self.client.post(url, data, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert len(response.data) == 50
+        assert Client.objects.filter(added_by=user).count() == 50
+        assert all(row['id'] and row['added_by'] == user.id for row in response.data)
+
+    def test_bulk_create_reports_errors_per_item(self, user):
+        self.authenticate(user)
+        url = reverse('proposals:client-bulk')
+        data = [
+            {"company_name": "Good", "email": "good@example.com"},
+            {"company_name": "No contact"},
+            {"email": "nameless@example.com"},
+        ]
+        response = self.client.post(url, data, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data[0] == {}
+        assert "Either phone_number or email must be provided." in str(response.data[1])
+        assert "company_name" in response.data[2]
+        assert Client.objects.count() == 0
+
+    def test_bulk_create_proposals(
+        self, user, other_user, client_instance, django_assert_max_num_queries, django_capture_on_commit_callbacks,
+    ):
+        foreign = Client.objects.create(company_name="Foreign", email="f@example.com", added_by=other_user)
+        self.authenticate(user)
+        url = reverse('proposals:proposal-bulk')
+        data = [
+            {"client_id": client_instance.id, "title": f"Proposal {i}", "description": "Text"}
+            for i in range(20)
+        ]
+        with django_assert_max_num_queries(ProposalBulkView.query_budget['POST']):
+            with django_capture_on_commit_callbacks(execute=True):
+                response = self.client.post(url, data, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Proposal.objects.filter(created_by=user, client=client_instance).count() == 20
+
+        data = [
+            {"client_id": client_instance.id, "title": "Fine", "description": "Text"},
+            {"client_id": foreign.id, "title": "Not mine", "description": "Text"},
+        ]
+        response = self.client.post(url, data, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data[0] == {}
+        assert "client_id" in response.data[1]
+        assert Proposal.objects.count() == 20
+
+    def test_bulk_update_proposals(
+        self, user, client_instance, django_assert_max_num_queries, django_capture_on_commit_callbacks,
+    ):
+        other_client = Client.objects.create(company_name="Other", email="o@example.com", added_by=user)
+        proposals = [
+            Proposal.objects.create(client=client_instance, title=f"P{i}", description="Text", created_by=user)
+            for i in range(5)
+        ]
+        self.authenticate(user)
+        url = reverse('proposals:proposal-bulk')
+        data = [{"id": p.id, "title": f"Updated {p.id}", "client_id": other_client.id} for p in proposals]
+        with django_assert_max_num_queries(ProposalBulkView.query_budget['PATCH']):
+            with django_capture_on_commit_callbacks(execute=True):
+                response = self.client.patch(url, data, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        for proposal in proposals:
+            proposal.refresh_from_db()
+            assert proposal.title == f"Updated {proposal.id}"
+            assert proposal.client_id == other_client.id
+            assert proposal.description == "Text"
+        search = self.client.get(reverse('proposals:search'), {'q': 'updated', 'type': 'proposal'})
+        assert len(search.data['results']) == 5
+
+    def test_bulk_update_clients(
+        self, user, client_instance, django_assert_max_num_queries, django_capture_on_commit_callbacks,
+    ):
+        second = Client.objects.create(company_name="Second", phone_number="+12025550199", added_by=user)
+        self.authenticate(user)
+        url = reverse('proposals:client-bulk')
+        data = [
+            {"id": client_instance.id, "company_name": "Renamed"},
+            {"id": second.id, "address": "1 Main St"},
+        ]
+        with django_assert_max_num_queries(ClientBulkView.query_budget['PATCH']):
+            with django_capture_on_commit_callbacks(execute=True):
+                response = self.client.patch(url, data, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        client_instance.refresh_from_db()
+        second.refresh_from_db()
+        assert client_instance.company_name == "Renamed"
+        assert client_instance.email == "client@example.com"
+        assert second.address == "1 Main St"
+
+    def test_bulk_update_rejects_unknown_ids(self, user, other_user, client_instance):
+        proposal = Proposal.objects.create(client=client_instance, title="Mine", description="x", created_by=user)
+        self.authenticate(other_user)
+        url = reverse('proposals:proposal-bulk')
+        response = self.client.patch(url, [{"id": proposal.id, "title": "Hijacked"}], format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "id" in response.data[0]
+        proposal.refresh_from_db()
+        assert proposal.title == "Mine"
+
+    def test_bulk_update_rejects_duplicate_ids(self, user, client_instance):
+        proposal = Proposal.objects.create(client=client_instance, title="Mine", description="x", created_by=user)
+        revisions = proposal.revisions.count()
+        self.authenticate(user)
+        url = reverse('proposals:proposal-bulk')
+        data = [{"id": proposal.id, "title": "First"}, {"id": proposal.id, "title": "Second"}]
+        response = self.client.patch(url, data, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data[0] == {}
+        assert response.data[1] == {'id': ['Duplicate id in request.']}
+        proposal.refresh_from_db()
+        assert proposal.title == "Mine"
+        assert proposal.revisions.count() == revisions
+
+@pytest.mark.django_db
+class TestExportAPI:
+    def setup_method(self):
+        self.client = APIClient()
+
+    @pytest.fixture
+    def proposals(self, user, other_user, client_instance):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        Proposal.objects.create(client=client_instance, title="Someone else's", description="x", created_by=other_user)
+        return [
+            Proposal.objects.create(
+                client=client_instance, title=f"Proposal {i}", description="Line one\nLine, two", created_by=user
+            )
+            for i in range(3)
+        ]
+
+    def test_export_csv(self, proposals):
+        response = self.client.get(reverse('proposals:proposal-export'), {'format': 'csv'})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert response['Content-Type'].startswith('text/csv')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        assert rows[0] == ['id', 'title', 'description', 'client_id', 'client_company_name', 'created_at', 'updated_at']
+        assert [row[1] for row in rows[1:]] == ["Proposal 0", "Proposal 1", "Proposal 2"]
+        assert rows[1][2] == "Line one\nLine, two"
+        assert rows[1][4] == "Test Client"
+
+    def test_export_ndjson(self, proposals):
+        response = self.client.get(reverse('proposals:proposal-export'), {'format': 'ndjson'})
+        assert response.status_code == status.HTTP_200_OK
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        assert [record['id'] for record in records] == [p.id for p in proposals]
+        assert records[0]['created_at'] == proposals[0].created_at.isoformat()
+
+    def test_export_requires_authentication(self):
+        response = self.client.get(reverse('proposals:proposal-export'), {'format': 'csv'})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+@pytest.mark.django_db
+class TestImportClientsCommand:
+    @pytest.fixture
+    def source(self, tmp_path):
+        path = tmp_path / "clients.csv"
+        lines = ["company_name,address,phone_number,email"]
+        for i in range(7):
+            lines.append(f"Company {i},,,c{i}@example.com")
+        lines.insert(3, "No Contact,Somewhere,,")
+        path.write_text("\n".join(lines) + "\n")
+        return path
+
+    def test_import(self, user, source, tmp_path):
+        rejects = tmp_path / "rejects.csv"
+        out = io.StringIO()
+        call_command('import_clients', str(source), owner=user.email, batch_size=3, rejects=str(rejects), stdout=out)
+        assert Client.objects.filter(added_by=user).count() == 7
+        assert "Imported 7 clients, rejected 1 rows" in out.getvalue()
+        rows = list(csv.reader(rejects.open()))
+        assert rows[1][:2] == ["4", "No Contact"]
+        assert "Either phone_number or email must be provided." in rows[1][-1]
+        assert not ImportCheckpoint.objects.exists()
+
+    def test_resume_skips_committed_rows(self, user, source):
+        ImportCheckpoint.objects.create(source=str(source), owner=user, fingerprint=fingerprint(source), rows=6)
+        call_command('import_clients', str(source), owner=user.email, resume=True, stdout=io.StringIO())
+        assert sorted(Client.objects.values_list('company_name', flat=True)) == ["Company 5", "Company 6"]
+        assert not ImportCheckpoint.objects.exists()
+
+    def test_checkpoint_commits_with_its_batch(self, user, source):
+        save = ImportCheckpoint.objects.update_or_create
+        calls = []
+
+        def crash_on_second_batch(*args, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 2:
+                raise RuntimeError("killed")
+            return save(*args, **kwargs)
+        with mock.patch.object(ImportCheckpoint.objects, 'update_or_create', side_effect=crash_on_second_batch):
+            with pytest.raises(RuntimeError):
+                call_command('import_clients', str(source), owner=user.email, batch_size=3, stdout=io.StringIO())
+        assert Client.objects.count() == 2
+        assert ImportCheckpoint.objects.get().rows == 3
+        call_command('import_clients', str(source), owner=user.email, batch_size=3, resume=True, stdout=io.StringIO())
+        assert sorted(Client.objects.values_list('company_name', flat=True)) == [f"Company {i}" for i in range(7)]
+
+    def test_resume_refuses_a_changed_file(self, user, source):
+        ImportCheckpoint.objects.create(source=str(source), owner=user, fingerprint="0:0", rows=6)
+        with pytest.raises(CommandError, match="changed"):
+            call_command('import_clients', str(source), owner=user.email, resume=True, stdout=io.StringIO())
+        assert not Client.objects.exists()
+
+    def test_parallel_validation(self, user, source):
+        call_command('import_clients', str(source), owner=user.email, batch_size=2, workers=2, stdout=io.StringIO())
+        assert Client.objects.filter(added_by=user).count() == 7
+
+    def test_unknown_owner(self, source):
+        with pytest.raises(CommandError):
+            call_command('import_clients', str(source), owner="nobody@example.com")
+
+@pytest.mark.django_db
+class TestConditionalRequests:
+    def setup_method(self):
+        self.client = APIClient()
+
+    @pytest.fixture
+    def proposal(self, user, client_instance):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        return Proposal.objects.create(
+            client=client_instance, title="Test Proposal", description="Test description", created_by=user
+        )
+
+    def test_if_none_match_returns_304(self, proposal, django_assert_num_queries):
+        url = reverse('proposals:proposal-detail', kwargs={'pk': proposal.id})
+        response = self.client.get(url)
+        etag = response['ETag']
+        assert response['Last-Modified']
+        with django_assert_num_queries(1) as captured:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+        assert '"description"' not in captured.captured_queries[-1]['sql']
+
+        proposal.title = "Changed"
+        proposal.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+    def test_if_modified_since(self, proposal):
+        url = reverse('proposals:client-detail', kwargs={'pk': proposal.client_id})
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_expanded_relation_changes_etag(self, proposal, client_instance):
+        url = reverse('proposals:proposal-detail', kwargs={'pk': proposal.id})
+        etag = self.client.get(url, {'expand': 'client'})['ETag']
+        assert self.client.get(url)['ETag'] != etag
+        assert self.client.get(url, {'expand': 'client'}, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        client_instance.company_name = "Renamed"
+        client_instance.save()
+        assert self.client.get(url, {'expand': 'client'}, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_if_match_guards_updates(self, proposal, client_instance):
+        url = reverse('proposals:proposal-detail', kwargs={'pk': proposal.id})
+        etag = self.client.get(url)['ETag']
+        response = self.client.patch(url, {"title": "First"}, format='json', HTTP_IF_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        new_etag = response['ETag']
+        assert new_etag != etag
+        assert self.client.get(url)['ETag'] == new_etag
+
+        response = self.client.patch(url, {"title": "Second"}, format='json', HTTP_IF_MATCH=etag)
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+        proposal.refresh_from_db()
+        assert proposal.title == "First"
+
+    def test_conditional_request_for_other_users_object(self, proposal, other_user):
+        url = reverse('proposals:proposal-detail', kwargs={'pk': proposal.id})
+        etag = self.client.get(url)['ETag']
+        refresh = RefreshToken.for_user(other_user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        assert self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_404_NOT_FOUND
+
+@pytest.mark.django_db
+class TestListCache:
+    def setup_method(self):
+        self.client = APIClient()
+
+    def authenticate(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+
+    def test_hit_after_miss(self, user, client_instance, django_assert_num_queries):
+        self.authenticate(user)
+        url = reverse('proposals:client-list-create')
+        first = self.client.get(url)
+        assert first['X-Cache'] == 'MISS'
+        with django_assert_num_queries(0):
+            second = self.client.get(url)
+        assert second['X-Cache'] == 'HIT'
+        assert second.data == first.data
+        assert self.client.get(url, {'fields': 'id'})['X-Cache'] == 'MISS'
+
+    def test_write_invalidates(self, user, client_instance):
+        self.authenticate(user)
+        url = reverse('proposals:proposal-list-create')
+        assert self.client.get(url).data['results'] == []
+        self.client.post(url, {"client_id": client_instance.id, "title": "New", "description": "x"}, format='json')
+        response = self.client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert [row['title'] for row in response.data['results']] == ["New"]
+
+    def test_client_change_invalidates_expanded_proposals(self, user, client_instance):
+        Proposal.objects.create(client=client_instance, title="P", description="x", created_by=user)
+        self.authenticate(user)
+        url = reverse('proposals:proposal-list-create')
+        self.client.get(url, {'expand': 'client'})
+        client_instance.company_name = "Renamed"
+        client_instance.save()
+        response = self.client.get(url, {'expand': 'client'})
+        assert response.data['results'][0]['client']['company_name'] == "Renamed"
+
+    def test_users_do_not_share_pages(self, user, other_user, client_instance):
+        url = reverse('proposals:client-list-create')
+        self.authenticate(user)
+        self.client.get(url)
+        self.authenticate(other_user)
+        response = self.client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['results'] == []
+
+    def test_stats_are_staff_only(self, user, client_instance):
+        self.authenticate(user)
+        url = reverse('proposals:client-list-create')
+        self.client.get(url)
+        self.client.get(url)
+        assert self.client.get(reverse('proposals:cache-stats')).status_code == status.HTTP_403_FORBIDDEN
+        user.is_staff = True
+        user.save()
+        response = self.client.get(reverse('proposals:cache-stats'))
+        assert {key: response.data[key] for key in ('hits', 'misses', 'hit_rate')} == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+        assert set(response.data['phone_numbers']) == {'hits', 'misses', 'size', 'max_size', 'hit_rate'}
+
+    def test_off_without_alias(self, settings, user, client_instance):
+        del settings.LIST_CACHE_ALIAS
+        cache.clear()
+        self.authenticate(user)
+        url = reverse('proposals:client-list-create')
+        self.client.post(url, {"company_name": "Acme", "email": "a@example.com"}, format='json')
+        self.client.get(url)
+        response = self.client.get(url)
+        assert 'X-Cache' not in response
+        assert len(response.data['results']) == 2
+        assert cache.get(proposals_cache.generation_key(user.pk, proposals_cache.CLIENTS)) is None
+
+    def test_locmem_alias_warns(self, settings):
+        assert check_list_cache(None) != []
+        assert check_list_cache(None)[0].id == 'proposals.W001'
+        settings.CACHES = {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'shared': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'list_cache'},
+        }
+        settings.LIST_CACHE_ALIAS = 'shared'
+        assert check_list_cache(None) == []
+        del settings.LIST_CACHE_ALIAS
+        assert check_list_cache(None) == []
+
+@pytest.mark.django_db
+class TestRowSerialization:
+    """
+    The list fast path must render exactly what the serializers render.
+    """
+    def setup_method(self):
+        self.client = APIClient()
+
+    @pytest.fixture
+    def rows(self, user, client_instance):
+        user.phone_number = "+12025550199"
+        user.save()
+        bare = Client.objects.create(company_name="No Email", phone_number="+12025550188", added_by=user)
+        for i, client in enumerate([client_instance, bare] * 3):
+            Proposal.objects.create(client=client, title=f"Proposal {i}", description="Text", created_by=user)
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+
+    def get_both(self, url, params):
+        fast = self.client.get(url, params)
+        cache.clear()
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            slow = self.client.get(url, params)
+        assert fast.status_code == slow.status_code == status.HTTP_200_OK
+        return fast.content, slow.content
+
+    @pytest.mark.parametrize('params', [
+        {},
+        {'fields': 'id,title,created_at'},
+        {'expand': 'client'},
+        {'expand': 'client.added_by,created_by'},
+        {'fields': 'client,updated_at', 'expand': 'client.added_by'},
+        {'page_size': 2, 'count': 'true'},
+    ])
+    def test_proposals_match_serializer(self, rows, params):
+        fast, slow = self.get_both(reverse('proposals:proposal-list-create'), params)
+        assert fast == slow
+
+    @pytest.mark.parametrize('params', [{}, {'expand': 'added_by'}, {'fields': 'company_name,email'}])
+    def test_clients_match_serializer(self, rows, params):
+        fast, slow = self.get_both(reverse('proposals:client-list-create'), params)
+        assert fast == slow
+
+    def test_cursor_follows_rows(self, rows):
+        url = reverse('proposals:proposal-list-create')
+        response = self.client.get(url, {'page_size': 4, 'fields': 'id'})
+        second = self.client.get(response.data['next'])
+        ids = [row['id'] for row in response.data['results'] + second.data['results']]
+        assert ids == list(Proposal.objects.order_by('-created_at', '-pk').values_list('id', flat=True))
+
+    def test_benchmark_command(self):
+        out = io.StringIO()
+        call_command('benchmark_list_serialization', rows=[20], repeat=1, stdout=out)
+        assert "20 rows" in out.getvalue()
+        assert not Proposal.objects.exists()
+
+@pytest.mark.django_db
+class TestProposalRevisions:
+    def setup_method(self):
+        self.client = APIClient()
+
+    @pytest.fixture
+    def proposal(self, user, client_instance):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        response = self.client.post(reverse('proposals:proposal-list-create'), {
+            "client_id": client_instance.id,
+            "title": "Website",
+            "description": "".join(f"Line {i}\n" for i in range(200)),
+        }, format='json')
+        return Proposal.objects.get(pk=response.data['id'])
+
+    def edit(self, proposal, line, text):
+        lines = Proposal.objects.get(pk=proposal.pk).description.splitlines(keepends=True)
+        lines[line] = text
+        url = reverse('proposals:proposal-detail', kwargs={'pk': proposal.id})
+        response = self.client.patch(url, {"description": "".join(lines)}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        return response.data['description']
+
+    def version(self, proposal, number):
+        url = reverse('proposals:proposal-revision', kwargs={'pk': proposal.id, 'number': number})
+        return self.client.get(url)
+
+    def test_every_version_is_rebuilt(self, proposal, django_assert_max_num_queries):
+        contents = [proposal.description]
+        with override_settings(REVISION_SNAPSHOT_INTERVAL=3):
+            for i in range(7):
+                contents.append(self.edit(proposal, i * 10, f"Edited {i}\n"))
+            for number, content in enumerate(contents, start=1):
+                with django_assert_max_num_queries(ProposalRevisionDetailView.query_budget['GET']):
+                    response = self.version(proposal, number)
+                assert response.data['description'] == content
+                assert response.data['title'] == "Website"
+        revisions = proposal.revisions.all()
+        assert [r.number for r in revisions if r.is_snapshot] == [7, 4, 1]
+
+    def test_deltas_are_small(self, proposal):
+        self.edit(proposal, 5, "Changed\n")
+        snapshot, delta = sorted(proposal.revisions.all(), key=lambda r: r.number)
+        assert not delta.is_snapshot
+        assert len(delta.data) < len(snapshot.data) / 5
+
+    def test_list_newest_first(self, proposal):
+        self.edit(proposal, 0, "A\n")
+        url = reverse('proposals:proposal-revisions', kwargs={'pk': proposal.id})
+        response = self.client.get(url)
+        assert [r['number'] for r in response.data['results']] == [2, 1]
+        assert 'description' not in response.data['results'][0]
+
+    def test_unchanged_content_records_nothing(self, proposal, client_instance):
+        url = reverse('proposals:proposal-detail', kwargs={'pk': proposal.id})
+        self.client.patch(url, {"title": "Website"}, format='json')
+        assert proposal.revisions.count() == 1
+
+    def test_untracked_change_falls_back_to_snapshot(self, proposal):
+        Proposal.objects.filter(pk=proposal.pk).update(description="Rewritten elsewhere\n")
+        content = self.edit(proposal, 0, "Rewritten here\n")
+        latest = proposal.revisions.first()
+        assert latest.number == 2 and latest.is_snapshot
+        assert self.version(proposal, 2).data['description'] == content
+
+    def test_bulk_update_records_revisions(self, proposal):
+        url = reverse('proposals:proposal-bulk')
+        response = self.client.patch(url, [{"id": proposal.id, "description": "Short\n"}], format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert self.version(proposal, 2).data["description"] == "Short"
+
+    def test_proposal_is_locked_before_numbering(self, proposal):
+        with mock.patch.object(QuerySet, 'select_for_update', autospec=True,
+                               side_effect=QuerySet.select_for_update) as lock:
+            self.edit(proposal, 0, "Changed\n")
+        locked = lock.call_args.args[0]
+        assert locked.model is Proposal
+        assert list(locked.values_list('pk', flat=True)) == [proposal.pk]
+        assert proposal.revisions.first().number == 2
+
+    def test_other_users_proposal(self, proposal, other_user):
+        refresh = RefreshToken.for_user(other_user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        assert self.version(proposal, 1).status_code == status.HTTP_404_NOT_FOUND
+        url = reverse('proposals:proposal-revisions', kwargs={'pk': proposal.id})
+        assert self.client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_missing_version(self, proposal):
+        assert self.version(proposal, 5).status_code == status.HTTP_404_NOT_FOUND
+
+@pytest.mark.django_db
+class TestProposalContent:
+    def setup_method(self):
+        self.client = APIClient()
+
+    @pytest.fixture
+    def proposal(self, user, client_instance):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        return Proposal.objects.create(
+            client=client_instance, title="Long", description="Übersicht: " + "abcdefghij" * 50, created_by=user
+        )
+
+    def get(self, proposal, **headers):
+        return self.client.get(reverse('proposals:proposal-content', kwargs={'pk': proposal.id}), **headers)
+
+    def test_list_defers_description(self, proposal):
+        url = reverse('proposals:proposal-list-create')
+        response = self.client.get(url)
+        assert 'description' not in response.data['results'][0]
+        response = self.client.get(url, {'fields': 'id,description'})
+        assert response.data['results'][0]['description'] == proposal.description
+
+    def test_full_content(self, proposal):
+        response = self.get(proposal)
+        body = proposal.description.encode()
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Accept-Ranges'] == 'bytes'
+        assert int(response['Content-Length']) == len(body)
+        assert b''.join(response.streaming_content) == body
+
+    def test_ranges(self, proposal):
+        body = proposal.description.encode()
+        response = self.get(proposal, HTTP_RANGE='bytes=0-9')
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response['Content-Range'] == f'bytes 0-9/{len(body)}'
+        assert b''.join(response.streaming_content) == body[:10]
+        response = self.get(proposal, HTTP_RANGE='bytes=-5')
+        assert b''.join(response.streaming_content) == body[-5:]
+        response = self.get(proposal, HTTP_RANGE=f'bytes={len(body)}-')
+        assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        assert response['Content-Range'] == f'bytes */{len(body)}'
+
+    def test_chunked_reads(self, proposal, monkeypatch, django_assert_num_queries):
+        monkeypatch.setattr(ProposalContentView, 'chunk_size', 64)
+        body = proposal.description.encode()
+        response = self.get(proposal, HTTP_RANGE='bytes=1-300')
+        with django_assert_num_queries(5):
+            assert b''.join(response.streaming_content) == body[1:301]
+
+    def test_compressed_at_rest(self, user, client_instance, proposal):
+        with override_settings(TEXT_COMPRESSION_THRESHOLD=100):
+            big = Proposal.objects.create(
+                client=client_instance, title="Big", description=proposal.description, created_by=user
+            )
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT description FROM proposals_proposal WHERE id = %s', [big.id])
+            stored = cursor.fetchone()[0]
+        assert stored.startswith(MARKER) and len(stored) < len(proposal.description)
+        assert Proposal.objects.get(pk=big.pk).description == proposal.description
+        response = self.get(big, HTTP_RANGE='bytes=2-20')
+        assert b''.join(response.streaming_content) == proposal.description.encode()[2:21]
+
+    def test_marker_text_round_trips(self, user, client_instance):
+        text = MARKER + "not compressed"
+        saved = Proposal.objects.create(client=client_instance, title="Odd", description=text, created_by=user)
+        assert Proposal.objects.get(pk=saved.pk).description == text
+
+    def test_admin_changelist_defers_description(self, client, proposal):
+        client.force_login(User.objects.create_superuser(name="Admin", email="admin@example.com", password="x"))
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get(reverse('admin:proposals_proposal_changelist'))
+        assert response.status_code == 200
+        assert not any('"proposals_proposal"."description"' in q['sql'] for q in captured.captured_queries)
+
+@pytest.mark.django_db
+class TestProposalDocument:
+    def setup_method(self):
+        self.client = APIClient()
+
+    @pytest.fixture
+    def proposal(self, user, client_instance):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        return Proposal.objects.create(
+            client=client_instance, title="Website <Redesign>", description="Scope\n\nPhase one", created_by=user
+        )
+
+    def get(self, proposal):
+        return self.client.get(reverse('proposals:proposal-document', kwargs={'pk': proposal.id}))
+
+    def test_render_and_cache(self, user, proposal, django_assert_max_num_queries):
+        response = self.get(proposal)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'text/html; charset=utf-8'
+        assert response['X-Cache'] == 'MISS'
+        html = response.content.decode()
+        assert "Website &lt;Redesign&gt;" in html
+        assert "Test Client" in html and user.name in html
+        assert "<p>Phase one</p>" in html
+        with django_assert_max_num_queries(2):
+            response = self.get(proposal)
+        assert response['X-Cache'] == 'HIT'
+
+    def test_changes_retire_the_render(self, proposal, client_instance):
+        self.get(proposal)
+        client_instance.company_name = "Renamed Client"
+        client_instance.save()
+        response = self.get(proposal)
+        assert response['X-Cache'] == 'MISS'
+        assert "Renamed Client" in response.content.decode()
+
+    def test_prewarm_on_save(self, user, client_instance, monkeypatch, django_capture_on_commit_callbacks):
+        futures = []
+        prewarm = documents.prewarm
+        monkeypatch.setattr(documents, 'prewarm', lambda ids: futures.extend(prewarm(ids)))
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        url = reverse('proposals:proposal-list-create')
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self.client.post(url, {"client_id": client_instance.id, "title": "New", "description": "x"})
+        assert len(futures) == 1
+        futures[0].result(timeout=10)
+        assert self.get(Proposal(pk=response.data['id']))['X-Cache'] == 'HIT'
+
+    def test_busy_pool_returns_503(self, proposal, monkeypatch):
+        def busy(*args, **kwargs):
+            raise documents.RenderBusy
+        monkeypatch.setattr(documents, 'submit', busy)
+        assert self.get(proposal).status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+    def test_slow_render_returns_503(self, proposal, settings, monkeypatch):
+        settings.DOCUMENT_RENDER_TIMEOUT = 0.05
+        release = threading.Event()
+        render = documents.render_to_string
+
+        def slow(*args, **kwargs):
+            release.wait(timeout=10)
+            return render(*args, **kwargs)
+        monkeypatch.setattr(documents, 'render_to_string', slow)
+        try:
+            assert self.get(proposal).status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        finally:
+            futures = list(documents._inflight.values())
+            release.set()
+        for future in futures:
+            future.result(timeout=10)
+        assert self.get(proposal)['X-Cache'] == 'HIT'
+
+    def test_other_users_proposal(self, proposal, other_user):
+        refresh = RefreshToken.for_user(other_user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        assert self.get(proposal).status_code == status.HTTP_404_NOT_FOUND
+
+@pytest.mark.django_db
+class TestAsyncViews:
+    """
+    The native async endpoints must return what their DRF counterparts return.
+    """
+    def setup_method(self):
+        self.client = APIClient()
+        self.async_client = AsyncClient()
+
+    @pytest.fixture
+    def proposals(self, user, client_instance):
+        for i in range(5):
+            Proposal.objects.create(client=client_instance, title=f"Proposal {i}", description="Text", created_by=user)
+        self.token = str(RefreshToken.for_user(user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def get_async(self, url, params=None):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        return async_to_sync(self.async_client.get)(url, params or {}, headers=headers)
+
+    def get_both(self, url_name, async_url_name, params, args=()):
+        expected = self.client.get(reverse(f'proposals:{url_name}', args=args), params)
+        response = self.get_async(reverse(f'proposals:{async_url_name}', args=args), params)
+        assert response.status_code == expected.status_code
+        return response.content.replace(b'/api/async/', b'/api/'), expected.content
+
+    @pytest.mark.parametrize('params', [
+        {}, {'fields': 'id,title,description'}, {'expand': 'client.added_by'}, {'page_size': 2, 'count': 'true'},
+        {'title': 'proposal 3'}, {'ordering': 'updated_at', 'page_size': 2}, {'created_after': 'garbage'},
+    ])
+    def test_proposal_list(self, proposals, params):
+        content, expected = self.get_both('proposal-list-create', 'async-proposal-list', params)
+        assert content == expected
+
+    def test_cursor_follows_rows(self, proposals):
+        response = self.get_async(reverse('proposals:async-proposal-list'), {'page_size': 3, 'fields': 'id'})
+        second = self.get_async(response.json()['next'])
+        ids = [row['id'] for row in response.json()['results'] + second.json()['results']]
+        assert ids == list(Proposal.objects.order_by('-created_at', '-pk').values_list('id', flat=True))
+
+    @pytest.mark.parametrize('params', [{}, {'expand': 'added_by'}])
+    def test_client_list_and_detail(self, proposals, client_instance, params):
+        content, expected = self.get_both('client-list-create', 'async-client-list', params)
+        assert content == expected
+        content, expected = self.get_both('client-detail', 'async-client-detail', params, [client_instance.pk])
+        assert content == expected
+
+    @pytest.mark.parametrize('params', [
+        {'company_name': 'TEST'}, {'company_name': 'nope'}, {'has_phone': 'true'}, {'ordering': '-company_name'},
+    ])
+    def test_client_list_filters(self, proposals, user, params):
+        Client.objects.create(company_name="Another Co", added_by=user)
+        content, expected = self.get_both('client-list-create', 'async-client-list', params)
+        assert content == expected
+
+    def test_proposal_detail(self, proposals):
+        proposal = Proposal.objects.first()
+        content, expected = self.get_both('proposal-detail', 'async-proposal-detail', {'expand': 'client'}, [proposal.pk])
+        assert content == expected
+
+    def test_other_users_rows(self, proposals, other_user):
+        proposal = Proposal.objects.first()
+        self.token = str(RefreshToken.for_user(other_user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        content, expected = self.get_both('proposal-detail', 'async-proposal-detail', {}, [proposal.pk])
+        assert content == expected
+        assert self.get_async(reverse('proposals:async-proposal-list')).json()['results'] == []
+
+    def test_unauthenticated(self):
+        response = async_to_sync(self.async_client.get)(reverse('proposals:async-client-list'))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_asgi_command():
+    out = io.StringIO()
+    call_command('benchmark_asgi', requests=4, login_requests=2, concurrency=2, proposals=3, stdout=out)
+    assert "async view" in out.getvalue()
+    assert not User.objects.exists() and not Proposal.objects.exists()
+
+@pytest.mark.django_db
+class TestProposalStats:
+    def setup_method(self):
+        self.client = APIClient()
+
+    def authenticate(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+
+    def rollup(self):
+        return sorted(ProposalStat.objects.values_list(
+            'user_id', 'client_id', 'month', 'proposal_count', 'last_proposal_at',
+        ))
+
+    def assert_matches_rebuild(self):
+        incremental = self.rollup()
+        call_command('rebuild_proposal_stats', stdout=io.StringIO())
+        assert incremental == self.rollup()
+
+    @pytest.fixture
+    def clients(self, user, client_instance):
+        other = Client.objects.create(company_name="Beta", email="beta@example.com", added_by=user)
+        return client_instance, other
+
+    def test_writes_keep_rollup_in_sync(self, user, clients):
+        first, second = clients
+        self.authenticate(user)
+        url = reverse('proposals:proposal-list-create')
+        ids = [
+            self.client.post(url, {"client_id": first.id, "title": f"P{i}", "description": "x"}).data['id']
+            for i in range(3)
+        ]
+        assert self.rollup()[0][3] == 3
+        response = self.client.patch(reverse('proposals:proposal-detail', args=[ids[-1]]), {"client_id": second.id})
+        assert response.status_code == status.HTTP_200_OK
+        self.assert_matches_rebuild()
+        self.client.delete(reverse('proposals:proposal-detail', args=[ids[0]]))
+        self.assert_matches_rebuild()
+        assert [row[3] for row in self.rollup()] == [1, 1]
+        bulk_url = reverse('proposals:proposal-bulk')
+        self.client.post(bulk_url, [{"client_id": second.id, "title": "B", "description": "x"}] * 4, format='json')
+        self.client.patch(bulk_url, [{"id": ids[1], "client_id": second.id}], format='json')
+        self.assert_matches_rebuild()
+        [(user_id, client_id, _, count, latest)] = self.rollup()
+        assert (user_id, client_id, count) == (user.id, second.id, 6)
+        assert latest == Proposal.objects.latest('created_at').created_at
+        second.delete()
+        assert not ProposalStat.objects.exists()
+
+    def test_months_and_latest(self, user, clients):
+        first, second = clients
+        old = Proposal.objects.create(client=first, title="Old", description="x", created_by=user)
+        Proposal.objects.filter(pk=old.pk).update(created_at=old.created_at.replace(year=2020, month=3, day=5))
+        call_command('rebuild_proposal_stats', stdout=io.StringIO())
+        newest = Proposal.objects.create(client=first, title="New", description="x", created_by=user)
+        Proposal.objects.create(client=second, title="Beta", description="x", created_by=user)
+        newest.delete()
+        self.assert_matches_rebuild()
+        months = {month for _, _, month, _, _ in self.rollup()}
+        assert months == {date(2020, 3, 1), date.today().replace(day=1)}
+
+    def test_stats_endpoint(self, user, other_user, clients, django_assert_max_num_queries):
+        first, second = clients
+        for client, count in ((first, 3), (second, 1)):
+            for i in range(count):
+                Proposal.objects.create(client=client, title=f"P{i}", description="x", created_by=user)
+        foreign = Client.objects.create(company_name="Foreign", email="f@example.com", added_by=other_user)
+        Proposal.objects.create(client=foreign, title="Other", description="x", created_by=other_user)
+        self.authenticate(user)
+        with django_assert_max_num_queries(ProposalStatsView.query_budget['GET']):
+            response = self.client.get(reverse('proposals:proposal-stats'))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['total'] == 4
+        assert [(row['company_name'], row['proposal_count']) for row in response.data['by_client']] == [
+            ("Test Client", 3), ("Beta", 1),
+        ]
+        assert response.data['by_month'] == [{'month': f'{date.today():%Y-%m}', 'proposal_count': 4}]
+        assert response.data['recent_clients'][0]['client'] == second.id
+
+    def test_stats_requires_authentication(self):
+        assert self.client.get(reverse('proposals:proposal-stats')).status_code == status.HTTP_401_UNAUTHORIZED
+
+@pytest.mark.django_db
+class TestListFilters:
+    def setup_method(self):
+        self.client = APIClient()
+
+    @pytest.fixture
+    def rows(self, user, other_user):
+        clients = [
+            Client.objects.create(company_name="Acme Corp", email="a@acme.com", added_by=user),
+            Client.objects.create(company_name="acme labs", phone_number="+12025550111", added_by=user),
+            Client.objects.create(company_name="Beta", email="", phone_number="+12025550122", added_by=user),
+            Client.objects.create(company_name="Acme Foreign", email="f@example.com", added_by=other_user),
+        ]
+        proposals = [
+            Proposal.objects.create(client=clients[i % 3], title=title, description="x", created_by=user)
+            for i, title in enumerate(["Website redesign", "web hosting", "Branding", "Websocket API"])
+        ]
+        Proposal.objects.filter(pk=proposals[0].pk).update(created_at=proposals[0].created_at - timedelta(days=30))
+        Proposal.objects.create(client=clients[3], title="Website", description="x", created_by=other_user)
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        return clients, proposals
+
+    def get(self, name, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(f'proposals:{name}'), params)
+        assert response.status_code == status.HTTP_200_OK, response.data
+        self.queries = [query['sql'] for query in queries.captured_queries]
+        return response
+
+    def ids(self, response):
+        return [row['id'] for row in response.data['results']]
+
+    def assert_no_full_scan(self, table):
+        """
+        EXPLAIN the list query and fail if SQLite reads the table (or an
+        index) from end to end instead of searching it.
+        """
+        if connection.vendor != 'sqlite':
+            pytest.skip("Query plans are checked on SQLite.")
+        [sql] = [sql for sql in self.queries if f'FROM "{table}"' in sql and 'LIMIT' in sql]
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            plan = [row[-1] for row in cursor.fetchall()]
+        assert not [step for step in plan if step.startswith('SCAN')], plan
+        return plan
+
+    @pytest.mark.parametrize('params, expected', [
+        ({'client': 0}, [3, 0]),
+        ({'title': 'WEB'}, [3, 1, 0]),
+        ({'title': 'web h'}, [1]),
+        ({'created_after': '2000-01-01T00:00:00Z', 'created_before': '2100-01-01T00:00:00Z'}, [3, 2, 1, 0]),
+        ({'updated_after': '2100-01-01T00:00:00Z'}, []),
+    ])
+    def test_proposal_filters(self, rows, params, expected):
+        clients, proposals = rows
+        params = {key: clients[value].id if key == 'client' else value for key, value in params.items()}
+        response = self.get('proposal-list-create', params)
+        assert self.ids(response) == [proposals[i].id for i in expected]
+        self.assert_no_full_scan('proposals_proposal')
+
+    def test_created_range(self, rows):
+        _, proposals = rows
+        proposals[0].refresh_from_db()
+        cutoff = (proposals[0].created_at + timedelta(days=15)).isoformat()
+        assert self.ids(self.get('proposal-list-create', {'created_before': cutoff})) == [proposals[0].id]
+        self.assert_no_full_scan('proposals_proposal')
+
+    @pytest.mark.parametrize('params, expected', [
+        ({'company_name': 'acme'}, [0, 1]),
+        ({'has_email': 'true'}, [0]),
+        ({'has_email': 'false'}, [2, 1]),
+        ({'has_phone': 'true', 'company_name': 'b'}, [2]),
+    ])
+    def test_client_filters(self, rows, params, expected):
+        clients, _ = rows
+        response = self.get('client-list-create', params)
+        assert self.ids(response) == [clients[i].id for i in expected]
+        self.assert_no_full_scan('proposals_client')
+
+    def test_ordering_pages_with_cursor(self, rows):
+        _, proposals = rows
+        Proposal.objects.filter(pk=proposals[2].pk).update(updated_at=proposals[2].updated_at + timedelta(days=1))
+        expected = list(Proposal.objects.filter(created_by=proposals[0].created_by).order_by('-updated_at', '-pk'))
+        response = self.get('proposal-list-create', {'ordering': '-updated_at', 'page_size': 2})
+        self.assert_no_full_scan('proposals_proposal')
+        second = self.client.get(response.data['next'])
+        assert self.ids(response) + self.ids(second) == [proposal.id for proposal in expected]
+
+    def test_unsafe_ordering_is_ignored(self, rows):
+        default = self.ids(self.get('proposal-list-create', {}))
+        assert self.ids(self.get('proposal-list-create', {'ordering': 'description'})) == default
+        assert self.ids(self.get('proposal-list-create', {'ordering': 'client__company_name'})) == default
+
+    def test_invalid_filter_value(self, rows):
+        response = self.client.get(reverse('proposals:proposal-list-create'), {'created_after': 'yesterday'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'created' in response.data
+
+@pytest.mark.django_db
+class TestClientCounters:
+    def setup_method(self):
+        self.client = APIClient()
+
+    @pytest.fixture
+    def clients(self, user, client_instance):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        other = Client.objects.create(company_name="Beta", email="beta@example.com", added_by=user)
+        return client_instance, other
+
+    def counters(self, client):
+        client.refresh_from_db()
+        return client.proposal_count, client.last_proposal_at
+
+    def test_counters_follow_writes(self, clients):
+        first, second = clients
+        url = reverse('proposals:proposal-list-create')
+        ids = [
+            self.client.post(url, {"client_id": first.id, "title": f"P{i}", "description": "x"}).data['id']
+            for i in range(3)
+        ]
+        newest = Proposal.objects.get(pk=ids[-1]).created_at
+        assert self.counters(first) == (3, newest)
+        assert self.counters(second) == (0, None)
+        self.client.patch(reverse('proposals:proposal-detail', args=[ids[-1]]), {"client_id": second.id})
+        assert self.counters(first) == (2, Proposal.objects.get(pk=ids[1]).created_at)
+        assert self.counters(second) == (1, newest)
+        self.client.delete(reverse('proposals:proposal-detail', args=[ids[-1]]))
+        assert self.counters(second) == (0, None)
+        bulk_url = reverse('proposals:proposal-bulk')
+        self.client.post(bulk_url, [{"client_id": second.id, "title": "B", "description": "x"}] * 2, format='json')
+        self.client.patch(bulk_url, [{"id": pk, "client_id": second.id} for pk in ids[:2]], format='json')
+        assert self.counters(first) == (0, None)
+        assert self.counters(second)[0] == 4
+        assert stats.repair_client_counters() == []
+
+    def test_counters_in_responses_and_etag(self, clients):
+        first, _ = clients
+        detail = reverse('proposals:client-detail', args=[first.id])
+        response = self.client.get(detail)
+        assert (response.data['proposal_count'], response.data['last_proposal_at']) == (0, None)
+        list_url = reverse('proposals:client-list-create')
+        assert self.client.get(list_url)['X-Cache'] == 'MISS'
+        Proposal.objects.create(client=first, title="New", description="x", created_by=first.added_by)
+        assert self.client.get(detail, HTTP_IF_NONE_MATCH=response['ETag']).status_code == status.HTTP_200_OK
+        listed = self.client.get(list_url)
+        assert listed['X-Cache'] == 'MISS'
+        assert listed.data['results'][1]['proposal_count'] == 1
+
+    def test_sort_by_activity(self, user, clients):
+        first, second = clients
+        idle = Client.objects.create(company_name="Idle", email="idle@example.com", added_by=user)
+        for client in (second, first, first):
+            Proposal.objects.create(client=client, title="P", description="x", created_by=user)
+        url = reverse('proposals:client-list-create')
+        for ordering, expected in (
+            ('-last_proposal_at', [first, second, idle]),
+            ('last_proposal_at', [idle, second, first]),
+            ('-proposal_count', [first, second, idle]),
+        ):
+            ids, next_url = [], f'{url}?ordering={ordering}&page_size=1'
+            while next_url:
+                response = self.client.get(next_url)
+                ids += [row['id'] for row in response.data['results']]
+                next_url = response.data['next']
+            assert ids == [client.id for client in expected]
+        previous = self.client.get(response.data['previous'])
+        assert [row['id'] for row in previous.data['results']] == [second.id]
+
+    def test_repair_command(self, clients):
+        first, second = clients
+        Proposal.objects.create(client=first, title="P", description="x", created_by=first.added_by)
+        Client.objects.filter(pk=first.pk).update(proposal_count=7)
+        Client.objects.filter(pk=second.pk).update(last_proposal_at=first.created_at)
+        out = io.StringIO()
+        call_command('repair_client_counters', dry_run=True, stdout=out)
+        assert "Found 2" in out.getvalue()
+        call_command('repair_client_counters', stdout=out)
+        assert self.counters(first)[0] == 1
+        assert self.counters(second) == (0, None)
+        assert stats.repair_client_counters() == []
+
+@pytest.mark.django_db
+class TestClientPhoneNormalization:
+    def setup_method(self):
+        self.client = APIClient()
+
+    @pytest.fixture
+    def owner(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {str(refresh.access_token)}')
+        return user
+
+    def test_phone_stored_as_e164(self, owner):
+        url = reverse('proposals:client-list-create')
+        response = self.client.post(url, {"company_name": "Acme", "phone_number": "+1 (202) 555-0123"}, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['phone_number'] == "+12025550123"
+        detail = reverse('proposals:client-detail', args=[response.data['id']])
+        self.client.patch(detail, {"phone_number": "+1 202.555.0199"}, format='json')
+        assert Client.objects.get().phone_number == "+12025550199"
+        response = self.client.post(url, {"company_name": "Bad", "phone_number": "555"}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['phone_number'] == ["Enter a valid phone number."]
+
+    def test_filter_by_phone(self, owner):
+        match = Client.objects.create(company_name="Acme", phone_number="+12025550123", added_by=owner)
+        Client.objects.create(company_name="Other", phone_number="+12025550199", added_by=owner)
+        url = reverse('proposals:client-list-create')
+        response = self.client.get(url, {'phone_number': '+1 202-555-0123'})
+        assert [row['id'] for row in response.data['results']] == [match.id]
+        assert self.client.get(url, {'phone_number': 'garbage'}).data['results'] == []
+
+    def test_phone_normalized_outside_the_api(self, owner):
+        saved = Client.objects.create(company_name="Saved", phone_number="+1 (202) 555-0123", added_by=owner)
+        assert saved.phone_number == "+12025550123"
+        bulk, updated = Client.objects.bulk_create([
+            Client(company_name="Bulk", phone_number="+1 202.555.0188", added_by=owner),
+            Client(company_name="Updated", email="u@example.com", added_by=owner),
+        ])
+        Client.objects.filter(pk=updated.pk).update(phone_number="+1-202-555-0177")
+        url = reverse('proposals:client-list-create')
+        for number, client in (("+1 202 555 0123", saved), ("+12025550188", bulk), ("+1 202 555 0177", updated)):
+            response = self.client.get(url, {'phone_number': number})
+            assert [row['id'] for row in response.data['results']] == [client.id]
+
+    def test_admin_form_normalizes_phone(self, owner):
+        from django.contrib import admin
+
+        request = mock.Mock(user=owner)
+        form_class = admin.site._registry[Client].get_form(request, fields=['company_name', 'phone_number', 'added_by'])
+        form = form_class(data={"company_name": "Admin", "phone_number": "+1 (202) 555-0166", "added_by": owner.pk})
+        assert form.is_valid(), form.errors
+        assert form.save().phone_number == "+12025550166"
+        form = form_class(data={"company_name": "Bad", "phone_number": "555", "added_by": owner.pk})
+        assert form.errors['phone_number'] == ["Enter a valid phone number."]
+
+    def test_migration_normalizes_existing_phones(self, owner):
+        from django.apps import apps as django_apps
+
+        migration = importlib.import_module('proposals.migrations.0009_normalize_client_phones')
+        formatted = Client.objects.create(company_name="A", added_by=owner)
+        unparseable = Client.objects.create(company_name="B", phone_number="ext. 12", added_by=owner)
+        # Rows written before the model normalized phone numbers.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {Client._meta.db_table} SET phone_number = %s WHERE id = %s', ["+1 202 555 0123", formatted.id],
+            )
+        migration.normalize_phones(django_apps, None)
+        formatted.refresh_from_db()
+        unparseable.refresh_from_db()
+        assert formatted.phone_number == "+12025550123"
+        assert unparseable.phone_number == "ext. 12"
@@ -1,11 +1,35 @@
 from django.urls import path
-from .views import ClientListCreateView, ClientDetailView, ProposalListCreateView, ProposalDetailView
+from .async_views import (
+    AsyncClientDetailView, AsyncClientListView, AsyncProposalDetailView, AsyncProposalListView,
+)
+from .views import (
+    CacheStatsView, ClientBulkView, ClientListCreateView, ClientDetailView, ProposalBulkView, ProposalContentView,
+    ProposalDocumentView, ProposalExportView, ProposalListCreateView, ProposalDetailView, ProposalRevisionDetailView,
+    ProposalRevisionListView, ProposalStatsView, SearchView,
+)
 
 app_name = 'proposals'
 
 urlpatterns = [
     path('clients/', ClientListCreateView.as_view(), name='client-list-create'),
+    path('clients/bulk/', ClientBulkView.as_view(), name='client-bulk'),
     path('clients/<int:pk>/', ClientDetailView.as_view(), name='client-detail'),
     path('proposals/', ProposalListCreateView.as_view(), name='proposal-list-create'),
+    path('proposals/bulk/', ProposalBulkView.as_view(), name='proposal-bulk'),
+    path('proposals/export/', ProposalExportView.as_view(), name='proposal-export'),
     path('proposals/<int:pk>/', ProposalDetailView.as_view(), name='proposal-detail'),
+    path('proposals/<int:pk>/content/', ProposalContentView.as_view(), name='proposal-content'),
+    path('proposals/<int:pk>/document/', ProposalDocumentView.as_view(), name='proposal-document'),
+    path('proposals/<int:pk>/revisions/', ProposalRevisionListView.as_view(), name='proposal-revisions'),
+    path(
+        'proposals/<int:pk>/revisions/<int:number>/', ProposalRevisionDetailView.as_view(),
+        name='proposal-revision',
+    ),
+    path('async/clients/', AsyncClientListView.as_view(), name='async-client-list'),
+    path('async/clients/<int:pk>/', AsyncClientDetailView.as_view(), name='async-client-detail'),
+    path('async/proposals/', AsyncProposalListView.as_view(), name='async-proposal-list'),
+    path('async/proposals/<int:pk>/', AsyncProposalDetailView.as_view(), name='async-proposal-detail'),
+    path('stats/', ProposalStatsView.as_view(), name='proposal-stats'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('cache-stats/', CacheStatsView.as_view(), name='cache-stats'),
 ]
\ No newline at end of file
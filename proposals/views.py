@@ -1,59 +1,506 @@
-from rest_framework import generics, permissions
-from proposals.models import Client, Proposal
-from proposals.serializers import ClientSerializer, ProposalSerializer
+import hashlib
+from datetime import datetime
 
-class ClientListCreateView(generics.ListCreateAPIView):
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from accounts import phones
+from proposals import cache, content, documents, revisions, rows, stats
+from proposals.export import CSVRenderer, NDJSONRenderer, stream_csv, stream_ndjson
+from proposals.filters import ClientFilter, OwnerOrderingFilter, ProposalFilter
+from proposals.models import Client, Proposal, ProposalRevision
+from proposals.pagination import OwnerCursorPagination
+from proposals.search import CLIENT, PROPOSAL, get_search_backend
+from proposals.serializers import (
+    BulkClientSerializer, BulkProposalSerializer, ClientSerializer, ProposalRevisionSerializer, ProposalSerializer,
+    ProposalVersionSerializer,
+)
+
+class SparseFieldsViewMixin:
+    """
+    Read ?fields= and ?expand= from the query string and apply them to both
+    the serializer and the queryset, so unrequested columns are never fetched.
+    """
+    def get_query_list(self, param):
+        value = self.request.query_params.get(param, '')
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        return names or None
+
+    # Left out of GET responses unless named in ?fields=.
+    deferred_fields = ()
+
+    def get_sparse_options(self):
+        fields = None
+        if self.request.method in permissions.SAFE_METHODS:
+            fields = self.get_query_list('fields')
+            if fields is None and self.deferred_fields:
+                fields = [
+                    name for name in self.get_serializer_class().Meta.fields if name not in self.deferred_fields
+                ]
+        return fields, self.get_query_list('expand')
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs['fields'], kwargs['expand'] = self.get_sparse_options()
+        return super().get_serializer(*args, **kwargs)
+
+    def get_ordering_keys(self, queryset):
+        """
+        Return the columns cursor pagination reads from each row: the field
+        chosen with ?ordering=, or the model's default ordering.
+        """
+        ordering = queryset.model._meta.ordering
+        for backend in self.filter_backends:
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(self.request, queryset, self) or ordering
+        return [name.lstrip('-') for name in ordering if name.lstrip('-') != 'pk']
+
+    def get_queryset(self):
+        fields, expand = self.get_sparse_options()
+        queryset = super().get_queryset()
+        extra = self.get_ordering_keys(queryset)
+        return self.get_serializer_class().optimize_queryset(queryset, fields, expand, extra=extra)
+
+class ConditionalDetailMixin:
+    """
+    ETag and Last-Modified support for detail views.
+
+    Conditional requests (If-None-Match, If-Modified-Since, If-Match,
+    If-Unmodified-Since) are answered from a timestamp-only query, so a 304 or
+    412 never loads or serializes the object. The validators cover the object's
+    updated_at, that of every expanded relation, and the requested fields/expand.
+    """
+    CONDITIONAL_HEADERS = (
+        'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_MATCH', 'HTTP_IF_UNMODIFIED_SINCE',
+    )
+
+    def get_validator_fields(self):
+        """
+        Return the lookups whose values determine the representation's version:
+        `updated_at` on each rendered model, or the rendered columns of models
+        that have no `updated_at` (e.g. users).
+        """
+        fields, expand = self.get_sparse_options()
+        select_related, only = self.get_serializer_class().get_query_plan(fields, expand)
+        model = self.get_queryset().model
+        lookups = []
+        for path in [''] + select_related:
+            related = model
+            for name in filter(None, path.split('__')):
+                related = related._meta.get_field(name).related_model
+            prefix = f'{path}__' if path else ''
+            if any(f.name == 'updated_at' for f in related._meta.concrete_fields):
+                lookups.append(f'{prefix}updated_at')
+                lookups += [
+                    f'{prefix}{name}' for name in getattr(related, 'DENORMALIZED_FIELDS', ())
+                    if f'{prefix}{name}' in only
+                ]
+            else:
+                lookups += [
+                    name for name in only
+                    if name.startswith(prefix) and '__' not in name[len(prefix):]
+                ]
+        return lookups
+
+    def compute_validators(self, values):
+        fields, expand = self.get_sparse_options()
+        digest = hashlib.md5(repr((values, fields, expand)).encode(), usedforsecurity=False).hexdigest()
+        timestamps = [value for value in values if isinstance(value, datetime)]
+        last_modified = int(max(timestamps).timestamp()) if timestamps else None
+        return quote_etag(digest), last_modified
+
+    def validators_from_instance(self, instance):
+        values = []
+        for lookup in self.get_validator_fields():
+            value = instance
+            for name in lookup.split('__'):
+                value = getattr(value, name) if value is not None else None
+            values.append(value)
+        return self.compute_validators(values)
+
+    def validators_from_db(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = (
+            self.get_queryset()
+            .filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            .values_list(*self.get_validator_fields())
+            .first()
+        )
+        return self.compute_validators(list(row)) if row is not None else (None, None)
+
+    def check_preconditions(self, request):
+        """
+        Return a 304/412 response if the request's preconditions say so, else None.
+        """
+        if not any(header in request.META for header in self.CONDITIONAL_HEADERS):
+            return None
+        etag, last_modified = self.validators_from_db()
+        if etag is None:
+            return None
+        placeholder = self.set_validator_headers(HttpResponse(), etag, last_modified)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified, response=placeholder)
+        return None if response is placeholder else response
+
+    def set_validator_headers(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        conditional = self.check_preconditions(request)
+        if conditional is not None:
+            return conditional
+        instance = self.get_object()
+        response = Response(self.get_serializer(instance).data)
+        return self.set_validator_headers(response, *self.validators_from_instance(instance))
+
+    def update(self, request, *args, **kwargs):
+        conditional = self.check_preconditions(request)
+        if conditional is not None:
+            return conditional
+        response = super().update(request, *args, **kwargs)
+        return self.set_validator_headers(response, *self.validators_from_instance(response.data.serializer.instance))
+
+class CachedListMixin:
+    """
+    Serve list pages from the per-user response cache (see proposals.cache).
+    While it is enabled, responses carry X-Cache: HIT or MISS.
+    """
+    cache_resource = None
+
+    def list(self, request, *args, **kwargs):
+        if not cache.is_enabled():
+            return super().list(request, *args, **kwargs)
+        key = cache.response_key(request.user.pk, self.cache_resource, request.get_full_path())
+        data = cache.get_cache().get(key)
+        cache.record(hit=data is not None)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        response = super().list(request, *args, **kwargs)
+        cache.get_cache().set(key, response.data, cache.get_timeout())
+        response['X-Cache'] = 'MISS'
+        return response
+
+class RowListMixin:
+    """
+    Build list pages with proposals.rows: a values_list() query and row
+    builders compiled once per fields/expand combination, instead of a
+    serializer walk per row. FAST_LIST_SERIALIZATION = False turns it off.
+    """
+    def list(self, request, *args, **kwargs):
+        if not getattr(settings, 'FAST_LIST_SERIALIZATION', True):
+            return super().list(request, *args, **kwargs)
+        fields, expand = self.get_sparse_options()
+        plan = rows.compile_rows(self.get_serializer_class(), fields, expand)
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = rows.rows_queryset(queryset, plan, extra=self.get_ordering_keys(queryset))
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(plan.render(queryset))
+        return self.get_paginated_response(plan.render(page))
+
+class ClientListCreateView(CachedListMixin, RowListMixin, SparseFieldsViewMixin, generics.ListCreateAPIView):
     """
     List all clients or create a new client.
     """
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OwnerCursorPagination
+    filter_backends = [DjangoFilterBackend, OwnerOrderingFilter]
+    filterset_class = ClientFilter
+    ordering_fields = ['company_name', 'created_at', 'proposal_count', 'last_proposal_at']
+    cache_resource = cache.CLIENTS
+    # Maximum queries per request, whatever the row count; enforced by the test suite.
+    query_budget = {'GET': 2, 'POST': 3}
 
     def get_queryset(self):
         """
         Return only clients added by the current user.
         """
-        return self.queryset.filter(added_by=self.request.user)
+        return super().get_queryset().filter(added_by=self.request.user)
 
-class ClientDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ClientDetailView(ConditionalDetailMixin, SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update, or delete a client.
     """
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'GET': 2, 'PUT': 6, 'PATCH': 6, 'DELETE': 9}
 
     def get_queryset(self):
         """
         Restrict to clients added by the current user.
         """
-        return self.queryset.filter(added_by=self.request.user)
+        return super().get_queryset().filter(added_by=self.request.user)
 
-class ProposalListCreateView(generics.ListCreateAPIView):
+class ProposalListCreateView(CachedListMixin, RowListMixin, SparseFieldsViewMixin, generics.ListCreateAPIView):
     """
     List all proposals or create a new proposal.
     """
     queryset = Proposal.objects.all()
     serializer_class = ProposalSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OwnerCursorPagination
+    filter_backends = [DjangoFilterBackend, OwnerOrderingFilter]
+    filterset_class = ProposalFilter
+    ordering_fields = ['created_at', 'updated_at']
+    cache_resource = cache.PROPOSALS
+    # Descriptions can be large; fetch them with ?fields= or the content endpoint.
+    deferred_fields = ('description',)
+    query_budget = {'GET': 2, 'POST': 10}
 
     def get_queryset(self):
         """
         Return only proposals created by the current user.
         """
-        return self.queryset.filter(created_by=self.request.user)
+        return super().get_queryset().filter(created_by=self.request.user)
 
-class ProposalDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProposalDetailView(ConditionalDetailMixin, SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update, or delete a proposal.
     """
     queryset = Proposal.objects.all()
     serializer_class = ProposalSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = {'GET': 2, 'PUT': 16, 'PATCH': 15, 'DELETE': 8}
 
     def get_queryset(self):
         """
         Restrict to proposals created by the current user.
         """
-        return self.queryset.filter(created_by=self.request.user)
\ No newline at end of file
+        return super().get_queryset().filter(created_by=self.request.user)
+
+class ProposalContentView(generics.GenericAPIView):
+    """
+    Serve a proposal's description as plain text, streamed in chunks.
+    A single `Range: bytes=...` request gets 206 Partial Content.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    chunk_size = 64 * 1024
+    # Plus one query per chunk of the body.
+    query_budget = {'GET': 2}
+
+    def get_queryset(self):
+        return Proposal.objects.filter(pk=self.kwargs['pk'], created_by=self.request.user)
+
+    def get(self, request, pk):
+        queryset = self.get_queryset()
+        info = content.stored_info(queryset, 'description')
+        if info is None:
+            raise Http404
+        size, compressed = info
+        if compressed:
+            data = queryset.values_list('description', flat=True).get().encode()
+            size = len(data)
+        try:
+            byte_range = content.parse_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        start, end = byte_range or (0, size)
+        if compressed:
+            body = (data[offset:min(offset + self.chunk_size, end)] for offset in range(start, end, self.chunk_size))
+        else:
+            body = content.read_chunks(queryset, 'description', start, end, self.chunk_size)
+        response = StreamingHttpResponse(
+            body,
+            status=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
+            content_type='text/plain; charset=utf-8',
+        )
+        response['Content-Length'] = end - start
+        response['Accept-Ranges'] = 'bytes'
+        if byte_range:
+            response['Content-Range'] = f'bytes {start}-{end - 1}/{size}'
+        return response
+
+class ProposalDocumentView(generics.GenericAPIView):
+    """
+    A proposal rendered as an HTML document, served from the render cache
+    when possible (see proposals.documents). Responses carry X-Cache.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    # A hit needs only the version query; a miss also loads the context.
+    query_budget = {'GET': 3}
+
+    def get(self, request, pk):
+        document = documents.get_document(Proposal.objects.filter(pk=pk, created_by=request.user))
+        if document is None:
+            raise Http404
+        html, cached = document
+        response = HttpResponse(html, content_type='text/html; charset=utf-8')
+        response['X-Cache'] = 'HIT' if cached else 'MISS'
+        return response
+
+class ProposalRevisionMixin:
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_proposal(self):
+        return get_object_or_404(Proposal.objects.only('pk'), pk=self.kwargs['pk'], created_by=self.request.user)
+
+class ProposalRevisionListView(ProposalRevisionMixin, generics.ListAPIView):
+    """
+    List a proposal's revisions, newest first.
+    """
+    serializer_class = ProposalRevisionSerializer
+    pagination_class = OwnerCursorPagination
+    query_budget = {'GET': 3}
+
+    def get_queryset(self):
+        return ProposalRevision.objects.filter(proposal=self.get_proposal()).defer('data')
+
+class ProposalRevisionDetailView(ProposalRevisionMixin, generics.RetrieveAPIView):
+    """
+    Retrieve a proposal as it was at revision `number`.
+    """
+    serializer_class = ProposalVersionSerializer
+    query_budget = {'GET': 3}
+
+    def get_object(self):
+        try:
+            return revisions.get_version(self.get_proposal().pk, self.kwargs['number'])
+        except ProposalRevision.DoesNotExist:
+            raise Http404
+
+class BulkWriteView(generics.GenericAPIView):
+    """
+    POST a list to create objects, PATCH a list of {"id": ..., ...} to update them.
+    The whole list is validated first and written in one transaction; if any item
+    is invalid nothing is written and the response lists errors per item.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_items = 1000
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(many=True, allow_empty=False, max_length=self.max_items)
+        return super().get_serializer(*args, **kwargs)
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        objs = serializer.save()
+        return Response(self.get_serializer(objs).data, status=status.HTTP_201_CREATED)
+
+    def patch(self, request):
+        ids = set()
+        if isinstance(request.data, list):
+            for item in request.data[:self.max_items]:
+                try:
+                    ids.add(int(item['id']))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        instances = self.get_queryset().in_bulk(ids)
+        serializer = self.get_serializer(instances, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        objs = serializer.save()
+        return Response(self.get_serializer(objs).data)
+
+class ClientBulkView(BulkWriteView):
+    """
+    Create or update many clients at once.
+    """
+    serializer_class = BulkClientSerializer
+    query_budget = {'POST': 5, 'PATCH': 8}
+
+    def get_queryset(self):
+        return Client.objects.filter(added_by=self.request.user)
+
+class ProposalBulkView(BulkWriteView):
+    """
+    Create or update many proposals at once.
+    """
+    serializer_class = BulkProposalSerializer
+    query_budget = {'POST': 11, 'PATCH': 17}
+
+    def get_queryset(self):
+        return Proposal.objects.filter(created_by=self.request.user)
+
+class ProposalExportView(generics.GenericAPIView):
+    """
+    Stream all of the current user's proposals as CSV or NDJSON.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+    streams = {'csv': stream_csv, 'ndjson': stream_ndjson}
+
+    def get_queryset(self):
+        return Proposal.objects.filter(created_by=self.request.user)
+
+    def get(self, request):
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            self.streams[renderer.format](self.get_queryset()),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = f'attachment; filename="proposals.{renderer.format}"'
+        return response
+
+class CacheStatsView(generics.GenericAPIView):
+    """
+    Hit/miss counters for the list response cache, plus this process's
+    phone number parsing cache (staff only).
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({**cache.stats(), 'phone_numbers': phones.stats()})
+
+class ProposalStatsView(generics.GenericAPIView):
+    """
+    Dashboard statistics for the current user's proposals: totals per client
+    and per month, and the most recently active clients. Read from the
+    rollup in proposals.stats, never from the proposals themselves.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    recent_clients = 5
+    query_budget = {'GET': 2}
+
+    def get(self, request):
+        return Response(stats.summarize(request.user.pk, recent=self.recent_clients))
+
+class SearchView(generics.GenericAPIView):
+    """
+    Ranked full-text search over the current user's clients and proposals.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 20
+    max_limit = 100
+
+    def get_int_param(self, name, default, maximum=None):
+        try:
+            value = int(self.request.query_params.get(name, default))
+        except (TypeError, ValueError):
+            raise ValidationError({name: "A non-negative integer is required."})
+        if value < 0:
+            raise ValidationError({name: "A non-negative integer is required."})
+        return min(value, maximum) if maximum is not None else value
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        kind = request.query_params.get('type') or None
+        if kind not in (None, CLIENT, PROPOSAL):
+            raise ValidationError({'type': f"Must be '{CLIENT}' or '{PROPOSAL}'."})
+        limit = self.get_int_param('limit', self.default_limit, self.max_limit) or self.default_limit
+        offset = self.get_int_param('offset', 0)
+
+        hits = get_search_backend().search(query, owner=request.user.pk, kind=kind, limit=limit + 1, offset=offset)
+        url = request.build_absolute_uri()
+        next_url = replace_query_param(url, 'offset', offset + limit) if len(hits) > limit else None
+        if offset <= 0:
+            previous_url = None
+        elif offset <= limit:
+            previous_url = remove_query_param(url, 'offset')
+        else:
+            previous_url = replace_query_param(url, 'offset', offset - limit)
+        return Response({'next': next_url, 'previous': previous_url, 'results': hits[:limit]})